@@ -0,0 +1,170 @@
+import json
+import os
+from argparse import ArgumentParser
+
+import numpy as np
+
+from main.eval_measure import BaselineMeasureEval, CompiledTruth
+import util.misc as util
+from util.corpus import PAGE_LOADED, PAGE_EMPTY, PAGE_ERROR
+from util.geometry import PageGeometry
+
+# A truth bundle is a directory "<name>.gtbundle" holding the compiled truth side (see
+# BaselineMeasureEval.compile_truth) of many pages in flat arrays (saved as npy-files, which are memory mapped when the
+# bundle is opened):
+#   xs.npy, ys.npy    (n_points, int64) coordinates of the points of all normalized truth polygons of all pages
+#   line_offsets.npy  (n_lines + 1, int64) start of every polygon in xs and ys followed by the total number of points
+#   page_offsets.npy  (n_pages + 1, int64) start of every page in line_offsets followed by the total number of lines
+#   page_status.npy   (n_pages, int8) PAGE_LOADED, PAGE_EMPTY or PAGE_ERROR (see util.corpus)
+#   bbs.npy           (n_lines x 4, int64) bounding boxes of the polygons
+#   line_tols.npy     (n_lines x #tols, float64) tolerances of the polygons
+#   sweep_order.npy   (n_lines, int64) sweep order of the bounding boxes of every page (indices within the page)
+#   meta.json         format version, settings of the evaluation (see truth_settings), names of the pages
+TRUTH_BUNDLE_SUFFIX = ".gtbundle"
+TRUTH_BUNDLE_VERSION = 1
+
+
+def is_truth_bundle(path):
+    """Check if ``path`` names a truth bundle (a directory with suffix ``TRUTH_BUNDLE_SUFFIX``)."""
+    return os.path.normpath(path).endswith(TRUTH_BUNDLE_SUFFIX)
+
+
+def write_truth_bundle(bundle_path, page_names, bl_measure_eval, corpus=None):
+    """Load the truth pages ``page_names`` (see get_page_from_file, or from the corpus store ``corpus``), compile their
+    truth side with ``bl_measure_eval`` and save them as truth bundle ``bundle_path``. Pages which can't be loaded are
+    stored as such.
+
+    :param bundle_path: path to the truth bundle (directory with suffix ``TRUTH_BUNDLE_SUFFIX``)
+    :param page_names: paths to the txt- or xml-files holding the truth pages
+    :param bl_measure_eval: evaluation whose settings are used
+    :param corpus: optional corpus store holding the pages (instead of the files)
+    :type bundle_path: str
+    :type page_names: list of str
+    :type bl_measure_eval: BaselineMeasureEval
+    :return: the truth bundle
+    :rtype: TruthBundle
+    """
+    assert is_truth_bundle(bundle_path), "bundle_path has to end with {}".format(TRUTH_BUNDLE_SUFFIX)
+    assert type(page_names) == list, "page_names has to be a list"
+    assert isinstance(bl_measure_eval, BaselineMeasureEval), "bl_measure_eval has to be a BaselineMeasureEval"
+
+    pages = []
+    n_lines = []
+    page_status = []
+    for i, page_name in enumerate(page_names):
+        try:
+            page, error = corpus.get_page(i) if corpus is not None else util.get_page_from_file(page_name)
+        except IOError:
+            page, error = None, True
+
+        if error or page is None:
+            page_status.append(PAGE_ERROR if error else PAGE_EMPTY)
+            n_lines.append(0)
+            continue
+        truth = bl_measure_eval.compile_truth(page)
+        if not isinstance(truth.polys_norm, PageGeometry):
+            truth.polys_norm = PageGeometry.from_polygons(truth.polys_norm)
+        page_status.append(PAGE_LOADED)
+        n_lines.append(len(truth))
+        pages.append(truth)
+
+    n_tols = 1 if bl_measure_eval.max_tols[0] < 0 else len(bl_measure_eval.max_tols)
+    line_offsets = np.zeros(sum(n_lines) + 1, dtype=np.int64)
+    np.cumsum(np.concatenate([truth.polys_norm.n_points for truth in pages] + [np.zeros(0, dtype=np.int64)]),
+              out=line_offsets[1:])
+    page_offsets = np.zeros(len(page_names) + 1, dtype=np.int64)
+    np.cumsum(n_lines, out=page_offsets[1:])
+
+    arrays = {"xs": np.concatenate([truth.polys_norm.xs for truth in pages] + [np.zeros(0, dtype=np.int64)]),
+              "ys": np.concatenate([truth.polys_norm.ys for truth in pages] + [np.zeros(0, dtype=np.int64)]),
+              "line_offsets": line_offsets,
+              "page_offsets": page_offsets,
+              "page_status": np.array(page_status, dtype=np.int8),
+              "bbs": np.concatenate([truth.polys_norm.bbs for truth in pages] + [np.zeros([0, 4], dtype=np.int64)]),
+              "line_tols": np.concatenate([np.asarray(truth.line_tols, dtype=float) for truth in pages] +
+                                          [np.zeros([0, n_tols])]),
+              "sweep_order": np.concatenate([truth.sweep_order for truth in pages] + [np.zeros(0, dtype=np.int64)])}
+
+    os.makedirs(bundle_path, exist_ok=True)
+    for name, values in arrays.items():
+        np.save(os.path.join(bundle_path, name + ".npy"), values)
+    meta = {"version": TRUTH_BUNDLE_VERSION,
+            "settings": list(bl_measure_eval.truth_settings()),
+            "page_names": page_names}
+    with open(os.path.join(bundle_path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+    return TruthBundle(bundle_path)
+
+
+class TruthBundle(object):
+
+    def __init__(self, bundle_path):
+        """ opens the truth bundle ``bundle_path`` (see ``write_truth_bundle``), the arrays are memory mapped
+        (read-only)
+
+        :param bundle_path: path to the truth bundle
+        """
+        with open(os.path.join(bundle_path, "meta.json"), "r") as f:
+            meta = json.load(f)
+        if meta.get("version") != TRUTH_BUNDLE_VERSION:
+            raise IOError("Unsupported version {} of truth bundle {}".format(meta.get("version"), bundle_path))
+
+        self.bundle_path = bundle_path
+        self.settings = tuple(meta["settings"])
+        self.page_names = meta["page_names"]
+        for name in ["xs", "ys", "line_offsets", "page_offsets", "page_status", "bbs", "line_tols", "sweep_order"]:
+            setattr(self, name, np.load(os.path.join(bundle_path, name + ".npy"), mmap_mode="r"))
+
+        n_lines = len(self.line_offsets) - 1
+        if not (len(self.page_names) == len(self.page_status) == len(self.page_offsets) - 1 and
+                self.page_offsets[-1] == n_lines == len(self.bbs) == len(self.line_tols) == len(self.sweep_order) and
+                self.line_offsets[-1] == len(self.xs) == len(self.ys)):
+            raise IOError("Inconsistent truth bundle {}".format(bundle_path))
+
+    def __len__(self):
+        return len(self.page_names)
+
+    def get_page(self, i):
+        """ returns the compiled truth side of the i-th page, which can be passed to
+        ``BaselineMeasureEval.calc_page_measure`` (of an evaluation with the settings of the bundle) instead of the
+        truth polygons
+
+        :param i: (int) index of the page
+        :return: a tuple containing the compiled truth (None if errors occur or no polygons are found) and a boolean
+        value representing if the polygons are loaded with errors
+        """
+        if self.page_status[i] != PAGE_LOADED:
+            return None, bool(self.page_status[i] == PAGE_ERROR)
+
+        line_start, line_end = self.page_offsets[i], self.page_offsets[i + 1]
+        offsets = self.line_offsets[line_start:line_end + 1]
+        start, end = offsets[0], offsets[-1]
+        polys_norm = PageGeometry(self.xs[start:end], self.ys[start:end], offsets - start,
+                                  bbs=self.bbs[line_start:line_end])
+
+        return CompiledTruth(polys_norm, self.line_tols[line_start:line_end], self.sweep_order[line_start:line_end],
+                             self.settings), False
+
+
+if __name__ == '__main__':
+    from main.run_measure import load_page_list
+
+    parser = ArgumentParser(usage="%(prog)s --truth <truth> --bundle <name>{} [OPTIONS]".format(TRUTH_BUNDLE_SUFFIX))
+    parser.add_argument('--truth', default='', type=str, metavar="STR",
+                        help="truth-files in txt- or lst-format or corpus store (see run_measure)")
+    parser.add_argument('--bundle', default='', type=str, metavar="STR",
+                        help="path to the truth bundle to write")
+    parser.add_argument('--min_tol', default=-1, type=int, metavar='INT',
+                        help="minimum tolerance value, -1 for dynamic calculation (default: %(default)s)")
+    parser.add_argument('--max_tol', default=-1, type=int, metavar='INT',
+                        help="maximum tolerance value, -1 for dynamic calculation (default: %(default)s)")
+    flags = parser.parse_args()
+
+    if flags.truth.endswith((".txt", ".xml")):
+        list_truth, corpus_truth = [flags.truth], None
+    else:
+        list_truth, corpus_truth = load_page_list(flags.truth)
+    bundle = write_truth_bundle(flags.bundle, list_truth, BaselineMeasureEval(flags.min_tol, flags.max_tol),
+                                corpus_truth)
+    print("Wrote {} pages and {} lines to {}".format(len(bundle), len(bundle.line_offsets) - 1, flags.bundle))
@@ -1,15 +1,86 @@
 from __future__ import print_function
+import collections
+import contextlib
+import copy
+import hashlib
+import multiprocessing
+import sys
 import numpy as np
 import math
 import os
 
 from util.misc import norm_poly_dists, calc_tols
 from util.measure import BaselineMeasure
-from util.geometry import Polygon
+from util.geometry import Polygon, PageGeometry
+from util.distance import ragged_points, bounding_boxes, line_rel_hits, PageDistances
+from util.spatial import PointGrid, candidate_pairs, sweep_order
+from util.alignment import greedy_alignment_batched
+from util.result_cache import page_key
+
+
+def _is_page_lines(polys):
+    """Check if ``polys`` holds the lines of a page, i.e., is a PageGeometry or a list of Polygons."""
+    return isinstance(polys, PageGeometry) or (type(polys) == list and
+                                               all([isinstance(poly, Polygon) for poly in polys]))
+
+
+# BaselineMeasureEval of a worker process of BaselineMeasureEval.calc_measure_for_pages
+_worker_eval = None
+
+# hash of the source files of the evaluation (see _code_version)
+_code_version_hash = None
+
+
+def _code_version():
+    """Hash of the source files of the modules evaluating a page, s.t. results cached by other versions aren't used."""
+    global _code_version_hash
+    if _code_version_hash is None:
+        h = hashlib.sha256()
+        for module_name in sorted({__name__, norm_poly_dists.__module__, PageDistances.__module__,
+                                   PointGrid.__module__, greedy_alignment_batched.__module__, Polygon.__module__}):
+            with open(sys.modules[module_name].__file__, "rb") as f:
+                h.update(f.read())
+        _code_version_hash = h.hexdigest()
+
+    return _code_version_hash
+
+
+def _init_worker(worker_eval):
+    global _worker_eval
+    _worker_eval = worker_eval
+
+
+def _calc_page_measure(page):
+    """Precision and recall matrices of the page given by a pair of truth and reco polygons, see calc_page_measure."""
+    return _worker_eval.calc_page_measure(*page)
+
+
+class CompiledTruth(object):
+    def __init__(self, polys_norm, line_tols, sweep_order, settings):
+        """
+        Truth side of the evaluation of a page, see BaselineMeasureEval.compile_truth.
+
+        :param polys_norm: list (or PageGeometry) of normalized TRUTH polygons
+        :param line_tols: #truthBaseLines x #distTolTicks array of tolerances of the truth polygons
+        :param sweep_order: sweep order of the bounding boxes of the truth polygons (see util.spatial.sweep_order)
+        :param settings: settings of the evaluation the truth side has been compiled with (see truth_settings)
+        """
+        assert _is_page_lines(polys_norm), "polys_norm has to be a list of Polygons or a PageGeometry object"
+        assert len(line_tols) == len(polys_norm) and len(sweep_order) == len(polys_norm), \
+            "line_tols and sweep_order have to be given for every truth polygon"
+
+        self.polys_norm = polys_norm
+        self.line_tols = line_tols
+        self.sweep_order = sweep_order
+        self.settings = tuple(settings)
+
+    def __len__(self):
+        return len(self.polys_norm)
 
 
 class BaselineMeasureEval(object):
-    def __init__(self, min_tol=10, max_tol=30, rel_tol=0.25, poly_tick_dist=5):
+    def __init__(self, min_tol=10, max_tol=30, rel_tol=0.25, poly_tick_dist=5, sorted_hits=False,
+                 compact_coords=False, keep_line_results=True):
         """
         Initialize BaselineMeasureEval object.
 
@@ -17,103 +88,288 @@ class BaselineMeasureEval(object):
         :param max_tol: MAXIMUM distance tolerance which is not penalized
         :param rel_tol: fraction of estimated interline distance as tolerance values
         :param poly_tick_dist: desired distance of points of the baseline
+        :param sorted_hits: evaluate the relative hits for all tolerances from the sorted point distances (faster for
+            wide tolerance ranges, equal up to rounding)
+        :param compact_coords: compute the point distances on page-offset int16/int32 coordinates (same results, less
+            memory traffic)
+        :param keep_line_results: keep the per tolerance per line results of every page in the BaselineMeasure
+            structure, otherwise only the page-wise and average values are kept
         """
         assert type(min_tol) == int and type(max_tol) == int, "min_tol and max_tol have to be ints"
         assert min_tol <= max_tol, "min_tol can't exceed max_tol"
         assert 0.0 < rel_tol <= 1.0, "rel_tol has to be in the range (0,1]"
         assert type(poly_tick_dist) == int, "poly_tick_dist has to be int"
+        assert type(sorted_hits) == bool, "sorted_hits has to be bool"
+        assert type(compact_coords) == bool, "compact_coords has to be bool"
 
-        self.max_tols = np.arange(min_tol, max_tol + 1)
+        self.max_tols = np.arange(min_tol, max_tol + 1, dtype=float)
         self.rel_tol = rel_tol
         self.poly_tick_dist = poly_tick_dist
+        self.sorted_hits = sorted_hits
+        self.compact_coords = compact_coords
         self.truth_line_tols = None
-        self.measure = BaselineMeasure()
+        # sweep order of the truth polygons belonging to truth_line_tols (see util.spatial.sweep_order), if known
+        self.truth_sweep_order = None
+        self.measure = BaselineMeasure(keep_line_results)
 
     def calc_measure_for_page_baseline_polys(self, polys_truth, polys_reco):
         """
         Calculate the BaselinMeasure stats for given truth and reco polygons of
         a single page and adds the results to the BaselineMeasure structure.
 
-        :param polys_truth: list of TRUTH polygons corresponding to a single page
-        :param polys_reco: list of RECO polygons corresponding to a single page
+        :param polys_truth: list (or PageGeometry) of TRUTH polygons corresponding to a single page
+        :param polys_reco: list (or PageGeometry) of RECO polygons corresponding to a single page
         """
-        assert type(polys_truth) == list and type(polys_reco) == list, "polys_truth and polys_reco have to be lists"
-        assert all([isinstance(poly, Polygon) for poly in polys_truth + polys_reco]), \
-            "elements of polys_truth and polys_reco have to be Polygons"
+        precision, recall = self.calc_page_measure(polys_truth, polys_reco)
+        self.add_page_measure(precision, recall)
+
+    def calc_page_measure(self, polys_truth, polys_reco):
+        """
+        Calculate the precision and recall matrices for given truth and reco polygons of a single page without adding
+        them to the BaselineMeasure structure.
+
+        :param polys_truth: list (or PageGeometry) of TRUTH polygons corresponding to a single page or their
+            CompiledTruth (see compile_truth)
+        :param polys_reco: list (or PageGeometry) of RECO polygons corresponding to a single page
+        :return: tuple of the #distTolTicks x #recoBaseLines precision and #distTolTicks x #truthBaseLines recall matrix
+        """
+        assert (isinstance(polys_truth, CompiledTruth) or _is_page_lines(polys_truth)) and _is_page_lines(polys_reco), \
+            "polys_truth and polys_reco have to be lists of Polygons or PageGeometry objects"
+
+        # Normalize baselines, so that poly points have a desired "distance", and calculate the tolerances of the truth
+        # polygons (unless the truth side of the page has been compiled before)
+        truth = polys_truth if isinstance(polys_truth, CompiledTruth) else self.compile_truth(polys_truth)
+        assert truth.settings == self.truth_settings(), "polys_truth have been compiled with other settings"
+        polys_truth_norm = truth.polys_norm
+        polys_reco_norm = norm_poly_dists(polys_reco, self.poly_tick_dist)
+        self.truth_line_tols = truth.line_tols
+        self.truth_sweep_order = truth.sweep_order
+
+        # Calculate the point distances of all reco and truth polygons once for both directions
+        page_dists = self.calc_page_distances(polys_truth_norm, polys_reco_norm)
+        # For each reco poly calculate the precision values for all tolerances
+        precision = self.calc_precision(polys_truth_norm, polys_reco_norm, page_dists)
+        # For each truth_poly calculate the recall values for all tolerances
+        recall = self.calc_recall(polys_truth_norm, polys_reco_norm, page_dists)
+
+        self.truth_line_tols = None
+        self.truth_sweep_order = None
+
+        return precision, recall
+
+    def compile_truth(self, polys_truth):
+        """
+        Calculate the truth side of the evaluation of a page, which doesn't depend on the reco polygons: the normalized
+        truth polygons, their tolerances and the sweep order of their bounding boxes. The result can be passed to
+        calc_page_measure (of an evaluation with the same settings) instead of the truth polygons.
+
+        :param polys_truth: list (or PageGeometry) of TRUTH polygons corresponding to a single page
+        :return: compiled truth of the page
+        :rtype: CompiledTruth
+        """
+        assert _is_page_lines(polys_truth), "polys_truth has to be a list of Polygons or a PageGeometry object"
 
         # Normalize baselines, so that poly points have a desired "distance"
         polys_truth_norm = norm_poly_dists(polys_truth, self.poly_tick_dist)
-        polys_reco_norm = norm_poly_dists(polys_reco, self.poly_tick_dist)
 
         # Optionally calculate tolerances
         if self.max_tols[0] < 0:
             tols = calc_tols(polys_truth_norm, self.poly_tick_dist, 250, self.rel_tol)
-            self.truth_line_tols = np.expand_dims(tols, axis=1)
+            line_tols = np.expand_dims(tols, axis=1)
         else:
-            self.truth_line_tols = np.tile(self.max_tols, [len(polys_truth_norm), 1])
+            line_tols = np.tile(self.max_tols, [len(polys_truth_norm), 1])
 
-        # For each reco poly calculate the precision values for all tolerances
-        precision = self.calc_precision(polys_truth_norm, polys_reco_norm)
-        # For each truth_poly calculate the recall values for all tolerances
-        recall = self.calc_recall(polys_truth_norm, polys_reco_norm)
+        return CompiledTruth(polys_truth_norm, line_tols, sweep_order(bounding_boxes(polys_truth_norm), line_tols),
+                             self.truth_settings())
+
+    def add_page_measure(self, precision, recall):
+        """
+        Add the precision and recall matrices of a single page (see calc_page_measure) to the BaselineMeasure structure.
 
-        # add results
+        :param precision: #distTolTicks x #recoBaseLines matrix of precisions
+        :param recall: #distTolTicks x #truthBaseLines matrix of recalls
+        """
         self.measure.add_per_dist_tol_tick_per_line_precision(precision)
         self.measure.add_per_dist_tol_tick_per_line_recall(recall)
-        self.truth_line_tols = None
 
-    def calc_precision(self, polys_truth, polys_reco):
+    def calc_measure_for_pages(self, pages_truth, pages_reco, jobs=1, result_cache=None):
         """
-        Calculates and returns precision values for given truth and reco polygons for all tolerances.
+        Calculate the BaselineMeasure stats for the pages given by pairs of truth and reco polygons, see
+        calc_measure_for_page_baseline_polys. With more than one job the pages are evaluated by a pool of worker
+        processes, the results are added in the order of the pages.
+
+        :param pages_truth: list of TRUTH polygons (lists or PageGeometry objects) of every page
+        :param pages_reco: list of RECO polygons (lists or PageGeometry objects) of every page
+        :param jobs: number of processes evaluating the pages, 0 for one per CPU
+        :param result_cache: optional ResultCache holding the results of evaluated pages
+        """
+        assert len(pages_truth) == len(pages_reco), "pages_truth and pages_reco have to be of the same length"
 
-        :param polys_truth: list of TRUTH polygons
-        :param polys_reco: list of RECO polygons
-        :return: precision values
+        self.calc_measure_for_page_stream(zip(pages_truth, pages_reco), jobs if len(pages_truth) > 1 else 1,
+                                          result_cache)
+
+    def calc_measure_for_page_stream(self, pages, jobs=1, result_cache=None):
+        """
+        Calculate the BaselineMeasure stats for the pages given by an iterable (e.g., a generator loading the pages) of
+        pairs of truth and reco polygons, see calc_measure_for_pages. The pages are taken from ``pages`` as they are
+        evaluated, at most 2 * jobs pages are held at once. Pages found in the result cache aren't evaluated again.
+
+        :param pages: iterable of pairs of TRUTH and RECO polygons (lists or PageGeometry objects) of every page
+        :param jobs: number of processes evaluating the pages, 0 for one per CPU
+        :param result_cache: optional ResultCache holding the results of evaluated pages (see result_settings)
+        """
+        assert type(jobs) == int and jobs >= 0, "jobs has to be a non-negative int"
+
+        jobs = jobs or multiprocessing.cpu_count()
+        settings = self.result_settings() if result_cache is not None else None
+
+        def add_result(key, result, b_cached):
+            precision, recall = result if b_cached or jobs == 1 else result.get()
+            if result_cache is not None and not b_cached:
+                result_cache.put(key, precision, recall)
+            self.add_page_measure(precision, recall)
+
+        # the workers get a copy of this evaluation without results
+        worker_eval = copy.copy(self)
+        worker_eval.measure = BaselineMeasure(self.measure.keep_line_results)
+        with multiprocessing.Pool(jobs, initializer=_init_worker, initargs=(worker_eval,)) if jobs > 1 \
+                else contextlib.nullcontext() as pool:
+            pending = collections.deque()
+            for page in pages:
+                key = result = None
+                if result_cache is not None:
+                    # the key of a compiled truth side is made of its normalized polygons
+                    key = page_key(page[0], page[1], settings) if not isinstance(page[0], CompiledTruth) else \
+                        page_key(page[0].polys_norm, page[1], settings + ("compiled truth",))
+                    result = result_cache.get(key)
+                b_cached = result is not None
+                if not b_cached:
+                    result = self.calc_page_measure(*page) if jobs == 1 else \
+                        pool.apply_async(_calc_page_measure, (page,))
+                pending.append((key, result, b_cached))
+                if len(pending) == 2 * jobs - 1:
+                    add_result(*pending.popleft())
+            while pending:
+                add_result(*pending.popleft())
+
+    def truth_settings(self):
+        """
+        Settings (and version of the code) the truth side of a page depends on, see compile_truth.
+
+        :return: tuple of the settings
+        """
+        return (_code_version(), float(self.max_tols[0]), float(self.max_tols[-1]), self.rel_tol, self.poly_tick_dist)
+
+    def result_settings(self):
+        """
+        Settings (and version of the code) the results of a page depend on, part of the key of cached results.
+
+        :return: tuple of the settings
+        """
+        return self.truth_settings() + (self.sorted_hits, self.compact_coords)
+
+    def calc_page_distances(self, polys_truth, polys_reco):
+        """
+        Calculates the minimum point distances between the given truth and reco polygons in both directions, which
+        are shared by the precision and recall calculation.
+
+        :param polys_truth: list (or PageGeometry) of TRUTH polygons
+        :param polys_reco: list (or PageGeometry) of RECO polygons
+        :return: PageDistances with the reco polygons as polygons to count and the truth polygons as reference
         """
-        assert type(polys_truth) == list and type(polys_reco) == list, "polys_truth and polys_reco have to be lists"
-        assert all([isinstance(poly, Polygon) for poly in polys_truth + polys_reco]), \
-            "elements of polys_truth and polys_reco have to be Polygons"
+        assert isinstance(polys_truth, (list, PageGeometry)) and isinstance(polys_reco, (list, PageGeometry)), \
+            "polys_truth and polys_reco have to be lists or PageGeometry objects"
+        assert self.truth_line_tols is not None and len(self.truth_line_tols) == len(polys_truth), \
+            "truth_line_tols have to be set for every truth polygon"
 
-        # relative hits per tolerance value over all reco and truth polygons
-        rel_hits = np.zeros([self.max_tols.shape[0], len(polys_reco), len(polys_truth)])
-        for i, poly_reco in enumerate(polys_reco):
-            for j, poly_truth in enumerate(polys_truth):
-                rel_hits[:, i, j] = self.count_rel_hits(poly_reco, poly_truth, self.truth_line_tols[j])
+        return PageDistances(polys_reco, polys_truth, self.truth_line_tols, sorted_hits=self.sorted_hits,
+                             compact_coords=self.compact_coords, order_ref=self.truth_sweep_order)
 
-        # calculate alignment
+    def calc_precision(self, polys_truth, polys_reco, page_dists=None):
+        """
+        Calculates and returns precision values for given truth and reco polygons for all tolerances.
+
+        :param polys_truth: list (or PageGeometry) of TRUTH polygons
+        :param polys_reco: list (or PageGeometry) of RECO polygons
+        :param page_dists: optional PageDistances of polys_truth and polys_reco (see calc_page_distances)
+        :return: precision values
+        """
+        assert _is_page_lines(polys_truth) and _is_page_lines(polys_reco), \
+            "polys_truth and polys_reco have to be lists of Polygons or PageGeometry objects"
+
+        if page_dists is None:
+            page_dists = PageDistances(polys_reco, polys_truth, self.truth_line_tols, ref_side=False,
+                                       sorted_hits=self.sorted_hits, compact_coords=self.compact_coords)
+        # relative hits per tolerance value over all pairs of reco and truth polygons with any hits
+        pairs_reco, pairs_truth, rel_hits = page_dists.sparse_rel_hits()
+
+        # calculate alignment for all tolerance values in one pass
+        aligned = greedy_alignment_batched(pairs_reco, pairs_truth, rel_hits, len(polys_reco), len(polys_truth))
+        # set precision to the hits of the aligned pairs
         precision = np.zeros([self.max_tols.shape[0], len(polys_reco)])
-        for i, hits_per_tol in enumerate(np.split(rel_hits, rel_hits.shape[0])):
-            hits_per_tol = np.squeeze(hits_per_tol, 0)
-            while True:
-                # calculate indices for maximum alignment
-                max_idx_x, max_idx_y = np.unravel_index(np.argmax(hits_per_tol), hits_per_tol.shape)
-                # finish if all polys_reco have been aligned
-                if hits_per_tol[max_idx_x, max_idx_y] < 0:
-                    break
-                # set precision to max alignment
-                precision[i, max_idx_x] = hits_per_tol[max_idx_x, max_idx_y]
-                # set row and column to -1
-                hits_per_tol[max_idx_x, :] = -1.0
-                hits_per_tol[:, max_idx_y] = -1.0
+        ticks, aligned_pairs = np.nonzero(aligned)
+        precision[ticks, pairs_reco[aligned_pairs]] = rel_hits[ticks, aligned_pairs]
 
         return precision
 
-    def calc_recall(self, polys_truth, polys_reco):
+    def calc_rel_hits(self, polys_truth, polys_reco, page_dists=None):
         """
-        Calculates and returns recall values for given truth and reco polygons for all tolerances.
+        Calculates the relative hits of every reco polygon against every truth polygon for all tolerances at once.
+        Entry [t, i, j] equals count_rel_hits(polys_reco[i], polys_truth[j], self.truth_line_tols[j])[t].
 
-        :param polys_truth: list of TRUTH polygons
-        :param polys_reco: list of RECO polygons
-        :return: recall values
+        :param polys_truth: list (or PageGeometry) of TRUTH polygons
+        :param polys_reco: list (or PageGeometry) of RECO polygons
+        :param page_dists: optional PageDistances of polys_truth and polys_reco (see calc_page_distances)
+        :return: relative hits of shape #tols x #reco x #truth
         """
-        assert type(polys_truth) == list and type(polys_reco) == list, "polys_truth and polys_reco have to be lists"
-        assert all([isinstance(poly, Polygon) for poly in polys_truth + polys_reco]), \
-            "elements of polys_truth and polys_reco have to be Polygons"
+        if page_dists is None:
+            assert isinstance(polys_truth, (list, PageGeometry)) and isinstance(polys_reco, (list, PageGeometry)), \
+                "polys_truth and polys_reco have to be lists or PageGeometry objects"
+            assert self.truth_line_tols is not None and len(self.truth_line_tols) == len(polys_truth), \
+                "truth_line_tols have to be set for every truth polygon"
+            page_dists = PageDistances(polys_reco, polys_truth, self.truth_line_tols, ref_side=False,
+                                       sorted_hits=self.sorted_hits, compact_coords=self.compact_coords)
+
+        rel_hits = page_dists.rel_hits()
+        return rel_hits
 
-        recall = np.zeros([self.max_tols.shape[0], len(polys_truth)])
-        for i, poly_truth in enumerate(polys_truth):
-            recall[:, i] = self.count_rel_hits_list(poly_truth, polys_reco, self.truth_line_tols[i])
+    def calc_recall(self, polys_truth, polys_reco, page_dists=None):
+        """
+        Calculates and returns recall values for given truth and reco polygons for all tolerances.
 
+        :param polys_truth: list (or PageGeometry) of TRUTH polygons
+        :param polys_reco: list (or PageGeometry) of RECO polygons
+        :param page_dists: optional PageDistances of polys_truth and polys_reco (see calc_page_distances)
+        :return: recall values
+        """
+        assert _is_page_lines(polys_truth) and _is_page_lines(polys_reco), \
+            "polys_truth and polys_reco have to be lists of Polygons or PageGeometry objects"
+
+        # the truth side of the shared distances already holds the minimum distance of every truth point
+        if page_dists is not None:
+            recall = page_dists.ref_rel_hits()
+            return recall
+
+        tols = np.asarray(self.truth_line_tols, dtype=float)
+        if not np.all(tols > 0.0):
+            # the nearest point search relies on positive tolerances, search all candidate reco polygons otherwise
+            pairs_reco, pairs_truth = candidate_pairs(bounding_boxes(polys_reco), bounding_boxes(polys_truth), tols)
+            recall = np.zeros([self.max_tols.shape[0], len(polys_truth)])
+            for i, poly_truth in enumerate(polys_truth):
+                polys_ref = [polys_reco[k] for k in pairs_reco[pairs_truth == i]]
+                recall[:, i] = self.count_rel_hits_list(poly_truth, polys_ref, self.truth_line_tols[i])
+            return recall
+
+        # Points farther away than 3 * tol from a truth point don't contribute to its hits, so it suffices to find the
+        # nearest reco point within this radius
+        xs_truth, ys_truth, offsets_truth = ragged_points(polys_truth)
+        xs_reco, ys_reco, _ = ragged_points(polys_reco)
+        radius = np.repeat(3.0 * tols[:, -1], np.diff(offsets_truth))
+
+        grid = PointGrid(xs_reco, ys_reco, np.max(radius, initial=0.0))
+        min_dist = grid.nearest_dists(xs_truth, ys_truth, radius)
+
+        recall = line_rel_hits(min_dist, offsets_truth, tols, self.sorted_hits)
         return recall
 
     def count_rel_hits(self, poly_to_count, poly_ref, tols):
@@ -141,11 +397,11 @@ class BaselineMeasureEval(object):
         if min(intersection.width, intersection.height) < -3.0 * tols[-1]:
             return rel_hits
 
-        # Build and expand numpy arrays from points
-        poly_to_count_x = np.array(poly_to_count.x_points)
-        poly_to_count_y = np.array(poly_to_count.y_points)
-        poly_ref_x = np.expand_dims(np.asarray(poly_ref.x_points), axis=1)
-        poly_ref_y = np.expand_dims(np.asarray(poly_ref.y_points), axis=1)
+        # Zero-copy views of the points, the reference points are expanded
+        poly_to_count_x = poly_to_count.x
+        poly_to_count_y = poly_to_count.y
+        poly_ref_x = np.expand_dims(poly_ref.x, axis=1)
+        poly_ref_y = np.expand_dims(poly_ref.y, axis=1)
 
         # Calculate minimum distances
         dist_x = abs(poly_to_count_x - poly_ref_x)
@@ -168,11 +424,13 @@ class BaselineMeasureEval(object):
 
     def count_rel_hits_list(self, poly_to_count, polys_ref, tols):
         """
+        Counts the relative hits per tolerance value over all points of the polygon and corresponding
+        nearest points of all reference polygons.
 
         :param poly_to_count: Polygon to count over
         :param polys_ref: list of reference Polygons
         :param tols: vector of tolerances
-        :return:
+        :return: vector of relative hits for every tolerance value
         """
         assert isinstance(poly_to_count, Polygon), "poly_to_count has to be Polygon"
         assert type(polys_ref) == list, "polys_ref has to be list"
@@ -182,9 +440,11 @@ class BaselineMeasureEval(object):
         assert tols.dtype == float, "tols has to be float"
 
         poly_to_count_bb = poly_to_count.get_bounding_box()
-        # rel_hits = np.zeros_like(tols)
 
-        all_inf = True
+        # Zero-copy views of the points
+        poly_to_count_x = poly_to_count.x
+        poly_to_count_y = poly_to_count.y
+
         min_dist = np.full((poly_to_count.n_points,), np.inf)
 
         for poly_ref in polys_ref:
@@ -195,21 +455,18 @@ class BaselineMeasureEval(object):
             if min(intersection.width, intersection.height) < -3.0 * tols[-1]:
                 continue
 
-            # Build and expand numpy arrays from points
-            poly_to_count_x = np.array(poly_to_count.x_points)
-            poly_to_count_y = np.array(poly_to_count.y_points)
-            poly_ref_x = np.expand_dims(np.asarray(poly_ref.x_points), axis=1)
-            poly_ref_y = np.expand_dims(np.asarray(poly_ref.y_points), axis=1)
+            # Expand the points of the reference polygon
+            poly_ref_x = np.expand_dims(poly_ref.x, axis=1)
+            poly_ref_y = np.expand_dims(poly_ref.y, axis=1)
 
             # Calculate minimum distances
             dist_x = abs(poly_to_count_x - poly_ref_x)
             dist_y = abs(poly_to_count_y - poly_ref_y)
+            min_dist = np.minimum(min_dist, np.amin(dist_x + dist_y, axis=0))
 
-            if all_inf:
-                all_inf = False
-                min_dist = np.amin(dist_x + dist_y, axis=0)
-            else:
-                min_dist = np.minimum(min_dist, np.amin(dist_x + dist_y, axis=0))
+        # Points without any reference polygon nearby (infinite distance) don't contribute
+        no_hit = np.isinf(min_dist)
+        min_dist = np.where(no_hit, 0.0, min_dist)
 
         # Calculate masks for two tolerance cases
         tols_t = np.expand_dims(np.asarray(tols), axis=1)
@@ -219,17 +476,8 @@ class BaselineMeasureEval(object):
         mask2 = mask2 - mask1
 
         # Calculate relative hits
-        rel_hits = np.zeros(mask1.shape)
-
-        if not all_inf:
-            for i in range(mask1.shape[0]):
-                for j in range(mask1.shape[1]):
-                    if np.isinf(min_dist[j]):
-                        continue
-
-                    rel_hits[i, j] = mask1[i, j] + \
-                                     mask2[i, j] * ((3.0 * tols_t[i, i] - min_dist[j]) / (2.0 * tols_t[i, i]))
-
+        rel_hits = mask1 + mask2 * ((3.0 * tols_t - min_dist) / (2.0 * tols_t))
+        rel_hits[:, no_hit] = 0.0
         rel_hits = np.sum(rel_hits, axis=1)
 
         rel_hits /= poly_to_count.n_points
@@ -1,12 +1,101 @@
+import collections
+import contextlib
 import datetime
+import os
 from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
 
+from main.compile_truth import TruthBundle, is_truth_bundle
 from main.eval_measure import BaselineMeasureEval
 import util.misc as util
+from util.corpus import CorpusStore, is_corpus
+from util.result_cache import ResultCache
+from util.xmlformats.Page import Page
 import cProfile
 
 
-def run_eval(truth_file, reco_file, min_tol, max_tol, threshold_tf):
+def load_page_list(file_name):
+    """Load the names of the pages of the lst-file, corpus store or truth bundle ``file_name``.
+
+    :param file_name: path to the lst-file (containing a path to a txt- or xml-file per line), corpus store or truth
+    bundle (see main.compile_truth)
+    :type file_name: str
+    :return: a tuple containing the list of page names and the corpus store or truth bundle (None for lst-files)
+    """
+    if is_corpus(file_name):
+        corpus = CorpusStore(file_name)
+        return corpus.page_names, corpus
+    if is_truth_bundle(file_name):
+        bundle = TruthBundle(file_name)
+        return bundle.page_names, bundle
+
+    return util.load_text_file(file_name), None
+
+
+def load_page_pair(i, list_truth, list_reco, corpus_truth=None, corpus_reco=None):
+    """Load the truth and reco page of the i-th GT-HYPO pair from the files ``list_truth[i]`` and ``list_reco[i]`` (or
+    the corpus stores), see util.get_page_from_file.
+
+    :param i: index of the page pair
+    :param list_truth: names of the truth pages
+    :param list_reco: names of the reco pages
+    :param corpus_truth: corpus store or truth bundle of the truth pages (None to load the files)
+    :param corpus_reco: corpus store of the reco pages (None to load the files)
+    :return: a tuple containing the truth page (compiled truth for truth bundles), its error flag, the reco page and
+    its error flag
+    """
+    truth_polys_from_file = None
+    reco_polys_from_file = None
+    # Get truth polygons
+    try:
+        truth_polys_from_file, error_truth = corpus_truth.get_page(i) if corpus_truth is not None \
+            else util.get_page_from_file(list_truth[i])
+    except IOError:
+        error_truth = True
+    # Get reco polygons
+    try:
+        reco_polys_from_file, error_reco = corpus_reco.get_page(i) if corpus_reco is not None \
+            else util.get_page_from_file(list_reco[i])
+    except IOError:
+        error_reco = True
+
+    return truth_polys_from_file, error_truth, reco_polys_from_file, error_reco
+
+
+def load_page_pairs(list_truth, list_reco, corpus_truth=None, corpus_reco=None, prefetch_workers=0, prefetch_depth=16):
+    """Load the GT-HYPO page pairs (see load_page_pair) one after the other. With prefetch workers the next pairs are
+    loaded by a thread pool (file I/O and lxml parsing release the GIL) while the current ones are evaluated, at most
+    ``prefetch_depth`` loaded or pending pairs are held at once. The pairs are returned in order in both cases.
+
+    :param list_truth: names of the truth pages
+    :param list_reco: names of the reco pages
+    :param corpus_truth: corpus store or truth bundle of the truth pages (None to load the files)
+    :param corpus_reco: corpus store of the reco pages (None to load the files)
+    :param prefetch_workers: number of threads loading pages, 0 to load them on demand
+    :param prefetch_depth: maximum number of page pairs loaded ahead
+    :return: generator of the results of load_page_pair for every pair
+    """
+    assert type(prefetch_workers) == int and prefetch_workers >= 0, "prefetch_workers has to be a non-negative int"
+    assert type(prefetch_depth) == int and prefetch_depth > 0, "prefetch_depth has to be a positive int"
+
+    if prefetch_workers == 0:
+        for i in range(len(list_truth)):
+            yield load_page_pair(i, list_truth, list_reco, corpus_truth, corpus_reco)
+        return
+
+    with ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix="page-prefetch") as executor:
+        pending = collections.deque()
+        for i in range(len(list_truth)):
+            pending.append(executor.submit(load_page_pair, i, list_truth, list_reco, corpus_truth, corpus_reco))
+            if len(pending) == prefetch_depth:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def run_eval(truth_file, reco_file, min_tol, max_tol, threshold_tf, sorted_hits=False, compact_coords=False, jobs=1,
+             streaming=False, prefetch_workers=0, prefetch_depth=16, cache_path=None, cache_size=1 << 30,
+             validation=Page.sVALIDATION_OFF):
     if not (truth_file and reco_file):
         print("No arguments given for <truth> or <reco>, exiting. See --help for usage.")
         exit(1)
@@ -18,10 +107,15 @@ def run_eval(truth_file, reco_file, min_tol, max_tol, threshold_tf):
         list_truth.append(truth_file)
     if reco_file.endswith((".txt", ".xml")):
         list_reco.append(reco_file)
-    if truth_file.endswith(".lst") and reco_file.endswith(".lst"):
+    # Corpus stores (see util.corpus) can be used in place of lst-files, their pages are read from the store. The
+    # truth pages can also be given as truth bundle (see main.compile_truth), their truth side is compiled already.
+    corpus_truth = None
+    corpus_reco = None
+    if (truth_file.endswith(".lst") or is_corpus(truth_file) or is_truth_bundle(truth_file)) and \
+            (reco_file.endswith(".lst") or is_corpus(reco_file)):
         try:
-            list_truth = util.load_text_file(truth_file)
-            list_reco = util.load_text_file(reco_file)
+            list_truth, corpus_truth = load_page_list(truth_file)
+            list_reco, corpus_reco = load_page_list(reco_file)
         except IOError:
             raise IOError("Cannot open truth- and/or reco-file.")
 
@@ -36,63 +130,85 @@ def run_eval(truth_file, reco_file, min_tol, max_tol, threshold_tf):
     print("Evaluation performed for GT: {}".format(truth_file))
     print("Evaluation performed for HYPO: {}".format(reco_file))
     print("Number of pages: {}".format(len(list_truth)))
+    if cache_path:
+        print("Result cache: {}".format(os.path.abspath(cache_path)))
     print("")
     print("Loading protocol:")
 
-    poly_pages_truth = []
-    poly_pages_reco = []
-
+    list_truth_fixed = list_truth[:]
+    list_reco_fixed = list_reco[:]
+    loading_errors = []
+    invalid_files = []
     num_poly_truth = 0
     num_poly_reco = 0
 
-    list_truth_fixed = list_truth[:]
-    list_reco_fixed = list_reco[:]
+    def load_pages():
+        """Load the GT-HYPO page pairs one after the other, pairs with errors are skipped (and reported)."""
+        nonlocal num_poly_truth, num_poly_reco
+        page_pairs = load_page_pairs(list_truth, list_reco, corpus_truth, corpus_reco, prefetch_workers, prefetch_depth)
+        for i, (truth_polys_from_file, error_truth, reco_polys_from_file, error_reco) in enumerate(page_pairs):
 
-    for i in range(len(list_truth)):
-        truth_polys_from_file = None
-        reco_polys_from_file = None
-        # Get truth polygons
-        try:
-            truth_polys_from_file, error_truth = util.get_polys_from_file(list_truth[i])
-        except IOError:
-            error_truth = True
-        # Get reco polygons
-        try:
-            reco_polys_from_file, error_reco = util.get_polys_from_file(list_reco[i])
-        except IOError:
-            error_reco = True
-
-        # Skip pages with errors in either truth or reco
-        if not (error_truth or error_reco):
-            if truth_polys_from_file is not None and reco_polys_from_file is not None:
-                poly_pages_truth.append(truth_polys_from_file)
-                poly_pages_reco.append(reco_polys_from_file)
-                # Count polys
-                num_poly_truth += len(truth_polys_from_file)
-                num_poly_reco += len(reco_polys_from_file)
-        else:
-            if error_truth:
-                print("  Error loading: {}, skipping.".format(list_truth[i]))
-            if error_reco:
-                print("  Error loading: {}, skipping.".format(list_reco[i]))
-            list_truth_fixed.remove(list_truth[i])
-            list_reco_fixed.remove(list_reco[i])
+            # Validate the PAGE files loaded without errors (the pages of corpus stores and truth bundles aren't
+            # validated), invalid files are evaluated anyway (and reported)
+            for page_name, corpus, error in [(list_truth[i], corpus_truth, error_truth),
+                                             (list_reco[i], corpus_reco, error_reco)]:
+                if corpus is None and not error:
+                    b_valid, log = util.validate_page_file(page_name, validation)
+                    if b_valid is False:
+                        invalid_files.append("  Invalid PAGE-XML: {} (line {}: {})".format
+                                             (page_name, log.last_error.line, log.last_error.message))
 
-    if len(list_truth) == len(list_truth_fixed):
-        print("  Everything loaded without errors.")
+            # Skip pages with errors in either truth or reco
+            if not (error_truth or error_reco):
+                if truth_polys_from_file is not None and reco_polys_from_file is not None:
+                    # Count polys
+                    num_poly_truth += len(truth_polys_from_file)
+                    num_poly_reco += len(reco_polys_from_file)
+                    yield truth_polys_from_file, reco_polys_from_file
+            else:
+                if error_truth:
+                    loading_errors.append("  Error loading: {}, skipping.".format(list_truth[i]))
+                if error_reco:
+                    loading_errors.append("  Error loading: {}, skipping.".format(list_reco[i]))
+                list_truth_fixed.remove(list_truth[i])
+                list_reco_fixed.remove(list_reco[i])
 
-    print("")
-    print("{} out of {} GT-HYPO page pairs loaded without errors and used for evaluation.".format
-          (len(list_truth_fixed), len(list_truth)))
-    print("Number of GT lines: {}".format(num_poly_truth))
-    print("Number of HYPO lines: {}".format(num_poly_reco))
+    def print_loading_protocol():
+        for loading_error in loading_errors:
+            print(loading_error)
+        if len(list_truth) == len(list_truth_fixed):
+            print("  Everything loaded without errors.")
+        if validation != Page.sVALIDATION_OFF:
+            for invalid_file in invalid_files:
+                print(invalid_file)
+            if not invalid_files:
+                print("  All validated PAGE-XML files conform to the PAGE schema.")
 
-    # Create baseline measure evaluation
-    bl_measure_eval = BaselineMeasureEval(min_tol, max_tol)
+        print("")
+        print("{} out of {} GT-HYPO page pairs loaded without errors and used for evaluation.".format
+              (len(list_truth_fixed), len(list_truth)))
+        print("Number of GT lines: {}".format(num_poly_truth))
+        print("Number of HYPO lines: {}".format(num_poly_reco))
+
+    # Create baseline measure evaluation (the per line results are only needed for the tp, fp, fn, tn counts)
+    bl_measure_eval = BaselineMeasureEval(min_tol, max_tol, sorted_hits=sorted_hits, compact_coords=compact_coords,
+                                          keep_line_results=not streaming or threshold_tf > 0.0)
+    if isinstance(corpus_truth, TruthBundle) and corpus_truth.settings != bl_measure_eval.truth_settings():
+        raise ValueError("Truth bundle {} was compiled with other settings (tolerances or code version), compile it "
+                         "again.".format(truth_file))
 
-    # Evaluate measure for each page
-    for polys_truth, polys_reco in zip(poly_pages_truth, poly_pages_reco):
-        bl_measure_eval.calc_measure_for_page_baseline_polys(polys_truth, polys_reco)
+    # Evaluate measure for each page, the results of pages evaluated before (with the same settings) are taken from
+    # the result cache
+    with (ResultCache(cache_path, cache_size) if cache_path else contextlib.nullcontext()) as result_cache:
+        if streaming:
+            # the pages are evaluated as they are loaded, only one page (one per job) is held at once
+            bl_measure_eval.calc_measure_for_page_stream(load_pages(), jobs, result_cache)
+            print_loading_protocol()
+        else:
+            poly_pages = list(load_pages())
+            print_loading_protocol()
+            bl_measure_eval.calc_measure_for_pages([page[0] for page in poly_pages],
+                                                   [page[1] for page in poly_pages], jobs, result_cache)
 
     # Get the results
     bl_measure = bl_measure_eval.measure
@@ -153,21 +269,54 @@ if __name__ == '__main__':
     x1,y1;x2,y2;x3,y3;...;xn,yn.
     As arguments (truth, reco) such txt-files OR lst-files (containing a path to
     a basic txt-file per line) are required. For lst-files, the order of the
-    truth/reco-files in both lists has to be identical."""
+    truth/reco-files in both lists has to be identical. Instead of lst-files,
+    corpus stores written by util/corpus.py (directories <name>.corpus) can
+    be used. The truth can also be a truth bundle written by
+    main/compile_truth.py (directory <name>.gtbundle) for the same tolerances.
+    Only the baselines of PAGE-XML files are read, the files are not validated
+    against the PAGE schema unless --validate is given."""
     parser = ArgumentParser(usage=usage_string)
 
     # Command-line arguments
     parser.add_argument('--truth', default='', type=str, metavar="STR",
-                        help="truth-files in txt- or lst-format (see usage)")
+                        help="truth-files in txt- or lst-format, corpus store or truth bundle (see usage)")
     parser.add_argument('--reco', default='', type=str, metavar="STR",
-                        help="reco-files in txt- or lst-format (see usage)")
-    parser.add_argument('--min_tol', default=-1, type=int, metavar='FLOAT',
+                        help="reco-files in txt- or lst-format or corpus store (see usage)")
+    parser.add_argument('--min_tol', default=-1, type=int, metavar='INT',
                         help="minimum tolerance value, -1 for dynamic calculation (default: %(default)s)")
-    parser.add_argument('--max_tol', default=-1, type=int, metavar='FLOAT',
+    parser.add_argument('--max_tol', default=-1, type=int, metavar='INT',
                         help="maximum tolerance value, -1 for dynamic calculation (default: %(default)s)")
     parser.add_argument('--threshold_tf', default=-1.0, type=float, metavar='FLOAT',
                         help="threshold for P- and R-value to make a decision concerning tp, fp, fn, tn."
                              " Should be between 0 and 1, (default: %(default)s - nothing is done)")
+    parser.add_argument('--sorted_hits', default=False, action='store_true',
+                        help="evaluate the relative hits for all tolerances from the sorted point distances, faster"
+                             " for wide tolerance ranges but equal only up to rounding (default: %(default)s)")
+    parser.add_argument('--compact_coords', default=False, action='store_true',
+                        help="compute the point distances on compact int16/int32 coordinates (default: %(default)s)")
+    parser.add_argument('--jobs', default=1, type=int, metavar='INT',
+                        help="number of processes evaluating the pages, 0 for one per CPU (default: %(default)s)")
+    parser.add_argument('--streaming', default=False, action='store_true',
+                        help="evaluate the pages as they are loaded and keep only the page-wise results, s.t. the"
+                             " memory doesn't grow with the number of lines (default: %(default)s)")
+    parser.add_argument('--prefetch_workers', default=0, type=int, metavar='INT',
+                        help="number of threads loading the next pages while the current ones are evaluated, 0 to"
+                             " load them on demand (default: %(default)s)")
+    parser.add_argument('--prefetch_depth', default=16, type=int, metavar='INT',
+                        help="maximum number of pages loaded ahead by the prefetch threads (default: %(default)s)")
+    parser.add_argument('--cache', default=None, type=str, metavar="PATH",
+                        help="result cache (SQLite file, created if missing) of the evaluated pages, pages with the"
+                             " same truth and reco polygons are only evaluated once for the same settings (default:"
+                             " no cache)")
+    parser.add_argument('--cache_size', default=1024, type=int, metavar='INT',
+                        help="maximum size of the result cache in MB, the least recently used results are evicted"
+                             " (default: %(default)s)")
+    parser.add_argument('--validate', default=Page.sVALIDATION_OFF, type=str,
+                        choices=[Page.sVALIDATION_OFF, Page.sVALIDATION_ONCE, Page.sVALIDATION_SAMPLED,
+                                 Page.sVALIDATION_FULL],
+                        help="validate the PAGE-XML files against the PAGE schema and report the invalid ones in the"
+                             " loading protocol, 'sampled' validates a fraction of {} of the files, 'once' and 'full'"
+                             " all of them (default: %(default)s)".format(Page.validation_sample_rate))
 
     # def str2bool(arg):
     #     return arg.lower() in ('true', 't', '1')
@@ -182,7 +331,9 @@ if __name__ == '__main__':
     pr.enable()
 
     # Run evaluation
-    run_eval(flags.truth, flags.reco, flags.min_tol, flags.max_tol, flags.threshold_tf)
+    run_eval(flags.truth, flags.reco, flags.min_tol, flags.max_tol, flags.threshold_tf, flags.sorted_hits,
+             flags.compact_coords, flags.jobs, flags.streaming, flags.prefetch_workers, flags.prefetch_depth,
+             flags.cache, flags.cache_size << 20, flags.validate)
 
     pr.disable()
     pr.print_stats(sort='time')
@@ -0,0 +1,224 @@
+# coding=utf-8
+
+"""Micro-benchmarks for the baseline measure evaluation on synthetic baselines. Run from the project root:
+    python -m test.bench_eval_measure
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import os
+import tempfile
+import timeit
+
+import cssutils
+import numpy as np
+
+from main.eval_measure import BaselineMeasureEval
+from util.geometry import Polygon, PageGeometry
+from util.alignment import greedy_alignment, greedy_alignment_batched
+from util import misc
+from util.xmlformats.PageBaselines import read_baselines
+from util.xmlformats.Page import Page
+
+
+def synthetic_line(n_points, y, step=5, noise=3, seed=0):
+    """Create a horizontal baseline with ``n_points`` points of distance ``step`` around the height ``y``."""
+    rng = np.random.RandomState(seed)
+    x_points = [int(x) for x in np.arange(n_points) * step]
+    y_points = [int(y + dy) for dy in rng.randint(-noise, noise + 1, n_points)]
+
+    return Polygon(x_points, y_points, n_points)
+
+
+def count_rel_hits_list_loop(poly_to_count, polys_ref, tols):
+    """Former implementation of ``BaselineMeasureEval.count_rel_hits_list`` with an interpreted tolerance x point loop,
+    used as reference."""
+    poly_to_count_bb = poly_to_count.get_bounding_box()
+    all_inf = True
+    min_dist = np.full((poly_to_count.n_points,), np.inf)
+
+    for poly_ref in polys_ref:
+        intersection = poly_to_count_bb.intersection(poly_ref.get_bounding_box())
+        if min(intersection.width, intersection.height) < -3.0 * tols[-1]:
+            continue
+        dist_x = abs(np.array(poly_to_count.x_points) - np.expand_dims(np.asarray(poly_ref.x_points), axis=1))
+        dist_y = abs(np.array(poly_to_count.y_points) - np.expand_dims(np.asarray(poly_ref.y_points), axis=1))
+        if all_inf:
+            all_inf = False
+            min_dist = np.amin(dist_x + dist_y, axis=0)
+        else:
+            min_dist = np.minimum(min_dist, np.amin(dist_x + dist_y, axis=0))
+
+    tols_t = np.expand_dims(np.asarray(tols), axis=1)
+    mask1 = (min_dist <= tols_t).astype(float)
+    mask2 = (min_dist <= 3.0 * tols_t).astype(float)
+    mask2 = mask2 - mask1
+    rel_hits = np.zeros(mask1.shape)
+
+    if not all_inf:
+        for i in range(mask1.shape[0]):
+            for j in range(mask1.shape[1]):
+                if np.isinf(min_dist[j]):
+                    continue
+                rel_hits[i, j] = mask1[i, j] + \
+                    mask2[i, j] * ((3.0 * tols_t[i, 0] - min_dist[j]) / (2.0 * tols_t[i, 0]))
+
+    rel_hits = np.sum(rel_hits, axis=1)
+    rel_hits /= poly_to_count.n_points
+    return rel_hits
+
+
+def bench_count_rel_hits_list(n_points=500, n_ref=5, number=5):
+    bl_measure_eval = BaselineMeasureEval(10, 30)
+    tols = bl_measure_eval.max_tols
+    poly_truth = synthetic_line(n_points, 100)
+    polys_reco = [synthetic_line(n_points, 100 + 25 * (i - n_ref // 2), seed=i + 1) for i in range(n_ref)]
+
+    res_loop = count_rel_hits_list_loop(poly_truth, polys_reco, tols)
+    res = bl_measure_eval.count_rel_hits_list(poly_truth, polys_reco, tols)
+    assert np.array_equal(res_loop, res), "results differ"
+
+    t_loop = timeit.timeit(lambda: count_rel_hits_list_loop(poly_truth, polys_reco, tols), number=number) / number
+    t = timeit.timeit(lambda: bl_measure_eval.count_rel_hits_list(poly_truth, polys_reco, tols), number=number) / number
+    print("count_rel_hits_list ({} tols, {} points, {} reference lines): loop {:.4f}s, broadcast {:.4f}s, "
+          "speedup {:.1f}x".format(len(tols), n_points, n_ref, t_loop, t, t_loop / t))
+
+
+def calc_precision_per_tick(bl_measure_eval, polys_truth, polys_reco, page_dists):
+    """Precision with a separate greedy alignment per tolerance tick, used as reference."""
+    pairs_reco, pairs_truth, rel_hits = page_dists.sparse_rel_hits()
+    precision = np.zeros([bl_measure_eval.max_tols.shape[0], len(polys_reco)])
+    for i, hits_per_tol in enumerate(rel_hits):
+        aligned = greedy_alignment(pairs_reco, pairs_truth, hits_per_tol, len(polys_reco), len(polys_truth))
+        precision[i, pairs_reco[aligned]] = hits_per_tol[aligned]
+    return precision
+
+
+def bench_calc_precision(n_lines=60, n_points=120, min_tol=5, max_tol=50, number=5):
+    bl_measure_eval = BaselineMeasureEval(min_tol, max_tol)
+    polys_truth = [synthetic_line(n_points, 40 * i, seed=i + 1) for i in range(n_lines)]
+    polys_reco = [synthetic_line(n_points, 40 * i + 15, noise=8, seed=n_lines + i + 1) for i in range(n_lines)]
+    bl_measure_eval.truth_line_tols = np.tile(bl_measure_eval.max_tols, [n_lines, 1])
+    page_dists = bl_measure_eval.calc_page_distances(polys_truth, polys_reco)
+
+    res_per_tick = calc_precision_per_tick(bl_measure_eval, polys_truth, polys_reco, page_dists)
+    res = bl_measure_eval.calc_precision(polys_truth, polys_reco, page_dists)
+    assert np.array_equal(res_per_tick, res), "results differ"
+
+    # the alignment alone (the relative hits are computed by both in the same way)
+    pairs_reco, pairs_truth, rel_hits = page_dists.sparse_rel_hits()
+    t_align_per_tick = timeit.timeit(lambda: [greedy_alignment(pairs_reco, pairs_truth, hits_per_tol, n_lines, n_lines)
+                                              for hits_per_tol in rel_hits], number=number) / number
+    t_align = timeit.timeit(lambda: greedy_alignment_batched(pairs_reco, pairs_truth, rel_hits, n_lines, n_lines),
+                            number=number) / number
+    t_per_tick = timeit.timeit(lambda: calc_precision_per_tick(bl_measure_eval, polys_truth, polys_reco, page_dists),
+                               number=number) / number
+    t = timeit.timeit(lambda: bl_measure_eval.calc_precision(polys_truth, polys_reco, page_dists),
+                      number=number) / number
+    print("alignment ({} tols, {} lines): per tick {:.4f}s, batched {:.4f}s, speedup {:.1f}x".format(
+        len(bl_measure_eval.max_tols), n_lines, t_align_per_tick, t_align, t_align_per_tick / t_align))
+    print("calc_precision ({} tols, {} lines): per tick {:.4f}s, batched {:.4f}s, speedup {:.1f}x".format(
+        len(bl_measure_eval.max_tols), n_lines, t_per_tick, t, t_per_tick / t))
+
+
+def bench_sorted_hits(n_lines=60, n_points=120, min_tol=5, max_tol=50, number=5):
+    polys_truth = [synthetic_line(n_points, 40 * i, seed=i + 1) for i in range(n_lines)]
+    polys_reco = [synthetic_line(n_points, 40 * i + 15, noise=8, seed=n_lines + i + 1) for i in range(n_lines)]
+    times = []
+    for sorted_hits in [False, True]:
+        bl_measure_eval = BaselineMeasureEval(min_tol, max_tol, sorted_hits=sorted_hits)
+        bl_measure_eval.truth_line_tols = np.tile(bl_measure_eval.max_tols, [n_lines, 1])
+        page_dists = bl_measure_eval.calc_page_distances(polys_truth, polys_reco)
+        times.append(timeit.timeit(lambda: (page_dists.sparse_rel_hits(), page_dists.ref_rel_hits()),
+                                   number=number) / number)
+    print("relative hits ({} tols, {} lines): masks {:.4f}s, sorted {:.4f}s, speedup {:.1f}x".format(
+        max_tol - min_tol + 1, n_lines, times[0], times[1], times[0] / times[1]))
+
+
+def bench_compact_coords(n_lines=60, n_points=600, number=3):
+    polys_truth = [synthetic_line(n_points, 40 * i, seed=i + 1) for i in range(n_lines)]
+    polys_reco = [synthetic_line(n_points, 40 * i + 15, noise=8, seed=n_lines + i + 1) for i in range(n_lines)]
+    times = []
+    for compact_coords in [False, True]:
+        bl_measure_eval = BaselineMeasureEval(10, 30, compact_coords=compact_coords)
+        bl_measure_eval.truth_line_tols = np.tile(bl_measure_eval.max_tols, [n_lines, 1])
+        times.append(timeit.timeit(lambda: bl_measure_eval.calc_page_distances(polys_truth, polys_reco),
+                                   number=number) / number)
+    print("page distances ({} lines, {} points): int64 {:.4f}s, compact {:.4f}s, speedup {:.1f}x".format(
+        n_lines, n_points, times[0], times[1], times[0] / times[1]))
+
+
+def parse_poly_file_lines(poly_file_name):
+    """Former implementation of the txt branch of ``misc.get_polys_from_file`` (parsing line by line), used as
+    reference."""
+    return [misc.parse_string(poly_string) for poly_string in misc.load_text_file(poly_file_name)]
+
+
+def bench_parse_poly_file(n_lines=2000, number=5):
+    n_points = np.random.RandomState(0).randint(2, 40, n_lines).tolist()
+    polys = [synthetic_line(n_points[i], 40 * i, seed=i + 1) for i in range(n_lines)]
+    poly_file = tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False)
+    try:
+        with poly_file:
+            poly_file.write("\n".join(misc.poly_to_string(poly) for poly in polys) + "\n")
+        times = [timeit.timeit(lambda: parse(poly_file.name), number=number) / number
+                 for parse in [parse_poly_file_lines, misc.parse_poly_file]]
+    finally:
+        os.remove(poly_file.name)
+    print("txt polygon file ({} lines): line by line {:.4f}s, bulk {:.4f}s, speedup {:.1f}x".format(
+        n_lines, times[0], times[1], times[0] / times[1]))
+
+
+def bench_read_baselines(poly_file_name="./test/resources/page_test.xml", number=10):
+    times = [timeit.timeit(lambda: read(poly_file_name), number=number) / number
+             for read in [misc.get_polys_from_file, read_baselines]]
+    print("PAGE file ({}): Page {:.4f}s, baselines only {:.4f}s, speedup {:.1f}x".format(
+        poly_file_name, times[0], times[1], times[0] / times[1]))
+
+
+def parse_custom_attr_cssutils(s):
+    """Former implementation of ``Page.parse_custom_attr`` (cssutils only), used as reference."""
+    custom_dict = {}
+    for rule in cssutils.parseString(s):
+        custom_dict[rule.selectorText] = {prop.name: prop.value for prop in rule.style}
+    return custom_dict
+
+
+def bench_parse_custom_attr(n_lines=500, n_articles=20, number=3):
+    l_custom = ["readingOrder {{index:{};}} structure {{id:a{}; type:article;}}".format(i, i % n_articles)
+                for i in range(n_lines)]
+    assert [parse_custom_attr_cssutils(s) for s in l_custom] == [Page.parse_custom_attr(s) for s in l_custom], \
+        "results differ"
+    times = [timeit.timeit(lambda: [parse(s) for s in l_custom], number=number) / number
+             for parse in [parse_custom_attr_cssutils, Page.parse_custom_attr]]
+    print("custom attributes ({} lines): cssutils {:.4f}s, single pass {:.4f}s, speedup {:.1f}x".format(
+        n_lines, times[0], times[1], times[0] / times[1]))
+
+
+def bench_calc_measure_for_pages(n_pages=48, n_lines=40, n_points=60, jobs=4):
+    pages_truth = [PageGeometry.from_polygons([synthetic_line(n_points, 40 * i, seed=p * n_lines + i + 1)
+                                               for i in range(n_lines)]) for p in range(n_pages)]
+    pages_reco = [PageGeometry.from_polygons([synthetic_line(n_points, 40 * i + 15, noise=8,
+                                                             seed=(n_pages + p) * n_lines + i + 1)
+                                              for i in range(n_lines)]) for p in range(n_pages)]
+    times = []
+    for n_jobs in [1, jobs]:
+        t = timeit.default_timer()
+        BaselineMeasureEval(-1, -1).calc_measure_for_pages(pages_truth, pages_reco, n_jobs)
+        times.append(timeit.default_timer() - t)
+    print("pages ({} pages, {} lines): 1 job {:.4f}s, {} jobs {:.4f}s, speedup {:.1f}x".format(
+        n_pages, n_lines, times[0], jobs, times[1], times[0] / times[1]))
+
+
+if __name__ == '__main__':
+    bench_count_rel_hits_list()
+    bench_calc_precision()
+    bench_calc_precision(n_lines=200)
+    bench_sorted_hits()
+    bench_compact_coords()
+    bench_parse_poly_file()
+    bench_read_baselines()
+    bench_parse_custom_attr()
+    bench_calc_measure_for_pages()
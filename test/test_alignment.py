@@ -0,0 +1,57 @@
+# coding=utf-8
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+from unittest import TestCase
+
+import numpy as np
+
+from util import alignment
+
+
+def argmax_alignment(scores):
+    """Greedy alignment on the dense score matrix by repeated argmax, used as reference."""
+    scores = scores.copy()
+    res = np.zeros(scores.shape[0])
+    for _ in range(min(scores.shape)):
+        max_idx_x, max_idx_y = np.unravel_index(np.argmax(scores), scores.shape)
+        res[max_idx_x] = scores[max_idx_x, max_idx_y]
+        scores[max_idx_x, :] = -1.0
+        scores[:, max_idx_y] = -1.0
+    return res
+
+
+class TestAlignment(TestCase):
+
+    def test_greedy_alignment(self):
+        rng = np.random.RandomState(3)
+        for _ in range(50):
+            n_a, n_b = rng.randint(1, 15, 2)
+            # few distinct values to provoke ties, some zeros and NaNs
+            scores = rng.randint(0, 4, [n_a, n_b]) / 4.0
+            scores[rng.rand(n_a, n_b) < 0.05] = np.nan
+
+            pairs_a, pairs_b = np.nonzero(scores != 0.0)
+            aligned = alignment.greedy_alignment(pairs_a, pairs_b, scores[pairs_a, pairs_b], n_a, n_b)
+            res = np.zeros(n_a)
+            res[pairs_a[aligned]] = scores[pairs_a, pairs_b][aligned]
+
+            self.assertTrue(np.array_equal(argmax_alignment(scores), res, equal_nan=True))
+
+    def test_greedy_alignment_batched(self):
+        rng = np.random.RandomState(5)
+        for _ in range(20):
+            n_a, n_b, n_vec = rng.randint(1, 15, 3)
+            # slowly increasing scores, so that neighbouring vectors often share their alignment
+            scores = np.cumsum(rng.rand(n_vec, n_a, n_b) < 0.1, axis=0) / 4.0
+            scores[rng.rand(n_vec, n_a, n_b) < 0.05] = np.nan
+
+            pairs_a, pairs_b = np.nonzero(np.any(scores != 0.0, axis=0))
+            scores = scores[:, pairs_a, pairs_b]
+            aligned = alignment.greedy_alignment_batched(pairs_a, pairs_b, scores, n_a, n_b)
+
+            for scores_vec, aligned_vec in zip(scores, aligned):
+                res = alignment.greedy_alignment(pairs_a, pairs_b, scores_vec, n_a, n_b)
+                self.assertEqual(sorted(res.tolist()), np.flatnonzero(aligned_vec).tolist())
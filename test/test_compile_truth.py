@@ -0,0 +1,67 @@
+# coding=utf-8
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import shutil
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from main.compile_truth import write_truth_bundle, is_truth_bundle, TruthBundle
+from main.eval_measure import BaselineMeasureEval
+from util import misc
+
+
+class TestCompileTruth(TestCase):
+
+    def setUp(self):
+        self.bundle_dir = tempfile.mkdtemp()
+        self.file_names = ["./resources/lineTruth.txt", "./resources/lineEmpty.txt", "./resources/missing.txt",
+                           "./resources/page_test.xml"]
+        self.polys_reco = misc.get_page_from_file("./resources/lineReco2.txt")[0]
+
+    def tearDown(self):
+        shutil.rmtree(self.bundle_dir)
+
+    def test_write_truth_bundle(self):
+        bundle_path = self.bundle_dir + "/truth.gtbundle"
+        self.assertTrue(is_truth_bundle(bundle_path + "/"))
+        self.assertFalse(is_truth_bundle("./resources/truth.lst"))
+
+        for min_tol, max_tol in [(-1, -1), (5, 20)]:
+            bl_measure_eval = BaselineMeasureEval(min_tol, max_tol)
+            write_truth_bundle(bundle_path, self.file_names, bl_measure_eval)
+            bundle = TruthBundle(bundle_path)
+            self.assertEqual(self.file_names, bundle.page_names)
+            self.assertEqual(bl_measure_eval.truth_settings(), bundle.settings)
+            self.assertIsInstance(bundle.xs, np.memmap)
+
+            for i, file_name in enumerate(self.file_names):
+                try:
+                    page, error = misc.get_page_from_file(file_name)
+                except IOError:
+                    page, error = None, True
+                truth, error_bundle = bundle.get_page(i)
+                self.assertEqual(error, error_bundle)
+                if page is None:
+                    self.assertIsNone(truth)
+                    continue
+
+                # the compiled truth gives the same results as the truth polygons
+                precision, recall = bl_measure_eval.calc_page_measure(page, self.polys_reco)
+                precision_bundle, recall_bundle = bl_measure_eval.calc_page_measure(truth, self.polys_reco)
+                np.testing.assert_array_equal(precision, precision_bundle)
+                np.testing.assert_array_equal(recall, recall_bundle)
+
+            # the compiled truth is bound to the settings
+            truth = bundle.get_page(0)[0]
+            self.assertRaises(AssertionError, BaselineMeasureEval(10, 10).calc_page_measure, truth, self.polys_reco)
+
+    def test_empty_truth_bundle(self):
+        bundle = write_truth_bundle(self.bundle_dir + "/empty.gtbundle", [], BaselineMeasureEval(5, 20))
+        self.assertEqual(0, len(bundle))
+        self.assertEqual((0, 4), bundle.bbs.shape)
+        self.assertEqual((0, 16), bundle.line_tols.shape)
@@ -0,0 +1,62 @@
+# coding=utf-8
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import shutil
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from util import misc
+from util.corpus import write_corpus, is_corpus, CorpusStore
+from util.xmlformats.PageBaselines import read_baselines
+
+
+class TestCorpus(TestCase):
+
+    def setUp(self):
+        self.corpus_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.corpus_dir)
+
+    def test_write_corpus(self):
+        file_names = ["./resources/lineReco1.txt", "./resources/lineEmpty.txt", "./resources/missing.txt",
+                      "./resources/lineReco10_withError.txt", "./resources/page_test.xml",
+                      "./resources/lineTruth.txt"]
+        corpus_path = self.corpus_dir + "/pages.corpus"
+        self.assertTrue(is_corpus(corpus_path + "/"))
+        self.assertFalse(is_corpus("./resources/truth.lst"))
+
+        write_corpus(corpus_path, file_names)
+        corpus = CorpusStore(corpus_path)
+        self.assertEqual(file_names, corpus.page_names)
+        self.assertIsInstance(corpus.coords, np.memmap)
+        self.assertIsNone(corpus.article_ids)
+
+        for i, file_name in enumerate(file_names):
+            try:
+                page, error = misc.get_page_from_file(file_name)
+            except IOError:
+                page, error = None, True
+            page_corpus, error_corpus = corpus.get_page(i)
+            self.assertEqual(error, error_corpus)
+            if page is None:
+                self.assertIsNone(page_corpus)
+                continue
+            for name in ["xs", "ys", "offsets", "bbs"]:
+                np.testing.assert_array_equal(getattr(page, name), getattr(page_corpus, name))
+
+        # article ids of xml-files
+        corpus = write_corpus(corpus_path, file_names[-2:], with_article_ids=True)
+        self.assertEqual(read_baselines(file_names[-2], with_article_ids=True).article_ids.tolist(),
+                         corpus.get_page(0)[0].article_ids.tolist())
+        self.assertEqual([None] * len(corpus.get_page(1)[0]), corpus.get_page(1)[0].article_ids.tolist())
+
+    def test_empty_corpus(self):
+        corpus = write_corpus(self.corpus_dir + "/empty.corpus", [])
+        self.assertEqual(0, len(corpus))
+        self.assertEqual((0, 2), corpus.coords.shape)
@@ -0,0 +1,200 @@
+# coding=utf-8
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+from unittest import TestCase
+
+import numpy as np
+
+from main.eval_measure import BaselineMeasureEval
+from util import misc
+from util.geometry import Polygon, PageGeometry
+
+
+class TestBaselineMeasureEval(TestCase):
+
+    def setUp(self):
+        self.polys_truth = misc.norm_poly_dists(misc.get_polys_from_file("./resources/lineTruth.txt")[0], 5)
+        self.polys_reco = [misc.norm_poly_dists(misc.get_polys_from_file("./resources/lineReco{}.txt".format(i))[0], 5)
+                           for i in range(1, 10)]
+
+    def test_calc_rel_hits(self):
+        for min_tol, max_tol in [(10, 10), (5, 20)]:
+            bl_measure_eval = BaselineMeasureEval(min_tol, max_tol)
+            bl_measure_eval.truth_line_tols = np.tile(bl_measure_eval.max_tols, [len(self.polys_truth), 1])
+
+            for polys_reco in self.polys_reco:
+                rel_hits = bl_measure_eval.calc_rel_hits(self.polys_truth, polys_reco)
+                self.assertEqual((max_tol - min_tol + 1, len(polys_reco), len(self.polys_truth)), rel_hits.shape)
+
+                for i, poly_reco in enumerate(polys_reco):
+                    for j, poly_truth in enumerate(self.polys_truth):
+                        res = bl_measure_eval.count_rel_hits(poly_reco, poly_truth,
+                                                             bl_measure_eval.truth_line_tols[j])
+                        self.assertTrue(np.array_equal(res, rel_hits[:, i, j]))
+
+    def test_calc_precision(self):
+        for min_tol, max_tol in [(10, 10), (5, 20)]:
+            bl_measure_eval = BaselineMeasureEval(min_tol, max_tol)
+            bl_measure_eval.truth_line_tols = np.tile(bl_measure_eval.max_tols, [len(self.polys_truth), 1])
+
+            for polys_reco in self.polys_reco:
+                precision = bl_measure_eval.calc_precision(self.polys_truth, polys_reco)
+                self.assertEqual((max_tol - min_tol + 1, len(polys_reco)), precision.shape)
+
+                # greedy alignment on the dense relative hits
+                rel_hits = bl_measure_eval.calc_rel_hits(self.polys_truth, polys_reco)
+                res = np.zeros(precision.shape)
+                for i, hits_per_tol in enumerate(rel_hits):
+                    for _ in range(min(hits_per_tol.shape)):
+                        max_idx_x, max_idx_y = np.unravel_index(np.argmax(hits_per_tol), hits_per_tol.shape)
+                        res[i, max_idx_x] = hits_per_tol[max_idx_x, max_idx_y]
+                        hits_per_tol[max_idx_x, :] = -1.0
+                        hits_per_tol[:, max_idx_y] = -1.0
+                self.assertTrue(np.array_equal(res, precision))
+
+    def test_calc_recall(self):
+        for min_tol, max_tol in [(10, 10), (5, 20)]:
+            bl_measure_eval = BaselineMeasureEval(min_tol, max_tol)
+            bl_measure_eval.truth_line_tols = np.tile(bl_measure_eval.max_tols, [len(self.polys_truth), 1])
+
+            for polys_reco in self.polys_reco:
+                recall = bl_measure_eval.calc_recall(self.polys_truth, polys_reco)
+                self.assertEqual((max_tol - min_tol + 1, len(self.polys_truth)), recall.shape)
+
+                for i, poly_truth in enumerate(self.polys_truth):
+                    res = bl_measure_eval.count_rel_hits_list(poly_truth, polys_reco,
+                                                              bl_measure_eval.truth_line_tols[i])
+                    self.assertTrue(np.array_equal(res, recall[:, i]))
+
+    def test_calc_page_distances(self):
+        bl_measure_eval = BaselineMeasureEval(5, 20)
+        bl_measure_eval.truth_line_tols = np.tile(bl_measure_eval.max_tols, [len(self.polys_truth), 1])
+
+        for polys_reco in self.polys_reco:
+            page_dists = bl_measure_eval.calc_page_distances(self.polys_truth, polys_reco)
+
+            self.assertTrue(np.array_equal(bl_measure_eval.calc_precision(self.polys_truth, polys_reco),
+                                           bl_measure_eval.calc_precision(self.polys_truth, polys_reco, page_dists)))
+            self.assertTrue(np.array_equal(bl_measure_eval.calc_recall(self.polys_truth, polys_reco),
+                                           bl_measure_eval.calc_recall(self.polys_truth, polys_reco, page_dists)))
+
+    def test_sorted_hits(self):
+        bl_measure_eval = BaselineMeasureEval(5, 20)
+        bl_measure_eval_sorted = BaselineMeasureEval(5, 20, sorted_hits=True)
+        tols = np.tile(bl_measure_eval.max_tols, [len(self.polys_truth), 1])
+        # non-positive tolerances are evaluated directly
+        tols[0, :3] = [0.0, -1.0, np.nan]
+        bl_measure_eval.truth_line_tols = bl_measure_eval_sorted.truth_line_tols = tols
+
+        for polys_reco in self.polys_reco:
+            page_dists = bl_measure_eval.calc_page_distances(self.polys_truth, polys_reco)
+            page_dists_sorted = bl_measure_eval_sorted.calc_page_distances(self.polys_truth, polys_reco)
+            for page_dists, page_dists_sorted in [(None, None), (page_dists, page_dists_sorted)]:
+                np.testing.assert_allclose(
+                    bl_measure_eval.calc_rel_hits(self.polys_truth, polys_reco, page_dists),
+                    bl_measure_eval_sorted.calc_rel_hits(self.polys_truth, polys_reco, page_dists_sorted),
+                    rtol=0, atol=1e-12)
+                np.testing.assert_allclose(
+                    bl_measure_eval.calc_recall(self.polys_truth, polys_reco, page_dists),
+                    bl_measure_eval_sorted.calc_recall(self.polys_truth, polys_reco, page_dists_sorted),
+                    rtol=0, atol=1e-12)
+
+    def test_compact_coords(self):
+        bl_measure_eval = BaselineMeasureEval(5, 20)
+        bl_measure_eval_compact = BaselineMeasureEval(5, 20, compact_coords=True)
+        bl_measure_eval.truth_line_tols = bl_measure_eval_compact.truth_line_tols = \
+            np.tile(bl_measure_eval.max_tols, [len(self.polys_truth), 1])
+        # a far away polygon extends the page beyond the int16 range
+        poly_far = Polygon([70000, 70010], [100, 100], 2)
+
+        for polys_reco in self.polys_reco + [self.polys_reco[0] + [poly_far]]:
+            page_dists = bl_measure_eval.calc_page_distances(self.polys_truth, polys_reco)
+            page_dists_compact = bl_measure_eval_compact.calc_page_distances(self.polys_truth, polys_reco)
+
+            self.assertTrue(np.array_equal(page_dists.ref_min_dist, page_dists_compact.ref_min_dist))
+            self.assertTrue(np.array_equal(
+                bl_measure_eval.calc_precision(self.polys_truth, polys_reco, page_dists),
+                bl_measure_eval_compact.calc_precision(self.polys_truth, polys_reco, page_dists_compact)))
+            self.assertTrue(np.array_equal(
+                bl_measure_eval.calc_recall(self.polys_truth, polys_reco, page_dists),
+                bl_measure_eval_compact.calc_recall(self.polys_truth, polys_reco, page_dists_compact)))
+
+    def test_page_geometry(self):
+        polys_truth = misc.get_polys_from_file("./resources/lineTruth.txt")[0]
+        page_truth = PageGeometry.from_polygons(polys_truth)
+
+        for min_tol, max_tol in [(-1, -1), (5, 20)]:
+            bl_measure_eval = BaselineMeasureEval(min_tol, max_tol)
+            bl_measure_eval_geometry = BaselineMeasureEval(min_tol, max_tol)
+
+            for i in range(1, 10):
+                polys_reco = misc.get_polys_from_file("./resources/lineReco{}.txt".format(i))[0]
+                bl_measure_eval.calc_measure_for_page_baseline_polys(polys_truth, polys_reco)
+                bl_measure_eval_geometry.calc_measure_for_page_baseline_polys(
+                    page_truth, PageGeometry.from_polygons(polys_reco))
+
+            result = bl_measure_eval.measure.result
+            result_geometry = bl_measure_eval_geometry.measure.result
+            for res, res_geometry in [(result.page_wise_per_dist_tol_tick_per_line_precision,
+                                       result_geometry.page_wise_per_dist_tol_tick_per_line_precision),
+                                      (result.page_wise_per_dist_tol_tick_per_line_recall,
+                                       result_geometry.page_wise_per_dist_tol_tick_per_line_recall)]:
+                for page_res, page_res_geometry in zip(res, res_geometry):
+                    self.assertTrue(np.array_equal(page_res, page_res_geometry))
+
+        # the recall without shared distances searches the reco polygons of a page geometry for non-positive tolerances
+        bl_measure_eval = BaselineMeasureEval(5, 20)
+        tols = np.tile(bl_measure_eval.max_tols, [len(self.polys_truth), 1])
+        tols[0, 0] = 0.0
+        bl_measure_eval.truth_line_tols = tols
+        page_truth = PageGeometry.from_polygons(self.polys_truth)
+        for polys_reco in self.polys_reco:
+            np.testing.assert_array_equal(
+                bl_measure_eval.calc_recall(self.polys_truth, polys_reco),
+                bl_measure_eval.calc_recall(page_truth, PageGeometry.from_polygons(polys_reco)))
+
+    def test_calc_measure_for_pages(self):
+        pages_truth = [misc.get_page_from_file("./resources/lineTruth.txt")[0]] * len(self.polys_reco)
+        pages_reco = [misc.get_page_from_file("./resources/lineReco{}.txt".format(i))[0]
+                      for i in range(1, len(self.polys_reco) + 1)]
+        for min_tol, max_tol in [(-1, -1), (5, 12)]:
+            bl_measure_eval = BaselineMeasureEval(min_tol, max_tol)
+            for polys_truth, polys_reco in zip(pages_truth, pages_reco):
+                bl_measure_eval.calc_measure_for_page_baseline_polys(polys_truth, polys_reco)
+            res = bl_measure_eval.measure.result
+
+            # worker processes return the results in the order of the pages
+            bl_measure_eval_jobs = BaselineMeasureEval(min_tol, max_tol)
+            bl_measure_eval_jobs.calc_measure_for_pages(pages_truth, pages_reco, jobs=3)
+            res_jobs = bl_measure_eval_jobs.measure.result
+            self.assertEqual(res.page_wise_precision, res_jobs.page_wise_precision)
+            self.assertEqual(res.page_wise_recall, res_jobs.page_wise_recall)
+            for name in ["page_wise_per_dist_tol_tick_per_line_precision",
+                         "page_wise_per_dist_tol_tick_per_line_recall"]:
+                for m, m_jobs in zip(getattr(res, name), getattr(res_jobs, name)):
+                    self.assertTrue(np.array_equal(m, m_jobs))
+            self.assertEqual((res.precision, res.recall), (res_jobs.precision, res_jobs.recall))
+
+    def test_calc_measure_for_page_stream(self):
+        page_truth = misc.get_page_from_file("./resources/lineTruth.txt")[0]
+        pages_reco = [misc.get_page_from_file("./resources/lineReco{}.txt".format(i))[0]
+                      for i in range(1, len(self.polys_reco) + 1)]
+        bl_measure_eval = BaselineMeasureEval(5, 12)
+        bl_measure_eval.calc_measure_for_pages([page_truth] * len(pages_reco), pages_reco)
+        res = bl_measure_eval.measure.result
+
+        for jobs in [1, 2]:
+            bl_measure_eval_stream = BaselineMeasureEval(5, 12, keep_line_results=False)
+            bl_measure_eval_stream.calc_measure_for_page_stream(((page_truth, page_reco) for page_reco in pages_reco),
+                                                                jobs)
+            res_stream = bl_measure_eval_stream.measure.result
+            self.assertEqual(res.page_wise_precision, res_stream.page_wise_precision)
+            self.assertEqual(res.page_wise_recall, res_stream.page_wise_recall)
+            self.assertEqual((res.precision, res.recall), (res_stream.precision, res_stream.recall))
+            # only the page-wise results are kept
+            self.assertEqual([], res_stream.page_wise_per_dist_tol_tick_per_line_precision)
+            self.assertEqual([], res_stream.page_wise_per_dist_tol_tick_recall)
+            self.assertRaises(AssertionError, bl_measure_eval_stream.measure.get_page_wise_true_false_counts_gt, 0.5)
@@ -0,0 +1,85 @@
+# coding=utf-8
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+from unittest import TestCase
+
+import numpy as np
+
+from util.geometry import Polygon, PageGeometry
+
+
+class TestGeometry(TestCase):
+
+    def test_polygon_views(self):
+        poly = Polygon([1, 2, 4], [2, 3, 5], 3)
+        self.assertEqual(np.int32, poly.x.dtype)
+        self.assertEqual([1, 2, 4], poly.x.tolist())
+        self.assertEqual([2, 3, 5], poly.y.tolist())
+        self.assertEqual([[1, 2], [2, 3], [4, 5]], poly.points.tolist())
+        self.assertFalse(poly.x.flags.writeable)
+        self.assertIs(poly.x, poly.x)
+
+        # compatibility properties are plain lists of ints
+        self.assertEqual([1, 2, 4], poly.x_points)
+        self.assertTrue(all(type(x) == int for x in poly.y_points))
+        # they are new lists on every access, changing them doesn't change the polygon
+        poly.x_points[0] = 5
+        poly.y_points.append(7)
+        self.assertEqual([1, 2, 4], poly.x_points)
+        self.assertEqual([2, 3, 5], poly.y_points)
+        self.assertRaises(AttributeError, setattr, poly, "x_points", [5, 2, 4])
+
+        # arrays are accepted as well
+        poly = Polygon(np.arange(5), np.arange(5, 10), 5)
+        self.assertEqual(list(range(5, 10)), poly.y_points)
+
+        self.assertRaises(AssertionError, Polygon, [1.0, 2.0], [1, 2], 2)
+        self.assertRaises(AssertionError, Polygon, [1, 2 ** 40], [1, 2], 2)
+        self.assertRaises(Exception, Polygon, [1, 2], [1, 2], 3)
+        self.assertRaises(AttributeError, setattr, poly, "foo", 1)
+
+    def test_polygon_add_point(self):
+        poly = Polygon()
+        for i in range(100):
+            poly.add_point(i, 2 * i)
+        self.assertEqual(100, poly.n_points)
+        self.assertEqual(list(range(100)), poly.x.tolist())
+        self.assertEqual(list(range(0, 200, 2)), poly.y_points)
+
+        bb = poly.get_bounding_box()
+        self.assertEqual((0, 0, 99, 198), (bb.x, bb.y, bb.width, bb.height))
+        self.assertEqual(int, type(bb.width))
+
+        # the cached bounds are updated by add_point and translate
+        poly.add_point(-5, 300)
+        poly.translate(1, -1)
+        bb = poly.get_bounding_box()
+        self.assertEqual((-4, -1, 104, 300), (bb.x, bb.y, bb.width, bb.height))
+        self.assertEqual([-4, 299], poly.points[-1].tolist())
+
+    def test_page_geometry(self):
+        polys = [Polygon([1, 5, 9], [2, 0, 4], 3), Polygon(), Polygon([-3], [7], 1)]
+        page = PageGeometry.from_polygons(polys, article_ids=["a1", "a1", "a2"], text_indices=[0, 1, 2])
+
+        self.assertEqual(3, len(page))
+        self.assertEqual([1, 5, 9, -3], page.xs.tolist())
+        self.assertEqual([0, 3, 3, 4], page.offsets.tolist())
+        self.assertEqual([3, 0, 1], page.n_points.tolist())
+        self.assertEqual(["a1", "a1", "a2"], page.article_ids.tolist())
+        for poly, bb in zip(polys, page.bbs.tolist()):
+            poly_bb = poly.get_bounding_box()
+            self.assertEqual([poly_bb.x, poly_bb.y, poly_bb.width, poly_bb.height], bb)
+
+        # lines are converted back to polygons
+        for poly, line in zip(polys, page.to_polygons()):
+            self.assertEqual(poly.x_points, line.x_points)
+            self.assertEqual(poly.y_points, line.y_points)
+            self.assertEqual(poly.n_points, line.n_points)
+        self.assertEqual([-3], page[-1].x_points)
+        self.assertRaises(IndexError, page.__getitem__, 3)
+
+        self.assertRaises(Exception, PageGeometry, [1, 2], [1, 2], [0, 3])
+        self.assertRaises(AssertionError, PageGeometry, [1, 2], [1, 2], [0, 2], article_ids=["a1", "a2"])
@@ -5,9 +5,19 @@ from __future__ import print_function
 from __future__ import absolute_import
 
 import math
-from unittest import TestCase
+import os
+import tempfile
+from unittest import TestCase, skipIf
 from util import misc
 from util.geometry import Polygon, Rectangle
+from util.distance import ragged_points
+from util.xmlformats.Page import Page
+from util.xmlformats.PageBaselines import read_baselines
+
+try:
+    from scipy.stats import linregress
+except ImportError:
+    linregress = None
 
 
 class TestMisc(TestCase):
@@ -69,6 +79,98 @@ class TestMisc(TestCase):
         p_list, error = misc.get_polys_from_file(poly_file_name)
         print(len(p_list))
 
+    def test_read_baselines(self):
+        poly_file_name = "./resources/page_test.xml"
+        page = read_baselines(poly_file_name, with_line_ids=True, with_article_ids=True)
+        text_lines = Page(poly_file_name).get_textlines()
+
+        self.assertEqual(len(text_lines), len(page))
+        self.assertEqual([tl.baseline.to_polygon().x_points for tl in text_lines],
+                         [poly.x_points for poly in page.to_polygons()])
+        self.assertEqual([tl.baseline.to_polygon().y_points for tl in text_lines],
+                         [poly.y_points for poly in page.to_polygons()])
+        self.assertEqual([tl.id for tl in text_lines], page.line_ids.tolist())
+        self.assertEqual([tl.get_article_id() for tl in text_lines], page.article_ids.tolist())
+        self.assertIsNone(read_baselines(poly_file_name).line_ids)
+
+        # points which aren't tokenized in bulk are parsed like Page.get_point_list
+        poly_file = tempfile.NamedTemporaryFile("w", suffix=".xml", delete=False)
+        xml = '<PcGts xmlns="{}"><Page><TextRegion id="r1">' \
+              '<TextLine id="l1"><Coords points="1,2 3,4"/><Baseline points="{}"/></TextLine>' \
+              '<TextLine id="l2"><Coords points="1,2 3,4"/>{}</TextLine></TextRegion></Page></PcGts>'
+        try:
+            for s_points, baseline, res in [("+1,2 3,4", '<Baseline points="5,6"/>', [[1, 3], [5]]),
+                                            ("1,2  3,4", '<Baseline points="5,6"/>', ValueError),
+                                            ("1,2 3,4", '', IndexError)]:
+                with open(poly_file.name, "w") as f:
+                    f.write(xml.format(Page.NS_PAGE_XML, s_points, baseline))
+                if res in (ValueError, IndexError):
+                    self.assertRaises(res, read_baselines, poly_file.name)
+                    self.assertRaises(res, misc.get_polys_from_file, poly_file.name)
+                else:
+                    self.assertEqual(res, [poly.x_points for poly in read_baselines(poly_file.name).to_polygons()])
+                    self.assertEqual(res, [poly.x_points for poly in misc.get_polys_from_file(poly_file.name)[0]])
+        finally:
+            poly_file.close()
+            os.remove(poly_file.name)
+
+    def test_validate_page_file(self):
+        poly_file_name = "./resources/page_test.xml"
+        self.assertEqual((None, None), misc.validate_page_file("./resources/lineTruth.txt"))
+        self.assertEqual((None, None), misc.validate_page_file(poly_file_name, Page.sVALIDATION_OFF))
+        self.assertTrue(misc.validate_page_file(poly_file_name)[0])
+        self.assertTrue(misc.validate_page_file(poly_file_name, Page.sVALIDATION_FULL)[0])
+
+        # files which don't conform to the schema are loaded by get_page_from_file, but reported here
+        with open(poly_file_name) as f:
+            xml = f.read().replace("<TextLine ", "<TextLine unknown=\"1\" ", 1)
+        poly_file = tempfile.NamedTemporaryFile("w", suffix=".xml", delete=False)
+        try:
+            with poly_file:
+                poly_file.write(xml)
+            self.assertEqual(76, len(misc.get_page_from_file(poly_file.name)[0]))
+            b_valid, log = misc.validate_page_file(poly_file.name)
+            self.assertFalse(b_valid)
+            self.assertIn("unknown", log.last_error.message)
+        finally:
+            os.remove(poly_file.name)
+
+    def test_parse_poly_file(self):
+        for name in ["lineTruth", "lineTruthB"] + ["lineReco{}".format(i) for i in range(1, 11)]:
+            poly_file_name = "./resources/{}.txt".format(name)
+            page, error = misc.parse_poly_file(poly_file_name)
+            polys = [misc.parse_string(line) for line in misc.load_text_file(poly_file_name)]
+
+            self.assertEqual(False, error)
+            self.assertEqual([p.x_points for p in polys], [p.x_points for p in page.to_polygons()])
+            self.assertEqual([p.y_points for p in polys], [p.y_points for p in page.to_polygons()])
+
+        self.assertEqual((None, True), misc.parse_poly_file("./resources/lineReco10_withError.txt"))
+        self.assertEqual((None, False), misc.parse_poly_file("./resources/lineEmpty.txt"))
+
+        # files which aren't tokenized in bulk are parsed line by line with the same results and errors
+        poly_file = tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False)
+        try:
+            for data, res in [("1,2;3,4\n\n  5,6;7,8,9\t\n", [[1, 3], [5, 7]]),
+                              ("1, 2;+3,4\r\n", [[1, 3]]),
+                              ("1,2;3,4\n5,a;7,8\n", None)]:
+                with open(poly_file.name, "w") as f:
+                    f.write(data)
+                page, error = misc.parse_poly_file(poly_file.name)
+                p_list, _ = misc.get_polys_from_file(poly_file.name)
+                if res is None:
+                    self.assertEqual((None, None, True), (page, p_list, error))
+                else:
+                    self.assertEqual(res, [p.x_points for p in page.to_polygons()])
+                    self.assertEqual(res, [p.x_points for p in p_list])
+
+            with open(poly_file.name, "w") as f:
+                f.write("1,2;3,4\n5,6\n")
+            self.assertRaises(Exception, misc.parse_poly_file, poly_file.name)
+        finally:
+            poly_file.close()
+            os.remove(poly_file.name)
+
 
     def test_blow_up(self):
         poly_in = Polygon([0, 3, 4, 5, 7, 5], [1, 3, 5, 3, 1, 0], 6)
@@ -140,6 +242,19 @@ class TestMisc(TestCase):
             self.assertEqual(res.y_points, normed_poly.y_points)
             self.assertEqual(res.n_points, normed_poly.n_points)
 
+    def test_resample_polys(self):
+        polys = misc.get_polys_from_file("./resources/lineTruth.txt")[0] + misc.get_polys_from_file(
+            "./resources/lineReco1.txt")[0]
+        # single point, repeated points and steep lines
+        polys += [Polygon([5], [7], 1), Polygon([5, 5, 9, 9], [7, 7, 60, 60], 4), Polygon([3, 0, 40], [0, 50, 47], 3)]
+
+        for des_dist in [1, 5]:
+            for res, poly in zip(misc.resample_polys(polys, des_dist), polys):
+                poly_thin_out = misc.thin_out(misc.blow_up(poly), des_dist)
+                self.assertEqual(poly_thin_out.x_points, res.x_points)
+                self.assertEqual(poly_thin_out.y_points, res.y_points)
+                self.assertEqual(poly_thin_out.n_points, res.n_points)
+
     def test_calc_reg_line_stats(self):
         # We consider the negative y-values (since we handle computer vision problems..)
         # angle = 0°, n = 0.0
@@ -178,6 +293,53 @@ class TestMisc(TestCase):
         self.assertAlmostEqual(-1.08233671731 + math.pi, angle5, places=8)
         self.assertAlmostEqual(-3.86178217822, n5, places=8)
 
+    def test_calc_orientations(self):
+        polys = [Polygon([], [], 0), Polygon([3], [4], 1), Polygon([3, 3], [4, 9], 2), Polygon([5, 1], [2, 2], 2),
+                 Polygon([2, 2, 2], [1, 5, 9], 3), Polygon([2, 3, 2, 3], [9, 5, 1, 0], 4),
+                 Polygon(list(range(5)), list(range(5)), 5), Polygon([0, 1, 2, 2, 3, 4], [1, 2, 3, 4, 5, 0], 6),
+                 Polygon(list(range(100)), list(range(0, 198, 2)) + [-1], 100)]
+        angles, n = misc.calc_orientations(*ragged_points(polys))
+
+        self.assertEqual([0.0, 0.0, math.pi / 2, math.pi, math.pi / 2], angles[:5].tolist())
+        self.assertEqual([0.0, 0.0, float("inf"), -2.0, float("inf")], n[:5].tolist())
+        self.assertEqual(7 * math.pi / 4, angles[6])
+        self.assertEqual(-2.3, n[7])
+        self.assertAlmostEqual(-1.08233671731 + math.pi, angles[8], places=8)
+        self.assertAlmostEqual(-3.86178217822, n[8], places=8)
+        for i, poly in enumerate(polys):
+            self.assertEqual((angles[i], n[i]), misc.calc_reg_line_stats(poly))
+
+        # the x-range of one pixel is measured like calc_line does (from 0 for negative x-coordinates)
+        polys = [Polygon([-5, -4, -5], [1, 2, 4], 3), Polygon([-1, 0, -1], [1, 2, 4], 3),
+                 Polygon([4, 5, 4], [1, 2, 4], 3)]
+        angles, n = misc.calc_orientations(*ragged_points(polys))
+        for i, poly in enumerate(polys):
+            self.assertEqual((angles[i], n[i]), misc.calc_reg_line_stats(poly))
+            m_line, n_line = misc.calc_line(poly.x_points, [-y for y in poly.y_points])
+            self.assertAlmostEqual(n_line, n[i], places=8)
+            self.assertAlmostEqual(m_line, math.tan(angles[i]), places=8)
+
+    @skipIf(linregress is None, "scipy is not installed")
+    def test_calc_line_linregress(self):
+        # the regression lines are bit-identical to the ones of scipy.stats.linregress (formerly used by calc_line)
+        polys = []
+        for name in ["lineReco{}".format(i) for i in range(1, 11)] + ["lineTruth", "lineTruthB"]:
+            polys += misc.get_polys_from_file("./resources/{}.txt".format(name))[0]
+        polys += misc.get_polys_from_file("./resources/page_test.xml")[0]
+        polys += misc.norm_poly_dists(polys, 5)
+
+        angles, n = misc.calc_orientations(*ragged_points(polys))
+        for i, poly in enumerate(polys):
+            if poly.n_points <= 2 or max(poly.x_points) - min(poly.x_points) < 2:
+                continue
+            y_points = [-y for y in poly.y_points]
+            m_reg, n_reg = linregress(poly.x_points, y_points)[:2]
+            self.assertEqual((m_reg, n_reg), misc.calc_line(poly.x_points, y_points))
+            self.assertEqual(n_reg, n[i])
+            # the angle is the one of the slope, possibly flipped and made positive
+            angle = math.atan(m_reg)
+            self.assertIn(angles[i], [angle, angle + math.pi, angle + 2 * math.pi, angle + math.pi + 2 * math.pi])
+
     def test_get_dist_fast(self):
         bb = Rectangle(0, 0, 10, 10)
         p_list = [[x, y] for x in [-1, 5, 11] for y in [-1, 5, 11]]
@@ -225,7 +387,15 @@ class TestMisc(TestCase):
         self.assertAlmostEqual(-math.sqrt(2), in_dist4, places=8)
 
     def test_calc_tols(self):
-        pass
+        # three parallel baselines with an interline distance of 40 and a single far away baseline
+        polys = [Polygon([0, 500], [y, y], 2) for y in [100, 140, 180]] + [Polygon([3000, 3500], [900, 900], 2)]
+        polys = misc.norm_poly_dists(polys, 5)
+
+        # the far away baseline gets the mean of [40, 40, 40, 0], which also bounds the others
+        self.assertEqual([7.5, 7.5, 7.5, 7.5], misc.calc_tols(polys, 5, 250, 0.25))
+        self.assertEqual([10.0, 10.0, 10.0], misc.calc_tols(polys[:3], 5, 250, 0.25))
+        # baselines with an interline distance beyond max_d fall back to max_d
+        self.assertEqual([7.5, 7.5, 7.5], misc.calc_tols(polys[:3], 5, 30, 0.25))
 
     def test_f_measure(self):
         pass
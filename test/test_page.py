@@ -0,0 +1,117 @@
+# coding=utf-8
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import os
+import tempfile
+from unittest import TestCase
+from xml.etree import ElementTree as ET
+
+from util.xmlformats import PAGE, PageCustom, PageSchema
+from util.xmlformats.Page import Page
+
+
+class TestPage(TestCase):
+
+    def setUp(self):
+        self.path_to_xml = "./resources/page_test.xml"
+
+    def tearDown(self):
+        Page.set_validation_policy(Page.sVALIDATION_ONCE, sample_rate=0.1, background=False)
+
+    def test_schema_cache(self):
+        page1 = Page(self.path_to_xml)
+        page2 = Page(self.path_to_xml)
+
+        self.assertTrue(page1.b_valid and page2.b_valid)
+        self.assertIs(PageSchema.get_schema(Page.get_schema_filename()),
+                      PageSchema.get_schema(Page.get_schema_filename()))
+
+    def test_validation_policy(self):
+        self.assertIsNone(Page(self.path_to_xml, validation=Page.sVALIDATION_OFF).b_valid)
+        self.assertTrue(Page(self.path_to_xml, validation=Page.sVALIDATION_ONCE).b_valid)
+        self.assertTrue(Page(self.path_to_xml, validation=Page.sVALIDATION_FULL).b_valid)
+        self.assertRaises(AssertionError, Page, self.path_to_xml, validation="always")
+
+        Page.set_validation_policy(Page.sVALIDATION_SAMPLED, sample_rate=0.0)
+        self.assertIsNone(Page(self.path_to_xml).b_valid)
+        Page.set_validation_policy(Page.sVALIDATION_SAMPLED, sample_rate=1.0)
+        self.assertTrue(Page(self.path_to_xml).b_valid)
+
+    def test_validate_in_background(self):
+        Page.set_validation_policy(Page.sVALIDATION_ONCE, background=True)
+        page = Page(self.path_to_xml)
+        self.assertTrue(page.wait_validation())
+        self.assertEqual(76, len(page.get_textlines()))
+        # a document changed in memory is copied and validated
+        page.check_validity(page.page_doc, "changed page is not valid")
+        self.assertTrue(page.wait_validation())
+
+        # an invalid file is reported as well
+        with open(self.path_to_xml) as f:
+            xml = f.read().replace("<TextLine ", "<TextLine unknown=\"1\" ", 1)
+        xml_file = tempfile.NamedTemporaryFile("w", suffix=".xml", delete=False)
+        try:
+            with xml_file:
+                xml_file.write(xml)
+            self.assertFalse(Page(xml_file.name).wait_validation())
+            self.assertFalse(Page(xml_file.name, validation=Page.sVALIDATION_FULL).wait_validation())
+        finally:
+            os.remove(xml_file.name)
+
+    def test_parse_custom_attr(self):
+        s_custom = "readingOrder {index:4;} structure {id:a1; type:article;} textStyle {fontSize:12;}"
+        expected = {'readingOrder': {'index': '4'}, 'structure': {'id': 'a1', 'type': 'article'},
+                    'textStyle': {'fontsize': '12'}}
+        self.assertEqual(expected, Page.parse_custom_attr(s_custom))
+        self.assertEqual(expected, PageCustom.parse_custom_attr(s_custom, lower_names=True))
+        expected['textStyle'] = {'fontSize': '12'}
+        self.assertEqual(expected, PAGE.Region(custom=s_custom).parse_custom())
+
+        # every call returns new dictionaries
+        custom = Page.parse_custom_attr(s_custom)
+        custom['readingOrder']['index'] = '5'
+        self.assertEqual('4', Page.parse_custom_attr(s_custom)['readingOrder']['index'])
+
+        # strings beyond the simple form are left to cssutils
+        for s_custom in ["readingOrder {index:007;}", "textStyle {fontFamily:Times New Roman; bold:true}",
+                         "a {b:1; B:2;}", "structure {id:a1;type:article}"]:
+            self.assertIsNone(PageCustom.parse_custom_attr(s_custom, lower_names=True))
+        self.assertEqual({'readingOrder': {'index': '7'}}, Page.parse_custom_attr("readingOrder {index:007;}"))
+        self.assertEqual({}, Page.parse_custom_attr(""))
+
+    def test_textline_article_id(self):
+        def article_id(s_custom):
+            e_textline = ET.Element("{{{}}}TextLine".format(PAGE._ns['p']))
+            if s_custom is not None:
+                e_textline.set("custom", s_custom)
+            return PAGE.TextLine.from_xml(e_textline).article_id
+
+        self.assertEqual('', article_id(None))
+        self.assertEqual('', article_id("readingOrder {index:0;}"))
+        self.assertEqual('a1', article_id("readingOrder {index:0;} structure {id:a1; type:article;}"))
+        self.assertEqual('a1', article_id("structure {type:article; id:a1;}"))
+        # strings beyond the simple form of PageCustom
+        self.assertEqual('a1.2', article_id("structure {id:a1.2; type:article;}"))
+        # the id is taken from the parsed structure (the former string slicing gave "ructure {type:article")
+        self.assertEqual('', article_id("structure {type:article;}"))
+        # the value is split at the first ":" only and kept as written
+        self.assertEqual('a1', article_id("readingOrder index:0;} structure {id:a1;}"))
+        self.assertEqual('a:1', article_id("structure {id:a:1; type:article;}"))
+        self.assertEqual(' a b', article_id("structure {id: a b; type:article;}"))
+        self.assertEqual(' a1 ', article_id("structure {id: a1 ;}"))
+
+    def test_region_parse_custom(self):
+        def parse_custom(s_custom):
+            return PAGE.Region(custom=s_custom).parse_custom()
+
+        self.assertEqual({}, parse_custom(None))
+        self.assertEqual({'structure': {'id': 'a:1', 'type': 'article'}},
+                         parse_custom("structure {id:a:1; type:article;}"))
+        self.assertEqual({'structure': {'id': 'ab', 'type': 'article'}},
+                         parse_custom("structure {id: a b; type:article;}"))
+        # malformed rules and properties are skipped
+        self.assertEqual({'structure': {'id': 'a1'}}, parse_custom("readingOrder index:0;} structure {id:a1;}"))
+        self.assertEqual({'structure': {'type': 'article'}}, parse_custom("structure {id; type:article;}"))
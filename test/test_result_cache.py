@@ -0,0 +1,76 @@
+# coding=utf-8
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from main.eval_measure import BaselineMeasureEval
+from util import misc
+from util.result_cache import ResultCache, page_key
+
+
+class TestResultCache(TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.cache_dir, "results.sqlite")
+        self.page_truth = misc.get_page_from_file("./resources/lineTruth.txt")[0]
+        self.pages_reco = [misc.get_page_from_file("./resources/lineReco{}.txt".format(i))[0] for i in range(1, 10)]
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_page_key(self):
+        settings = BaselineMeasureEval(5, 12).result_settings()
+        key = page_key(self.page_truth, self.pages_reco[0], settings)
+        self.assertEqual(key, page_key(self.page_truth.to_polygons(), self.pages_reco[0].to_polygons(), settings))
+        self.assertNotEqual(key, page_key(self.page_truth, self.pages_reco[1], settings))
+        self.assertNotEqual(key, page_key(self.pages_reco[0], self.page_truth, settings))
+        self.assertNotEqual(key, page_key(self.page_truth, self.pages_reco[0],
+                                          BaselineMeasureEval(5, 13).result_settings()))
+
+    def test_lru_eviction(self):
+        precision = np.random.RandomState(0).rand(8, 6)
+        recall = np.random.RandomState(1).rand(8, 5)
+        with ResultCache(self.cache_path) as result_cache:
+            result_cache.put("a", precision, recall)
+            size = result_cache.total_bytes
+        with ResultCache(self.cache_path, max_bytes=2 * size) as result_cache:
+            self.assertEqual(size, result_cache.total_bytes)
+            cached = result_cache.get("a")
+            self.assertTrue(np.array_equal(precision, cached[0]) and np.array_equal(recall, cached[1]))
+            result_cache.put("b", precision, recall)
+            result_cache.get("a")
+            # "b" is the least recently used result
+            result_cache.put("c", precision, recall)
+            self.assertIsNone(result_cache.get("b"))
+            self.assertIsNotNone(result_cache.get("a"))
+            self.assertIsNotNone(result_cache.get("c"))
+            self.assertEqual(2 * size, result_cache.total_bytes)
+
+    def test_calc_measure_for_pages(self):
+        pages_truth = [self.page_truth] * len(self.pages_reco)
+        bl_measure_eval = BaselineMeasureEval(-1, -1)
+        bl_measure_eval.calc_measure_for_pages(pages_truth, self.pages_reco)
+        res = bl_measure_eval.measure.result
+
+        # the first run fills the cache, the others only read it
+        for i, jobs in enumerate([1, 2, 1]):
+            with ResultCache(self.cache_path) as result_cache:
+                bl_measure_eval_cache = BaselineMeasureEval(-1, -1)
+                bl_measure_eval_cache.calc_measure_for_pages(pages_truth, self.pages_reco, jobs, result_cache)
+                self.assertEqual(0 if i == 0 else len(self.pages_reco), result_cache.hits)
+                self.assertEqual(len(self.pages_reco) if i == 0 else 0, result_cache.misses)
+            res_cache = bl_measure_eval_cache.measure.result
+            self.assertEqual(res.page_wise_precision, res_cache.page_wise_precision)
+            self.assertEqual(res.page_wise_recall, res_cache.page_wise_recall)
+            for m, m_cache in zip(res.page_wise_per_dist_tol_tick_per_line_recall,
+                                  res_cache.page_wise_per_dist_tol_tick_per_line_recall):
+                self.assertTrue(np.array_equal(m, m_cache))
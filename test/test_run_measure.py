@@ -0,0 +1,41 @@
+# coding=utf-8
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+from unittest import TestCase
+
+import numpy as np
+
+from main.run_measure import load_page_list, load_page_pairs
+
+
+class TestRunMeasure(TestCase):
+
+    def test_load_page_pairs(self):
+        list_truth = load_page_list("./resources/truth.lst")[0]
+        list_reco = load_page_list("./resources/reco.lst")[0]
+        # the paths of the lst-files are relative to the root of the repository
+        list_truth = ["./" + name[len("test/"):] for name in list_truth]
+        list_reco = ["./" + name[len("test/"):] for name in list_reco] + ["./resources/missing.txt"]
+        list_truth.append(list_truth[0])
+
+        page_pairs = list(load_page_pairs(list_truth, list_reco))
+        self.assertEqual(len(list_truth), len(page_pairs))
+        self.assertTrue(page_pairs[-1][3])
+        for prefetch_workers, prefetch_depth in [(1, 1), (3, 2), (4, 16)]:
+            page_pairs_prefetched = list(load_page_pairs(list_truth, list_reco, prefetch_workers=prefetch_workers,
+                                                         prefetch_depth=prefetch_depth))
+            self.assertEqual(len(page_pairs), len(page_pairs_prefetched))
+            for page_pair, page_pair_prefetched in zip(page_pairs, page_pairs_prefetched):
+                self.assertEqual((page_pair[1], page_pair[3]), (page_pair_prefetched[1], page_pair_prefetched[3]))
+                for page, page_prefetched in [(page_pair[0], page_pair_prefetched[0]),
+                                              (page_pair[2], page_pair_prefetched[2])]:
+                    self.assertEqual(page is None, page_prefetched is None)
+                    if page is not None:
+                        np.testing.assert_array_equal(page.xs, page_prefetched.xs)
+                        np.testing.assert_array_equal(page.offsets, page_prefetched.offsets)
+
+        self.assertRaises(AssertionError, list, load_page_pairs(list_truth, list_reco, prefetch_workers=2,
+                                                                prefetch_depth=0))
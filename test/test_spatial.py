@@ -0,0 +1,74 @@
+# coding=utf-8
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+from unittest import TestCase
+
+import numpy as np
+
+from util import spatial
+
+
+class TestSpatial(TestCase):
+
+    def setUp(self):
+        self.rng = np.random.RandomState(42)
+
+    def random_bbs(self, n):
+        return np.stack([self.rng.randint(0, 2000, n), self.rng.randint(0, 2000, n),
+                         self.rng.randint(0, 500, n), self.rng.randint(0, 30, n)], axis=1)
+
+    def test_expand_ranges(self):
+        self.assertEqual([3, 4, 5, 0, 7, 8], spatial.expand_ranges([3, 10, 0, 7], [3, 0, 1, 2]).tolist())
+        self.assertEqual([], spatial.expand_ranges([], []).tolist())
+
+    def test_candidate_pairs(self):
+        bbs_a = self.random_bbs(200)
+        bbs_b = self.random_bbs(150)
+        tols_b = np.tile(np.arange(5.0, 21.0), [150, 1]) * self.rng.rand(150, 1)
+
+        pairs_a, pairs_b = spatial.candidate_pairs(bbs_a, bbs_b, tols_b)
+
+        idx_a, idx_b = np.meshgrid(np.arange(200), np.arange(150), indexing="ij")
+        idx_a, idx_b = idx_a.ravel(), idx_b.ravel()
+        keep = ~spatial.far_apart(bbs_a[idx_a], bbs_b[idx_b], tols_b[idx_b])
+
+        self.assertEqual(idx_a[keep].tolist(), pairs_a.tolist())
+        self.assertEqual(idx_b[keep].tolist(), pairs_b.tolist())
+
+        # the sweep order of bbs_b can be computed beforehand
+        pairs_a, pairs_b = spatial.candidate_pairs(bbs_a, bbs_b, tols_b, spatial.sweep_order(bbs_b, tols_b))
+        self.assertEqual(idx_a[keep].tolist(), pairs_a.tolist())
+        self.assertEqual(idx_b[keep].tolist(), pairs_b.tolist())
+
+    def test_close_pairs(self):
+        bbs = self.random_bbs(300)
+
+        pairs_a, pairs_b = spatial.close_pairs(bbs, 100)
+
+        idx_a, idx_b = np.meshgrid(np.arange(300), np.arange(300), indexing="ij")
+        idx_a, idx_b = idx_a.ravel(), idx_b.ravel()
+        gap_x = np.maximum(abs((2 * bbs[idx_a, 0] + bbs[idx_a, 2]) - (2 * bbs[idx_b, 0] + bbs[idx_b, 2])) -
+                           bbs[idx_a, 2] - bbs[idx_b, 2], 0) // 2
+        gap_y = np.maximum(abs((2 * bbs[idx_a, 1] + bbs[idx_a, 3]) - (2 * bbs[idx_b, 1] + bbs[idx_b, 3])) -
+                           bbs[idx_a, 3] - bbs[idx_b, 3], 0) // 2
+        keep = (idx_a != idx_b) & (gap_x + gap_y <= 100)
+
+        self.assertEqual(idx_a[keep].tolist(), pairs_a.tolist())
+        self.assertEqual(idx_b[keep].tolist(), pairs_b.tolist())
+
+    def test_nearest_dists(self):
+        xs, ys = self.rng.randint(0, 1000, 500), self.rng.randint(0, 1000, 500)
+        query_xs, query_ys = self.rng.randint(-100, 1100, 300), self.rng.randint(-100, 1100, 300)
+        radius = self.rng.rand(300) * 60
+
+        grid = spatial.PointGrid(xs, ys, 60)
+        min_dist = grid.nearest_dists(query_xs, query_ys, radius)
+
+        res = np.amin(abs(query_xs[:, None] - xs) + abs(query_ys[:, None] - ys), axis=1).astype(float)
+        res[res > radius] = np.inf
+        self.assertTrue(np.array_equal(res, min_dist))
+
+        self.assertTrue(np.all(np.isinf(spatial.PointGrid([], [], 60).nearest_dists(query_xs, query_ys, radius))))
@@ -0,0 +1,139 @@
+import numpy as np
+
+
+def greedy_keys(scores):
+    """Sort keys of the greedy order (see greedy_order): ascending keys (ties by the order of the pairs) give the
+    greedy order."""
+    return np.where(np.isnan(scores), -np.inf, -scores)
+
+
+def greedy_order(scores):
+    """Return the order in which the greedy alignment visits the pairs with the given ``scores``: by descending score,
+    NaN scores first (like np.argmax does), ties are resolved by the order of the pairs.
+
+    :param scores: array of scores, the last axis iterates over the pairs
+    :return: array of pair indices (sorted along the last axis)
+    """
+    return np.argsort(greedy_keys(scores), axis=-1, kind="stable")
+
+
+def greedy_alignment(pairs_a, pairs_b, scores, n_a, n_b):
+    """Greedy one-to-one alignment of the elements of two sets given by scored pairs (pairs_a[k], pairs_b[k]). The
+    result equals repeatedly taking the pair with maximum score (ties resolved by the order of the pairs) and removing
+    all pairs sharing an element with it, until no pair with a positive score is left. The pairs are sorted once and
+    swept with bitmaps of the already aligned elements.
+
+    :param pairs_a: indices of the elements of the first set
+    :param pairs_b: indices of the elements of the second set
+    :param scores: scores of the pairs
+    :param n_a: number of elements of the first set
+    :param n_b: number of elements of the second set
+    :return: indices of the aligned pairs (in alignment order)
+    """
+    order = greedy_order(scores)
+    # pairs with a non-positive score are sorted last and never aligned
+    order = order[:np.count_nonzero(~(scores <= 0.0))]
+
+    return greedy_sweep(order, pairs_a, pairs_b, n_a, n_b)
+
+
+def greedy_sweep(order, pairs_a, pairs_b, n_a, n_b):
+    """Sweep the pairs in the given order and align every pair whose elements are not aligned yet.
+
+    :param order: indices of the pairs to visit
+    :param pairs_a: indices of the elements of the first set
+    :param pairs_b: indices of the elements of the second set
+    :param n_a: number of elements of the first set
+    :param n_b: number of elements of the second set
+    :return: indices of the aligned pairs (in alignment order)
+    """
+    used_a = np.zeros(n_a, dtype=bool).tolist()
+    used_b = np.zeros(n_b, dtype=bool).tolist()
+    aligned = []
+
+    for k, a, b in zip(order.tolist(), pairs_a[order].tolist(), pairs_b[order].tolist()):
+        if used_a[a] or used_b[b]:
+            continue
+        used_a[a] = used_b[b] = True
+        aligned.append(k)
+
+    return np.array(aligned, dtype=np.int64)
+
+
+def is_greedy_alignment(aligned, pairs_a, pairs_b, keys, valid, n_a, n_b):
+    """Check for several score vectors over the same pairs whether the given alignment is their greedy alignment. This
+    holds iff all aligned pairs are valid and every other valid pair shares an element with an aligned pair which comes
+    first in the greedy order. The order of two pairs is given by their keys (ties by their indices), so the score
+    vectors don't have to be sorted.
+
+    :param aligned: indices of the aligned pairs
+    :param pairs_a: indices of the elements of the first set
+    :param pairs_b: indices of the elements of the second set
+    :param keys: sort keys of the pairs (see greedy_keys), of shape #vectors x #pairs
+    :param valid: boolean mask of the pairs with a positive (or NaN) score, of shape #vectors x #pairs
+    :param n_a: number of elements of the first set
+    :param n_b: number of elements of the second set
+    :return: boolean array, True for every score vector with the given greedy alignment
+    """
+    n_pairs = keys.shape[1]
+    idx = np.arange(n_pairs)
+    is_aligned = np.zeros(n_pairs, dtype=bool)
+    is_aligned[aligned] = True
+
+    blocked = np.zeros(keys.shape, dtype=bool)
+    for pairs, n in [(pairs_a, n_a), (pairs_b, n_b)]:
+        # aligned pair of the element of every pair (-1 if the element is not aligned)
+        aligned_of = np.full(n, -1, dtype=np.int64)
+        aligned_of[pairs[aligned]] = aligned
+        q = aligned_of[pairs]
+        has_q = q >= 0
+        keys_q = keys[:, np.where(has_q, q, 0)]
+        blocked |= has_q & ((keys_q < keys) | ((keys_q == keys) & (q < idx)))
+
+    return np.all(valid[:, aligned], axis=1) & np.all(blocked | ~valid | is_aligned, axis=1)
+
+
+def greedy_alignment_batched(pairs_a, pairs_b, scores, n_a, n_b):
+    """Greedy one-to-one alignment (see greedy_alignment) for several score vectors over the same pairs in one pass,
+    e.g. one per tolerance tick. Neighbouring score vectors mostly share their alignment: the alignment of a vector is
+    checked against the following vectors (see is_greedy_alignment, in windows of doubling size) and only the first
+    vector it doesn't hold for is sorted and swept again.
+
+    :param pairs_a: indices of the elements of the first set
+    :param pairs_b: indices of the elements of the second set
+    :param scores: scores of the pairs of shape #vectors x #pairs
+    :param n_a: number of elements of the first set
+    :param n_b: number of elements of the second set
+    :return: boolean mask of the aligned pairs of shape #vectors x #pairs
+    """
+    scores = np.asarray(scores)
+    assert scores.ndim == 2 and scores.shape[1] == len(pairs_a) == len(pairs_b), \
+        "scores have to be of shape #vectors x #pairs"
+    pairs_a = np.asarray(pairs_a, dtype=np.int64)
+    pairs_b = np.asarray(pairs_b, dtype=np.int64)
+    n_vec = scores.shape[0]
+
+    keys = greedy_keys(scores)
+    # pairs with a non-positive score are sorted last and never aligned
+    valid = ~(scores <= 0.0)
+
+    aligned = np.zeros(scores.shape, dtype=bool)
+    i = 0
+    while i < n_vec:
+        order = np.argsort(keys[i], kind="stable")[:np.count_nonzero(valid[i])]
+        aligned_i = greedy_sweep(order, pairs_a, pairs_b, n_a, n_b)
+        aligned[i, aligned_i] = True
+        # reuse the alignment for the following score vectors as long as it is their greedy alignment
+        i += 1
+        window = 1
+        while i < n_vec:
+            holds = is_greedy_alignment(aligned_i, pairs_a, pairs_b, keys[i:i + window], valid[i:i + window], n_a,
+                                        n_b)
+            n_holds = len(holds) if np.all(holds) else int(np.argmin(holds))
+            aligned[i:i + n_holds, aligned_i] = True
+            i += n_holds
+            if n_holds < len(holds):
+                break
+            window *= 2
+
+    return aligned
@@ -0,0 +1,174 @@
+import json
+import os
+from argparse import ArgumentParser
+
+import numpy as np
+
+from util.geometry import PageGeometry
+from util.misc import load_text_file, get_page_from_file
+from util.xmlformats.PageBaselines import read_baselines
+
+# A corpus store is a directory "<name>.corpus" holding the baselines of many pages in flat arrays (saved as npy-files,
+# which are memory mapped when the store is opened):
+#   coords.npy        (n_points x 2, int32) x and y coordinates of the points of all lines of all pages
+#   line_offsets.npy  (n_lines + 1, int64) start of every line in coords followed by the total number of points
+#   page_offsets.npy  (n_pages + 1, int64) start of every page in line_offsets followed by the total number of lines
+#   page_status.npy   (n_pages, int8) PAGE_LOADED, PAGE_EMPTY or PAGE_ERROR (see get_page_from_file)
+#   article_ids.npy   (n_lines, int32, optional) index of the article id of every line in "article_ids" of the meta
+#                     data, -1 if the line has no article id
+#   meta.json         format version, names of the pages (paths of the files they were read from), article ids
+CORPUS_SUFFIX = ".corpus"
+CORPUS_VERSION = 1
+
+PAGE_LOADED = 0
+PAGE_EMPTY = 1
+PAGE_ERROR = 2
+
+_INT32_INFO = np.iinfo(np.int32)
+
+
+def is_corpus(path):
+    """Check if ``path`` names a corpus store (a directory with suffix ``CORPUS_SUFFIX``)."""
+    return os.path.normpath(path).endswith(CORPUS_SUFFIX)
+
+
+def write_corpus(corpus_path, file_names, with_article_ids=False):
+    """Read the pages of the txt- or xml-files ``file_names`` (see ``get_page_from_file``) and save them as corpus
+    store ``corpus_path``. Pages which can't be loaded are stored as such, s.t. reading the store reproduces the
+    results of ``get_page_from_file``.
+
+    :param corpus_path: path to the corpus store (directory with suffix ``CORPUS_SUFFIX``)
+    :param file_names: paths to the txt- or xml-files holding the pages
+    :param with_article_ids: store the article ids of the lines of xml-files
+    :type corpus_path: str
+    :type file_names: list of str
+    :return: the corpus store
+    :rtype: CorpusStore
+    """
+    assert is_corpus(corpus_path), "corpus_path has to end with {}".format(CORPUS_SUFFIX)
+    assert type(file_names) == list, "file_names has to be a list"
+
+    l_coords = []
+    n_points = []
+    n_lines = []
+    page_status = []
+    article_ids = []
+    article_id_index = {}
+    for file_name in file_names:
+        try:
+            if with_article_ids and file_name.endswith(".xml"):
+                page, error = read_baselines(file_name, with_article_ids=True), False
+            else:
+                page, error = get_page_from_file(file_name)
+        except IOError:
+            page, error = None, True
+
+        if error or page is None:
+            page_status.append(PAGE_ERROR if error else PAGE_EMPTY)
+            n_lines.append(0)
+            continue
+        if page.xs.size and (min(page.xs.min(), page.ys.min()) < _INT32_INFO.min or
+                             max(page.xs.max(), page.ys.max()) > _INT32_INFO.max):
+            raise ValueError("Coordinates of {} exceed the int32 range".format(file_name))
+
+        page_status.append(PAGE_LOADED)
+        n_lines.append(len(page))
+        n_points.append(page.n_points)
+        l_coords.append(np.stack([page.xs, page.ys], axis=1).astype(np.int32))
+        page_article_ids = page.article_ids if page.article_ids is not None else [None] * len(page)
+        article_ids.extend(article_id_index.setdefault(a_id, len(article_id_index)) if a_id is not None else -1
+                           for a_id in page_article_ids)
+
+    line_offsets = np.zeros(sum(n_lines) + 1, dtype=np.int64)
+    np.cumsum(np.concatenate(n_points + [np.zeros(0, dtype=np.int64)]), out=line_offsets[1:])
+    page_offsets = np.zeros(len(file_names) + 1, dtype=np.int64)
+    np.cumsum(n_lines, out=page_offsets[1:])
+
+    os.makedirs(corpus_path, exist_ok=True)
+    np.save(os.path.join(corpus_path, "coords.npy"),
+            np.concatenate(l_coords + [np.zeros([0, 2], dtype=np.int32)]))
+    np.save(os.path.join(corpus_path, "line_offsets.npy"), line_offsets)
+    np.save(os.path.join(corpus_path, "page_offsets.npy"), page_offsets)
+    np.save(os.path.join(corpus_path, "page_status.npy"), np.array(page_status, dtype=np.int8))
+    if with_article_ids:
+        np.save(os.path.join(corpus_path, "article_ids.npy"), np.array(article_ids, dtype=np.int32))
+    elif os.path.exists(os.path.join(corpus_path, "article_ids.npy")):
+        os.remove(os.path.join(corpus_path, "article_ids.npy"))
+    meta = {"version": CORPUS_VERSION,
+            "page_names": file_names,
+            "article_ids": sorted(article_id_index, key=article_id_index.get) if with_article_ids else None}
+    with open(os.path.join(corpus_path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+    return CorpusStore(corpus_path)
+
+
+class CorpusStore(object):
+
+    def __init__(self, corpus_path):
+        """ opens the corpus store ``corpus_path`` (see ``write_corpus``), the arrays are memory mapped (read-only)
+
+        :param corpus_path: path to the corpus store
+        """
+        with open(os.path.join(corpus_path, "meta.json"), "r") as f:
+            meta = json.load(f)
+        if meta.get("version") != CORPUS_VERSION:
+            raise IOError("Unsupported version {} of corpus store {}".format(meta.get("version"), corpus_path))
+
+        self.corpus_path = corpus_path
+        self.page_names = meta["page_names"]
+        self.coords = self._load("coords.npy")
+        self.line_offsets = self._load("line_offsets.npy")
+        self.page_offsets = self._load("page_offsets.npy")
+        self.page_status = self._load("page_status.npy")
+        if meta["article_ids"] is not None:
+            self.article_ids = self._load("article_ids.npy")
+            self.article_id_names = meta["article_ids"]
+        else:
+            self.article_ids = None
+            self.article_id_names = None
+
+        if not (len(self.page_names) == len(self.page_status) == len(self.page_offsets) - 1 and
+                self.page_offsets[-1] == len(self.line_offsets) - 1 and self.line_offsets[-1] == len(self.coords)):
+            raise IOError("Inconsistent corpus store {}".format(corpus_path))
+
+    def _load(self, name):
+        return np.load(os.path.join(self.corpus_path, name), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.page_names)
+
+    def get_page(self, i):
+        """ returns the i-th page like ``get_page_from_file`` does for the file it was read from
+
+        :param i: (int) index of the page
+        :return: a tuple containing the page geometry (None if errors occur or no polygons are found) and a boolean
+        value representing if the polygons are loaded with errors
+        """
+        if self.page_status[i] != PAGE_LOADED:
+            return None, bool(self.page_status[i] == PAGE_ERROR)
+
+        line_start, line_end = self.page_offsets[i], self.page_offsets[i + 1]
+        offsets = self.line_offsets[line_start:line_end + 1]
+        coords = self.coords[offsets[0]:offsets[-1]]
+        article_ids = None
+        if self.article_ids is not None:
+            article_ids = [self.article_id_names[j] if j >= 0 else None
+                           for j in self.article_ids[line_start:line_end].tolist()]
+
+        return PageGeometry(coords[:, 0], coords[:, 1], offsets - offsets[0], article_ids=article_ids), False
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(usage="%(prog)s --lst <lst-file> --corpus <name>{}".format(CORPUS_SUFFIX))
+    parser.add_argument('--lst', default='', type=str, metavar="STR",
+                        help="lst-file containing a path to a txt- or xml-file per line")
+    parser.add_argument('--corpus', default='', type=str, metavar="STR",
+                        help="path to the corpus store to write")
+    parser.add_argument('--article_ids', default=False, action='store_true',
+                        help="store the article ids of the lines of xml-files (default: %(default)s)")
+    flags = parser.parse_args()
+
+    corpus = write_corpus(flags.corpus, load_text_file(flags.lst), flags.article_ids)
+    print("Wrote {} pages, {} lines and {} points to {}".format(
+        len(corpus), len(corpus.line_offsets) - 1, len(corpus.coords), flags.corpus))
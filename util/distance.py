@@ -0,0 +1,349 @@
+import numpy as np
+
+from util.geometry import PageGeometry
+from util.spatial import expand_ranges, candidate_pairs
+
+# maximum number of entries of a single point distance block (bounds the memory of the distance kernels)
+MAX_BLOCK_SIZE = 1 << 22
+
+
+def ragged_points(polys):
+    """Concatenate the points of all polygons in ``polys`` to flat coordinate arrays. The points of the i-th polygon are
+    given by the slice ``offsets[i]:offsets[i + 1]``.
+
+    :param polys: list of polygons or the page geometry holding them
+    :type polys: list of Polygon or PageGeometry
+    :return: x-coordinates, y-coordinates and offsets (all int64 arrays)
+    """
+    if isinstance(polys, PageGeometry):
+        return polys.xs, polys.ys, polys.offsets
+
+    n_points = [poly.n_points for poly in polys]
+    offsets = np.zeros(len(polys) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(n_points)
+
+    xs = np.concatenate([poly.x for poly in polys] + [np.zeros(0, dtype=np.int64)]).astype(np.int64)
+    ys = np.concatenate([poly.y for poly in polys] + [np.zeros(0, dtype=np.int64)]).astype(np.int64)
+
+    return xs, ys, offsets
+
+
+def bounding_boxes(polys):
+    """Return the bounding boxes of all polygons in ``polys`` as Nx4 array with rows (x, y, width, height).
+
+    :param polys: list of polygons or the page geometry holding them
+    :type polys: list of Polygon or PageGeometry
+    :return: Nx4 int64 array of bounding boxes
+    """
+    if isinstance(polys, PageGeometry):
+        return polys.bbs
+
+    bbs = np.zeros([len(polys), 4], dtype=np.int64)
+    for i, poly in enumerate(polys):
+        bb = poly.get_bounding_box()
+        bbs[i] = bb.x, bb.y, bb.width, bb.height
+
+    return bbs
+
+
+def compact_points(xs, ys, xs_ref, ys_ref):
+    """Shift the points to count and the reference points of a page to a common origin and store them in the smallest
+    integer dtype (int16 or int32) which holds all L1 distances between them, such that the distance kernels work on
+    compact arrays and yield the same distances.
+
+    :param xs: x-coordinates of the points to count over
+    :param ys: y-coordinates of the points to count over
+    :param xs_ref: x-coordinates of all reference points
+    :param ys_ref: y-coordinates of all reference points
+    :return: the shifted coordinate arrays (xs, ys, xs_ref, ys_ref)
+    """
+    coords = [np.asarray(c) for c in (xs, ys, xs_ref, ys_ref)]
+    if not all(c.size for c in coords):
+        return tuple(coords)
+    min_x = min(np.amin(xs), np.amin(xs_ref))
+    min_y = min(np.amin(ys), np.amin(ys_ref))
+    # maximum L1 distance between two points of the page
+    max_dist = max(np.amax(xs), np.amax(xs_ref)) - min_x + max(np.amax(ys), np.amax(ys_ref)) - min_y
+
+    for dtype in (np.int16, np.int32):
+        if max_dist <= np.iinfo(dtype).max:
+            return (coords[0] - min_x).astype(dtype), (coords[1] - min_y).astype(dtype), \
+                (coords[2] - min_x).astype(dtype), (coords[3] - min_y).astype(dtype)
+    return tuple(coords)
+
+
+def segment_min_dists(xs, ys, xs_ref, ys_ref, offsets_ref, segments, ref_min_dist=None):
+    """Calculate for every point (``xs``, ``ys``) the minimum L1 distance to the points of every reference polygon
+    (segment of the ragged arrays ``xs_ref``, ``ys_ref``) given by the indices ``segments``. All segments have to be
+    non-empty. If ``ref_min_dist`` is given, the distance blocks are reused to lower the minimum distances of the
+    reference points of the segments to the points (``xs``, ``ys``) in place.
+
+    :param xs: x-coordinates of the points to count over
+    :param ys: y-coordinates of the points to count over
+    :param xs_ref: x-coordinates of all reference points
+    :param ys_ref: y-coordinates of all reference points
+    :param offsets_ref: offsets of the reference polygons in xs_ref, ys_ref
+    :param segments: indices of the reference polygons
+    :param ref_min_dist: optional array of minimum distances of all reference points (updated in place)
+    :return: (len(segments), len(xs)) array of minimum distances
+    """
+    starts = offsets_ref[segments]
+    lengths = offsets_ref[segments + 1] - starts
+    min_dist = np.empty([len(segments), len(xs)], dtype=np.result_type(xs, xs_ref))
+
+    # split the reference polygons into chunks, s.t. the distance blocks stay small
+    chunk_bounds = np.cumsum(lengths) * max(len(xs), 1) // MAX_BLOCK_SIZE
+    _, chunk_starts = np.unique(chunk_bounds, return_index=True)
+    chunk_starts = np.append(chunk_starts, len(segments))
+
+    for c_start, c_end in zip(chunk_starts[:-1], chunk_starts[1:]):
+        c_lengths = lengths[c_start:c_end]
+        c_offsets = np.cumsum(c_lengths) - c_lengths
+        # indices of all reference points of the chunk
+        idx = expand_ranges(starts[c_start:c_end], c_lengths)
+
+        dist_x = abs(xs - np.expand_dims(xs_ref[idx], axis=1))
+        dist_y = abs(ys - np.expand_dims(ys_ref[idx], axis=1))
+        dist = dist_x + dist_y
+        min_dist[c_start:c_end] = np.minimum.reduceat(dist, c_offsets, axis=0)
+        if ref_min_dist is not None and len(xs):
+            ref_min_dist[idx] = np.minimum(ref_min_dist[idx], np.amin(dist, axis=1))
+
+    return min_dist
+
+
+def rel_hit_values(min_dist, tols):
+    """Calculate the relative hit value of every point for every tolerance value. A point is a full hit if its minimum
+    distance is at most the tolerance, the hit linearly decreases to zero at three times the tolerance.
+
+    :param min_dist: array of minimum distances (last axis iterates over the points)
+    :param tols: array of tolerances broadcastable against min_dist
+    :return: array of relative hit values
+    """
+    # Calculate masks for two tolerance cases
+    mask1 = (min_dist <= tols).astype(float)
+    mask2 = (min_dist <= 3.0 * tols).astype(float)
+    mask2 = mask2 - mask1
+
+    return mask1 + mask2 * ((3.0 * tols - min_dist) / (2.0 * tols))
+
+
+def sorted_rel_hits(min_dist, offsets, tols):
+    """Calculate the sum of the relative hit values (see rel_hit_values) of the points of every segment of ``min_dist``
+    for all tolerance values at once. The distances of every segment are sorted once, the number of full hits and the
+    number and distance sum of the partial hits per tolerance value are then looked up with searchsorted in the sorted
+    distances and their cumulative sums. Points with infinite minimum distance don't contribute. Up to rounding, the
+    result equals the sum of rel_hit_values over the points of the segment; entries with a non-positive or non-finite
+    tolerance are passed to rel_hit_values directly.
+
+    :param min_dist: integral (or infinite) minimum distances of all points (ragged array given by offsets)
+    :param offsets: offsets of the segments in min_dist
+    :param tols: (#segments, #tols) array of tolerances
+    :return: (#segments, #tols) array of summed relative hits
+    """
+    min_dist = np.asarray(min_dist)
+    tols = np.asarray(tols, dtype=float)
+    n_segments = len(offsets) - 1
+    no_hit = np.isinf(min_dist)
+
+    # sort all segments at once by the key (segment, distance), infinite distances are sorted last within a segment
+    dist = np.where(no_hit, 0, min_dist).astype(np.int64)
+    max_dist = int(np.amax(dist)) if dist.size else 0
+    key_scale = max_dist + 2
+    dist[no_hit] = max_dist + 1
+    segment_keys = np.repeat(np.arange(n_segments, dtype=np.int64) * key_scale, np.diff(offsets))
+    keys = np.sort(segment_keys + dist)
+    dist = keys - segment_keys
+    dist[dist > max_dist] = 0
+    cum_dist = np.zeros(len(dist) + 1, dtype=np.int64)
+    np.cumsum(dist, out=cum_dist[1:])
+
+    # points are full hits up to distance tol and partial hits up to 3 * tol, as the distances are integral, the
+    # thresholds can be rounded down
+    valid = np.isfinite(tols) & (tols > 0)
+    tols_valid = np.where(valid, tols, 1.0)
+    thresholds_full = np.minimum(np.floor(tols_valid), max_dist).astype(np.int64)
+    thresholds_part = np.minimum(np.floor(3.0 * tols_valid), max_dist).astype(np.int64)
+    segment_keys = np.arange(n_segments, dtype=np.int64)[:, None] * key_scale
+    end_full = np.searchsorted(keys, segment_keys + thresholds_full, "right")
+    end_part = np.searchsorted(keys, segment_keys + thresholds_part, "right")
+
+    n_full = end_full - np.asarray(offsets[:-1])[:, None]
+    n_part = end_part - end_full
+    sum_part = cum_dist[end_part] - cum_dist[end_full]
+    rel_hits = n_full + (3.0 * tols_valid * n_part - sum_part) / (2.0 * tols_valid)
+
+    for i, t in zip(*np.nonzero(~valid)):
+        start, end = offsets[i], offsets[i + 1]
+        hits = rel_hit_values(np.where(no_hit[start:end], 0, min_dist[start:end]), tols[i, t])
+        hits[no_hit[start:end]] = 0.0
+        rel_hits[i, t] = np.sum(hits)
+
+    return rel_hits
+
+
+def line_rel_hits(min_dist, offsets, tols, sorted_hits=False):
+    """Calculate the relative hits of every polygon from the minimum distances of its points for all tolerance values.
+    Points with infinite minimum distance (no reference point nearby) don't contribute.
+
+    :param min_dist: minimum distances of all points (ragged array given by offsets)
+    :param offsets: offsets of the polygons in min_dist
+    :param tols: (#polygons, #tols) array of tolerances
+    :param sorted_hits: evaluate the hits with sorted_rel_hits (equal up to rounding)
+    :return: (#tols, #polygons) array of relative hits
+    """
+    if sorted_hits:
+        return np.transpose(sorted_rel_hits(min_dist, offsets, tols) / np.diff(offsets)[:, None])
+
+    rel_hits = np.zeros([tols.shape[1], len(offsets) - 1])
+    no_hit = np.isinf(min_dist)
+    min_dist = np.where(no_hit, 0, min_dist)
+
+    for i in range(len(offsets) - 1):
+        start, end = offsets[i], offsets[i + 1]
+        hits = rel_hit_values(min_dist[start:end], np.expand_dims(tols[i], axis=1))
+        hits[:, no_hit[start:end]] = 0.0
+        rel_hits[:, i] = np.sum(hits, axis=1) / (end - start)
+
+    return rel_hits
+
+
+class PageDistances(object):
+    def __init__(self, polys_to_count, polys_ref, tols_ref, ref_side=True, sorted_hits=False, compact_coords=False,
+                 order_ref=None):
+        """
+        Minimum L1 point distances between the polygons ``polys_to_count`` and ``polys_ref`` of a page. The distance
+        block of every candidate pair (pairs not satisfying the early stopping criterion of
+        ``BaselineMeasureEval.count_rel_hits``) is computed once and reduced in both directions: to the minimum
+        distance of every point to count to every candidate reference polygon and (if ``ref_side``) to the minimum
+        distance of every reference point to all candidate polygons to count.
+
+        :param polys_to_count: list of polygons to count over
+        :param polys_ref: list of reference polygons
+        :param tols_ref: (len(polys_ref), #tols) array of tolerances of the reference polygons
+        :param ref_side: also reduce the distances for the reference points
+        :param sorted_hits: evaluate the relative hits with sorted_rel_hits (equal up to rounding)
+        :param compact_coords: compute the distances on compact integer coordinates (see compact_points)
+        :param order_ref: optional precomputed sweep order of the reference polygons (see sweep_order)
+        :type polys_to_count: list of Polygon or PageGeometry
+        :type polys_ref: list of Polygon or PageGeometry
+        :type tols_ref: np.ndarray
+        """
+        self.tols_ref = np.asarray(tols_ref, dtype=float)
+        self.n_to_count = len(polys_to_count)
+        self.n_ref = len(polys_ref)
+        self.sorted_hits = sorted_hits
+
+        xs, ys, self.offsets = ragged_points(polys_to_count)
+        xs_ref, ys_ref, self.offsets_ref = ragged_points(polys_ref)
+        if compact_coords:
+            xs, ys, xs_ref, ys_ref = compact_points(xs, ys, xs_ref, ys_ref)
+
+        # per polygon to count: indices of the candidate reference polygons and the minimum distances to them
+        self.segments = []
+        self.min_dists = []
+        # minimum distance of every reference point to the candidate polygons (inf if there is none)
+        self.ref_min_dist = np.full(len(xs_ref), np.inf) if ref_side else None
+
+        if not (self.n_to_count and self.n_ref):
+            return
+
+        # broad phase: only pairs within reach of each other have to be considered
+        pairs, pairs_ref = candidate_pairs(bounding_boxes(polys_to_count), bounding_boxes(polys_ref), self.tols_ref,
+                                           order_ref)
+        # polygons without points can't be hit
+        non_empty = self.offsets_ref[pairs_ref + 1] > self.offsets_ref[pairs_ref]
+        pairs, pairs_ref = pairs[non_empty], pairs_ref[non_empty]
+        bounds = np.searchsorted(pairs, np.arange(self.n_to_count + 1))
+
+        for i in range(self.n_to_count):
+            segments = pairs_ref[bounds[i]:bounds[i + 1]]
+            start, end = self.offsets[i], self.offsets[i + 1]
+            self.segments.append(segments)
+            self.min_dists.append(segment_min_dists(xs[start:end], ys[start:end], xs_ref, ys_ref, self.offsets_ref,
+                                                    segments, self.ref_min_dist))
+
+    def sparse_rel_hits(self):
+        """Relative hits of all pairs of polygons to count and reference polygons with a nonzero hit for any tolerance
+        value, stored as packed (pair, tolerance) table. All other pairs have no hits.
+
+        :return: indices of the polygons to count, indices of the reference polygons (both of length #pairs, sorted by
+        (polygon to count, reference polygon)) and the (#tols, #pairs) array of relative hits
+        """
+        if self.sorted_hits:
+            return self._sorted_sparse_rel_hits()
+
+        pairs = []
+        pairs_ref = []
+        rel_hits = []
+
+        for i, (segments, min_dist) in enumerate(zip(self.segments, self.min_dists)):
+            if not segments.size:
+                continue
+            n_points = self.offsets[i + 1] - self.offsets[i]
+            hits = rel_hit_values(np.expand_dims(min_dist, axis=1), np.expand_dims(self.tols_ref[segments], axis=2))
+            hits = np.transpose(np.sum(hits, axis=2) / n_points)
+
+            # keep pairs with at least one nonzero (or NaN) hit
+            nonzero = np.any(hits != 0.0, axis=0)
+            pairs.append(np.full(np.count_nonzero(nonzero), i, dtype=np.int64))
+            pairs_ref.append(segments[nonzero])
+            rel_hits.append(hits[:, nonzero])
+
+        if not rel_hits:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros([self.tols_ref.shape[1], 0])
+        return np.concatenate(pairs), np.concatenate(pairs_ref), np.concatenate(rel_hits, axis=1)
+
+    def _sorted_sparse_rel_hits(self):
+        """sparse_rel_hits evaluated with a single sorted_rel_hits call over the distances of all candidate pairs."""
+        pairs = np.repeat(np.arange(len(self.segments), dtype=np.int64), [len(segments) for segments in self.segments])
+        if not pairs.size:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros([self.tols_ref.shape[1], 0])
+        pairs_ref = np.concatenate(self.segments)
+
+        # every candidate pair is a segment of the distances of the points of the polygon to count
+        n_points = (self.offsets[1:] - self.offsets[:-1])[pairs]
+        offsets = np.zeros(len(pairs) + 1, dtype=np.int64)
+        np.cumsum(n_points, out=offsets[1:])
+        min_dist = np.concatenate([min_dist.ravel() for min_dist in self.min_dists])
+        rel_hits = np.transpose(sorted_rel_hits(min_dist, offsets, self.tols_ref[pairs_ref]) / n_points[:, None])
+
+        # keep pairs with at least one nonzero (or NaN) hit
+        nonzero = np.any(rel_hits != 0.0, axis=0)
+        return pairs[nonzero], pairs_ref[nonzero], rel_hits[:, nonzero]
+
+    def rel_hits(self):
+        """Relative hits of every polygon to count against every reference polygon for all tolerance values.
+
+        :return: (#tols, #polygons to count, #reference polygons) array of relative hits
+        """
+        rel_hits = np.zeros([self.tols_ref.shape[1], self.n_to_count, self.n_ref])
+        pairs, pairs_ref, sparse_rel_hits = self.sparse_rel_hits()
+        rel_hits[:, pairs, pairs_ref] = sparse_rel_hits
+
+        return rel_hits
+
+    def ref_rel_hits(self):
+        """Relative hits of every reference polygon against all polygons to count for all tolerance values.
+
+        :return: (#tols, #reference polygons) array of relative hits
+        """
+        assert self.ref_min_dist is not None, "distances of the reference points haven't been calculated"
+
+        return line_rel_hits(self.ref_min_dist, self.offsets_ref, self.tols_ref, self.sorted_hits)
+
+
+def page_rel_hits(polys_to_count, polys_ref, tols_ref):
+    """Calculate the relative hits of every polygon of ``polys_to_count`` against every polygon of ``polys_ref`` for
+    all tolerance values at once. Entry [t, i, j] equals
+    ``BaselineMeasureEval.count_rel_hits(polys_to_count[i], polys_ref[j], tols_ref[j])[t]``.
+
+    :param polys_to_count: list of polygons to count over
+    :param polys_ref: list of reference polygons
+    :param tols_ref: (len(polys_ref), #tols) array of tolerances of the reference polygons
+    :type polys_to_count: list of Polygon
+    :type polys_ref: list of Polygon
+    :type tols_ref: np.ndarray
+    :return: (#tols, len(polys_to_count), len(polys_ref)) array of relative hits
+    """
+    return PageDistances(polys_to_count, polys_ref, tols_ref, ref_side=False).rel_hits()
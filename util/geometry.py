@@ -1,5 +1,8 @@
+import operator
 import sys
 
+import numpy as np
+
 
 # rectangle class
 class Rectangle(object):
@@ -131,41 +134,81 @@ class Rectangle(object):
 
 # polygon class
 class Polygon(object):
+    __slots__ = ("_points", "_tail", "_views", "n_points", "bounds")
 
     def __init__(self, x_points=None, y_points=None, n_points=0):
-        """ constructs a new polygon
+        """ constructs a new polygon, the coordinates are stored in a contiguous int32 buffer of shape (N, 2)
+
+        The coordinates aren't stored in the lists ``x_points`` and ``y_points`` any longer: the properties of the same
+        names return new lists on every access, so changing such a list (e.g. ``poly.x_points[0] = 5`` or
+        ``poly.x_points.append(5)``) doesn't change the polygon. Use ``translate`` and ``add_point`` or construct a new
+        polygon instead.
 
-        :param x_points: (list of ints) list of x coordinates of the polygon
-        :param y_points: (list of ints) list of y coordinates of the polygon
+        :param x_points: (list or 1d array of ints) x coordinates of the polygon
+        :param y_points: (list or 1d array of ints) y coordinates of the polygon
         :param n_points: (int) total number of points in the polygon
         """
-        if x_points is not None:
-            assert type(x_points) == list, "x_points has to be a list of ints"
-            assert all(type(x) == int for x in x_points), "x_points has to be a list of ints"
-            if n_points > len(x_points) or n_points > len(y_points):
-                raise Exception("Bounds Error: n_points > len(x_points) or n_points > len(y_points)")
-
-            self.x_points = x_points
-        else:
-            self.x_points = []
-
-        if y_points is not None:
-            assert type(y_points) == list, "y_points has to be a list of ints"
-            assert all(type(y) == int for y in y_points), "y_points has to be a list of ints"
-            if n_points > len(x_points) or n_points > len(y_points):
-                raise Exception("Bounds Error: n_points > len(x_points) or n_points > len(y_points)")
-
-            self.y_points = y_points
-        else:
-            self.y_points = []
+        xs = _int32_coords(x_points, "x_points")
+        ys = _int32_coords(y_points, "y_points")
+        if n_points > len(xs) or n_points > len(ys):
+            raise Exception("Bounds Error: n_points > len(x_points) or n_points > len(y_points)")
 
         assert type(n_points) == int, "n_points has to be int"
         if n_points < 0:
             raise Exception("Negative Size: n_points < 0")
 
+        self._points = np.zeros((max(len(xs), len(ys)), 2), dtype=np.int32)
+        self._points[:len(xs), 0] = xs
+        self._points[:len(ys), 1] = ys
+        self._tail = []  # flat x, y coordinates added by add_point which aren't moved to the buffer yet
+        self._views = None  # cached read-only views of the coordinates (x, y, points)
+
         self.n_points = n_points
         self.bounds = None  # bounds of this polygon (Rectangle type !!!)
 
+    def _get_points(self):
+        if self._tail:
+            tail = np.array(self._tail, dtype=np.int32).reshape(-1, 2)
+            self._points = np.concatenate([self._points, tail])
+            self._tail = []
+
+        return self._points
+
+    def _get_views(self):
+        if self._views is None or len(self._views[2]) != self.n_points:
+            points = self._get_points()[:self.n_points]
+            points.flags.writeable = False
+            self._views = (points[:, 0], points[:, 1], points)
+
+        return self._views
+
+    @property
+    def x(self):
+        """ (int32 array) read-only view of the x coordinates of the polygon """
+        return self._get_views()[0]
+
+    @property
+    def y(self):
+        """ (int32 array) read-only view of the y coordinates of the polygon """
+        return self._get_views()[1]
+
+    @property
+    def points(self):
+        """ (int32 array) read-only view of the (n_points, 2) coordinates of the polygon """
+        return self._get_views()[2]
+
+    @property
+    def x_points(self):
+        """ (list of ints) x coordinates of the polygon, a new list on every access (changes of it are lost) kept for
+        compatibility """
+        return self._get_points()[:, 0].tolist()
+
+    @property
+    def y_points(self):
+        """ (list of ints) y coordinates of the polygon, a new list on every access (changes of it are lost) kept for
+        compatibility """
+        return self._get_points()[:, 1].tolist()
+
     def translate(self, delta_x, delta_y):
         """ translates the vertices of this polygon by delta_x along the x axis and by delta_y along the y axis
 
@@ -175,21 +218,16 @@ class Polygon(object):
         assert type(delta_x) == int, "delta_x has to be int"
         assert type(delta_y) == int, "delta_y has to be int"
 
-        for i in range(self.n_points):
-            self.x_points[i] += delta_x
-            self.y_points[i] += delta_y
+        self._get_points()[:self.n_points] += np.array([delta_x, delta_y], dtype=np.int32)
 
         if self.bounds is not None:
             self.bounds.translate(delta_x, delta_y)
 
     def calculate_bounds(self):
         """ calculates the bounding box of points of the polygon """
-
-        bounds_min_x = min(self.x_points)
-        bounds_min_y = min(self.y_points)
-
-        bounds_max_x = max(self.x_points)
-        bounds_max_y = max(self.y_points)
+        points = self._get_points()
+        bounds_min_x, bounds_min_y = points.min(axis=0).tolist()
+        bounds_max_x, bounds_max_y = points.max(axis=0).tolist()
 
         self.bounds = Rectangle(bounds_min_x, bounds_min_y, width=bounds_max_x - bounds_min_x,
                                 height=bounds_max_y - bounds_min_y)
@@ -216,17 +254,16 @@ class Polygon(object):
             self.bounds.height = max(self.bounds.height, y - self.bounds.y)
 
     def add_point(self, x, y):
-        """ appends the specified coordinates to this polygon
+        """ appends the specified coordinates to this polygon, they are moved to the buffer on the next access
 
         :param x: (int) x coordinate of the added point
         :param y: (int) y coordinate of the added point
         """
-        assert type(x) == int, "x has to be int"
-        assert type(y) == int, "y has to be int"
+        x, y = operator.index(x), operator.index(y)
 
-        self.x_points.append(x)
-        self.y_points.append(y)
+        self._tail += (x, y)
         self.n_points += 1
+        self._views = None
 
         if self.bounds is not None:
             self.update_bounds(x, y)
@@ -245,6 +282,128 @@ class Polygon(object):
         return self.bounds.get_bounds()
 
 
+# page geometry class
+class PageGeometry(object):
+
+    def __init__(self, xs, ys, offsets, article_ids=None, text_indices=None, line_ids=None, bbs=None):
+        """ constructs a structure of arrays holding all lines (baseline polygons) of a page, the points of the i-th
+        line are given by the slice offsets[i]:offsets[i + 1] of the flat coordinate arrays
+
+        :param xs: (1d array of ints) x coordinates of the points of all lines
+        :param ys: (1d array of ints) y coordinates of the points of all lines
+        :param offsets: (1d array of ints) start of every line in xs and ys followed by the total number of points
+        :param article_ids: (optional sequence) article id of every line
+        :param text_indices: (optional sequence) index of the text (e.g., reading order index) of every line
+        :param line_ids: (optional sequence) id of every line (e.g., the TextLine id of a PAGE file)
+        :param bbs: (optional Nx4 array of ints) precomputed bounding boxes of the lines (see bbs)
+        """
+        xs = np.asarray(xs)
+        ys = np.asarray(ys)
+        offsets = np.asarray(offsets)
+        assert xs.ndim == 1 and (xs.dtype.kind in "iu" or xs.size == 0), "xs has to be a 1d array of ints"
+        assert ys.ndim == 1 and (ys.dtype.kind in "iu" or ys.size == 0), "ys has to be a 1d array of ints"
+        assert offsets.ndim == 1 and len(offsets) > 0 and (offsets.dtype.kind in "iu" or offsets.size == 0), \
+            "offsets has to be a non-empty 1d array of ints"
+        if len(xs) != len(ys):
+            raise Exception("Bounds Error: len(xs) != len(ys)")
+        if offsets[0] != 0 or offsets[-1] != len(xs) or np.any(np.diff(offsets) < 0):
+            raise Exception("Bounds Error: offsets have to increase from 0 to len(xs)")
+
+        self.xs = xs.astype(np.int64, copy=False)
+        self.ys = ys.astype(np.int64, copy=False)
+        self.offsets = offsets.astype(np.int64, copy=False)
+        self.article_ids = self._line_metadata(article_ids, "article_ids")
+        self.text_indices = self._line_metadata(text_indices, "text_indices")
+        self.line_ids = self._line_metadata(line_ids, "line_ids")
+        if bbs is None:
+            bbs = self._calc_bounding_boxes()
+        else:
+            bbs = np.asarray(bbs).astype(np.int64, copy=False)
+            assert bbs.shape == (len(self), 4), "bbs has to hold one bounding box per line"
+        self.bbs = bbs  # Nx4 array of bounding boxes (x, y, width, height) of the lines
+
+    @classmethod
+    def from_polygons(cls, polys, article_ids=None, text_indices=None, line_ids=None):
+        """ constructs the page geometry of a list of polygons
+
+        :param polys: (list of Polygons) lines of the page
+        :param article_ids: (optional sequence) article id of every line
+        :param text_indices: (optional sequence) index of the text of every line
+        :param line_ids: (optional sequence) id of every line
+        :return: (PageGeometry) page geometry holding the points of the polygons
+        """
+        assert type(polys) == list, "polys has to be list"
+        assert all([isinstance(poly, Polygon) for poly in polys]), "elements of polys have to be Polygons"
+
+        offsets = np.zeros(len(polys) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([poly.n_points for poly in polys])
+        xs = np.concatenate([poly.x for poly in polys] + [np.zeros(0, dtype=np.int64)])
+        ys = np.concatenate([poly.y for poly in polys] + [np.zeros(0, dtype=np.int64)])
+
+        return cls(xs, ys, offsets, article_ids, text_indices, line_ids)
+
+    def _line_metadata(self, values, name):
+        if values is None:
+            return None
+        values = np.asarray(values)
+        assert values.shape == (len(self),), "{} has to hold one value per line".format(name)
+
+        return values
+
+    def _calc_bounding_boxes(self):
+        bbs = np.zeros([len(self), 4], dtype=np.int64)
+        non_empty = np.flatnonzero(self.n_points > 0)
+        if non_empty.size:
+            starts = self.offsets[non_empty]
+            min_x, max_x = np.minimum.reduceat(self.xs, starts), np.maximum.reduceat(self.xs, starts)
+            min_y, max_y = np.minimum.reduceat(self.ys, starts), np.maximum.reduceat(self.ys, starts)
+            bbs[non_empty] = np.stack([min_x, min_y, max_x - min_x, max_y - min_y], axis=1)
+
+        return bbs
+
+    @property
+    def n_points(self):
+        """ (int64 array) number of points of every line """
+        return np.diff(self.offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        """ gets the i-th line as polygon
+
+        :param i: (int) index of the line
+        :return: (Polygon) polygon holding the points of the line
+        """
+        i = range(len(self))[i]
+        start, end = self.offsets[i], self.offsets[i + 1]
+
+        return Polygon(self.xs[start:end], self.ys[start:end], int(end - start))
+
+    def to_polygons(self):
+        """ converts the lines of the page to polygons
+
+        :return: (list of Polygons) one polygon per line
+        """
+        return [self[i] for i in range(len(self))]
+
+
+def _int32_coords(points, name):
+    """ converts a list or 1d array of integer coordinates to an int32 array (empty if ``points`` is None) """
+    if points is None:
+        return np.zeros(0, dtype=np.int32)
+
+    points = np.asarray(points)
+    if points.size == 0:
+        return np.zeros(0, dtype=np.int32)
+
+    assert points.ndim == 1 and points.dtype.kind in "iu", "{} has to be a list of ints".format(name)
+    assert np.iinfo(np.int32).min <= points.min() and points.max() <= np.iinfo(np.int32).max, \
+        "{} has to fit into int32".format(name)
+
+    return points.astype(np.int32, copy=False)
+
+
 if __name__ == '__main__':
     p = Polygon([1, 2, 4, 6, 7], [2, 4, 2, 3, 1], 5)
 
@@ -16,8 +16,18 @@ class BaselineMeasureResult(object):
 
 
 class BaselineMeasure(object):
-    def __init__(self):
+    def __init__(self, keep_line_results=True):
+        """
+        :param keep_line_results: keep the per tolerance (per line) results of every page, otherwise only the page-wise
+            and the average precision and recall values are kept (memory independent of the number of lines)
+        """
+        assert type(keep_line_results) == bool, "keep_line_results has to be bool"
+
         self.result = BaselineMeasureResult()
+        self.keep_line_results = keep_line_results
+        # running sums of the page-wise values for the averages over all pages
+        self.recall_sum = 0.0
+        self.precision_sum = 0.0
 
     def add_per_dist_tol_tick_per_line_recall(self, per_dist_tol_tick_per_line_recall):
         """ #distTolTicks x #truthBaseLines matrix of recalls, stores results """
@@ -29,19 +39,23 @@ class BaselineMeasure(object):
             "per_dist_tol_tick_per_line_recall has to be float"
 
         # page wise recall: per tol, per line
-        self.result.page_wise_per_dist_tol_tick_per_line_recall.append(per_dist_tol_tick_per_line_recall)
+        if self.keep_line_results:
+            self.result.page_wise_per_dist_tol_tick_per_line_recall.append(per_dist_tol_tick_per_line_recall)
 
         # page wise recall: per tol (summed over lines)
         per_dist_tol_tick_recall = np.sum(per_dist_tol_tick_per_line_recall, axis=1)
         per_dist_tol_tick_recall /= per_dist_tol_tick_per_line_recall.shape[1]
-        self.result.page_wise_per_dist_tol_tick_recall.append(per_dist_tol_tick_recall)
+        if self.keep_line_results:
+            self.result.page_wise_per_dist_tol_tick_recall.append(per_dist_tol_tick_recall)
 
         # page wise recall: summed over tols & lines
         recall = np.sum(per_dist_tol_tick_recall)
         recall /= per_dist_tol_tick_recall.shape[0]
         self.result.page_wise_recall.append(recall)
 
-        self.calc_recall()
+        # average recall over all pages (same as calc_recall)
+        self.recall_sum += recall
+        self.result.recall = self.recall_sum / len(self.result.page_wise_recall)
 
     def add_per_dist_tol_tick_per_line_precision(self, per_dist_tol_tick_per_line_precision):
         """ #distTolTicks x #recoBaseLines matrix of precisions, stores results"""
@@ -53,19 +67,23 @@ class BaselineMeasure(object):
             "per_dist_tol_tick_per_line_precision has to be float"
 
         # page wise precision: per tol, per line
-        self.result.page_wise_per_dist_tol_tick_per_line_precision.append(per_dist_tol_tick_per_line_precision)
+        if self.keep_line_results:
+            self.result.page_wise_per_dist_tol_tick_per_line_precision.append(per_dist_tol_tick_per_line_precision)
 
         # page wise precision: per tol (summed over lines)
         per_dist_tol_tick_precision = np.sum(per_dist_tol_tick_per_line_precision, axis=1)
         per_dist_tol_tick_precision /= per_dist_tol_tick_per_line_precision.shape[1]
-        self.result.page_wise_per_dist_tol_tick_precision.append(per_dist_tol_tick_precision)
+        if self.keep_line_results:
+            self.result.page_wise_per_dist_tol_tick_precision.append(per_dist_tol_tick_precision)
 
         # page wise precision: summed over tols & lines
         precision = np.sum(per_dist_tol_tick_precision)
         precision /= per_dist_tol_tick_precision.shape[0]
         self.result.page_wise_precision.append(precision)
 
-        self.calc_precision()
+        # average precision over all pages (same as calc_precision)
+        self.precision_sum += precision
+        self.result.precision = self.precision_sum / len(self.result.page_wise_precision)
 
     def calc_recall(self):
         """ average recall over all pages and store result """
@@ -85,6 +103,7 @@ class BaselineMeasure(object):
 
     def get_page_wise_true_false_counts_hypo(self, threshold):
         assert type(threshold) == float, "threshold has to be float"
+        assert self.keep_line_results, "per line results have to be kept"
 
         true_false_positives = np.zeros([2, len(self.result.page_wise_per_dist_tol_tick_per_line_precision)])
 
@@ -101,6 +120,7 @@ class BaselineMeasure(object):
 
     def get_page_wise_true_false_counts_gt(self, threshold):
         assert type(threshold) == float, "threshold has to be float"
+        assert self.keep_line_results, "per line results have to be kept"
 
         true_false_negatives = np.zeros([2, len(self.result.page_wise_per_dist_tol_tick_per_line_recall)])
 
@@ -118,6 +138,7 @@ class BaselineMeasure(object):
     def get_specific_page_true_false_constellation(self, page_num, threshold):
         assert type(page_num) == int, "page_num has to be int"
         assert type(threshold) == float, "threshold has to be float"
+        assert self.keep_line_results, "per line results have to be kept"
 
         per_dist_tol_tick_per_line_recall = self.result.page_wise_per_dist_tol_tick_per_line_recall[page_num]
         avg_per_line_recall = np.sum(per_dist_tol_tick_per_line_recall, axis=0)
@@ -1,10 +1,14 @@
 import math
+import re
 import numpy as np
 from io import open
-from scipy.stats import linregress
 
-from util.geometry import Polygon, Rectangle
+from util.geometry import Polygon, Rectangle, PageGeometry
+from util.distance import ragged_points, bounding_boxes, MAX_BLOCK_SIZE
+from util.spatial import expand_ranges, close_pairs
 from util.xmlformats.Page import Page
+from util.xmlformats import PageSchema
+from util.xmlformats.PageBaselines import read_baselines
 
 
 def load_text_file(filename):
@@ -31,7 +35,7 @@ def parse_string(string_polygon):
     :return: Polygon object with the coordinates given in string_polygon
     """
 
-    polygon = Polygon()
+    x_points, y_points = [], []
     points = string_polygon.split(";")
     if len(points) < 2:
         raise Exception("Wrong polygon string format.")
@@ -39,10 +43,9 @@ def parse_string(string_polygon):
         coord = p.split(",")
         if len(coord) < 2:
             raise Exception("Wrong polygon string format.")
-        coord_x = int(coord[0])
-        coord_y = int(coord[1])
-        polygon.add_point(coord_x, coord_y)
-    return polygon
+        x_points.append(int(coord[0]))
+        y_points.append(int(coord[1]))
+    return Polygon(x_points, y_points, len(x_points))
 
 
 def poly_to_string(polygon):
@@ -64,6 +67,67 @@ def poly_to_string(polygon):
 
 # get_polys_from_page_file not necessary since we're only handling strings which are produced from Java routines
 
+# polygon files only holding lines of the form x1,y1;x2,y2;...;xn,yn (at least two points, coordinates with at most 9
+# digits, blank lines and spaces/tabs around the lines allowed) are tokenized in bulk by parse_poly_file
+_POINT_PATTERN = r"-?[0-9]{1,9},-?[0-9]{1,9}"
+_LINE_PATTERN = r"[ \t]*(?:{0}(?:;{0})+[ \t]*)?".format(_POINT_PATTERN)
+_POLY_FILE_RE = re.compile(r"{0}(?:\n{0})*".format(_LINE_PATTERN))
+_POLY_FILE_SEPARATORS = str.maketrans(",;\n\t", "    ")
+
+
+def _parse_poly_strings(poly_strings):
+    """Parse the (stripped) lines ``poly_strings`` of a polygon file with ``parse_string``.
+
+    :param poly_strings: list of polygon strings
+    :type poly_strings: list of str
+    :return: a tuple containing the list of polygons (None if errors occur or no polygons are found) and a boolean value
+    representing if the polygons are loaded with errors
+    """
+    if len(poly_strings) == 0:
+        return None, False
+
+    res = []
+    for poly_string in poly_strings:
+        try:
+            poly = parse_string(str(poly_string))
+            res.append(poly)
+        except ValueError:
+            return None, True
+    return res, False
+
+
+def parse_poly_file(poly_file_name):
+    """Load the polygons of a text file ``poly_file_name`` (one polygon per line, see ``parse_string``) as columnar
+    page. The file is read once and all coordinates of well-formed files are tokenized in a single pass, all other files
+    are parsed line by line, s.t. errors are reported exactly as by ``get_polys_from_file``.
+
+    :param poly_file_name: path to the txt file holding the polygons (one polygon per line)
+    :type poly_file_name: str
+    :return: a tuple containing the page geometry (None if errors occur or no polygons are found) and a boolean value
+    representing if the polygons are loaded with errors
+    """
+    with open(poly_file_name, 'r') as f:
+        data = f.read()
+
+    if _POLY_FILE_RE.fullmatch(data) is None:
+        polys, error = _parse_poly_strings(load_text_file(poly_file_name))
+        return (PageGeometry.from_polygons(polys) if polys is not None else None), error
+
+    # every point holds exactly one comma, blank lines hold none
+    buf = np.frombuffer(data.encode("ascii"), dtype=np.uint8)
+    line_ids = np.searchsorted(np.flatnonzero(buf == ord("\n")), np.flatnonzero(buf == ord(",")))
+    n_points = np.bincount(line_ids)
+    n_points = n_points[n_points > 0]
+    if not n_points.size:
+        return None, False
+
+    coords = np.fromstring(data.translate(_POLY_FILE_SEPARATORS), dtype=np.int64, sep=" ")
+    offsets = np.zeros(len(n_points) + 1, dtype=np.int64)
+    np.cumsum(n_points, out=offsets[1:])
+
+    return PageGeometry(coords[0::2], coords[1::2], offsets), False
+
+
 def get_polys_from_file(poly_file_name):
     """Load polygons from a text file ``poly_file_name`` and save them as ``Polygon`` objects in a list.
 
@@ -75,18 +139,8 @@ def get_polys_from_file(poly_file_name):
 
     # TODO: Bool return value necessary? -> Just check if returned list is None (then you know if it was skipped or not)
     if poly_file_name.endswith(".txt"):
-        poly_strings = load_text_file(poly_file_name)
-        if len(poly_strings) == 0:
-            return None, False
-
-        res = []
-        for poly_string in poly_strings:
-            try:
-                poly = parse_string(str(poly_string))
-                res.append(poly)
-            except ValueError:
-                return None, True
-        return res, False
+        page, error = parse_poly_file(poly_file_name)
+        return (page.to_polygons() if page is not None else None), error
     elif poly_file_name.endswith(".xml"):
         # TODO: Implement a method that sorts the textlines/textregions according to the reading order
         # TODO: catch exceptions -> which kind of exception can occur?
@@ -97,6 +151,42 @@ def get_polys_from_file(poly_file_name):
         return res, False
 
 
+def get_page_from_file(poly_file_name):
+    """Load the polygons of a text or PAGE file ``poly_file_name`` as columnar page, see ``get_polys_from_file``. Only
+    the baselines of PAGE files are read (see ``read_baselines``). PAGE files are not validated against the XSD schema,
+    i.e., files which don't conform to the schema are loaded without being reported (unlike ``get_polys_from_file``),
+    see ``validate_page_file``.
+
+    :param poly_file_name: path to the txt or xml file holding the polygons
+    :type poly_file_name: str
+    :return: a tuple containing the page geometry (None if errors occur or no polygons are found) and a boolean value
+    representing if the polygons are loaded with errors
+    """
+    if poly_file_name.endswith(".txt"):
+        return parse_poly_file(poly_file_name)
+    elif poly_file_name.endswith(".xml"):
+        # only the baselines are read, without validating the file against the schema
+        return read_baselines(poly_file_name), False
+
+
+def validate_page_file(poly_file_name, validation=Page.sVALIDATION_ONCE):
+    """Validate the PAGE file ``poly_file_name`` against the XSD schema (which ``get_page_from_file`` doesn't do) if it
+    is selected by the validation policy ``validation`` (see ``Page.is_validated_by_policy``). Text files aren't
+    validated.
+
+    :param poly_file_name: path to the txt or xml file holding the polygons
+    :param validation: one of the validation policies of ``Page``
+    :type poly_file_name: str
+    :type validation: str
+    :return: a tuple containing the validity of the file (None if it isn't validated) and the error log of the
+    validation (None if it isn't validated)
+    """
+    if not poly_file_name.endswith(".xml") or not Page.is_validated_by_policy(validation, poly_file_name):
+        return None, None
+
+    return PageSchema.validate_file(poly_file_name, Page.get_schema_filename())
+
+
 def blow_up(polygon):
     """Takes a ``polygon`` as input and adds pixels to it according to the following rule. Consider the line between two
     adjacent pixels in the polygon (i.e., if connected via an egde). Then the method adds additional equidistand pixels
@@ -107,11 +197,12 @@ def blow_up(polygon):
     :return: blown up polygon
     """
     res = Polygon()
+    x_points, y_points = polygon.x_points, polygon.y_points
     for i in range(1, polygon.n_points, 1):
-        x1 = polygon.x_points[i - 1]
-        y1 = polygon.y_points[i - 1]
-        x2 = polygon.x_points[i]
-        y2 = polygon.y_points[i]
+        x1 = x_points[i - 1]
+        y1 = y_points[i - 1]
+        x2 = x_points[i]
+        y2 = y_points[i]
         diff_x = abs(x2 - x1)
         diff_y = abs(y2 - y1)
         # if (x1,y1) = (x2, y2)
@@ -161,10 +252,87 @@ def thin_out(polygon, des_dist):
     min_pts = 20
     des_pts = max(min_pts, int(dist / des_dist) + 1)
     step = dist / (des_pts - 1)
+    x_points, y_points = polygon.x_points, polygon.y_points
     for i in range(des_pts - 1):
         idx = int(i * step)
-        res.add_point(polygon.x_points[idx], polygon.y_points[idx])
-    res.add_point(polygon.x_points[-1], polygon.y_points[-1])
+        res.add_point(x_points[idx], y_points[idx])
+    res.add_point(x_points[-1], y_points[-1])
+
+    return res
+
+
+def resample_polys(poly_list, des_dist):
+    """For a given list of polygons ``poly_list`` calculate ``thin_out(blow_up(poly), des_dist)`` for every polygon at
+    once, without building the blown up polygons. Every point of a polygon contributes a piece of consecutive pixels to
+    the blown up polygon (max(x-distance, y-distance) pixels for the line to the next point, a single pixel for the last
+    point). The pixels kept by thin_out are located in these pieces via their cumulative lengths and only these pixels
+    are interpolated, with the same rounding as blow_up.
+
+    :param poly_list: list of polygons or the page geometry holding them
+    :param des_dist: max distance of two adjacent pixels
+    :type poly_list: list of Polygon or PageGeometry
+    :type des_dist: int
+    :return: list of polygons (page geometry if poly_list is a page geometry, with the same line metadata)
+    """
+    xs, ys, offsets = ragged_points(poly_list)
+    n_points = np.diff(offsets)
+
+    # length of the piece of every point (no piece for polygons with a single point)
+    piece_lengths = np.zeros(len(xs), dtype=np.int64)
+    is_last = np.zeros(len(xs), dtype=bool)
+    is_last[offsets[1:][n_points > 0] - 1] = True
+    piece_lengths[:-1] = np.maximum(abs(np.diff(xs)), abs(np.diff(ys)))
+    piece_lengths[is_last] = 1
+    piece_lengths[is_last & np.repeat(n_points == 1, n_points)] = 0
+    piece_starts = np.cumsum(piece_lengths) - piece_lengths
+
+    # number of pixels of the blown up polygons and the pixels kept by thin_out
+    blown_up_starts = np.append(piece_starts, np.sum(piece_lengths))[offsets]
+    n_blown_up = np.diff(blown_up_starts)
+    blown_up_starts = blown_up_starts[:-1]
+    thinned = n_blown_up > 20
+    des_pts = np.where(thinned, np.maximum(20, ((n_blown_up - 1) / des_dist).astype(np.int64) + 1), n_blown_up)
+    step = (n_blown_up - 1) / np.maximum(des_pts - 1, 1)
+
+    out_poly = np.repeat(np.arange(len(poly_list)), des_pts)
+    i = expand_ranges(np.zeros(len(poly_list), dtype=np.int64), des_pts)
+    idx = np.where(thinned[out_poly], (i * step[out_poly]).astype(np.int64), i)
+    # the last pixel is always kept
+    is_end = i == des_pts[out_poly] - 1
+    idx[is_end] = n_blown_up[out_poly[is_end]] - 1
+
+    # locate the kept pixels in the pieces, the j-th pixel of a piece is j pixels away from its point along the
+    # dominant axis of the line to the next point
+    idx += blown_up_starts[out_poly]
+    k = np.searchsorted(piece_starts, idx, side="right") - 1
+    j = idx - piece_starts[k]
+    res_x = xs[k]
+    res_y = ys[k]
+
+    inner = np.flatnonzero(j > 0)
+    dx = xs[k[inner] + 1] - xs[k[inner]]
+    dy = ys[k[inner] + 1] - ys[k[inner]]
+    along_x = abs(dx) >= abs(dy)
+
+    sel, dx_sel, dy_sel = inner[along_x], dx[along_x], dy[along_x]
+    step_x = np.sign(dx_sel) * j[sel]
+    res_y[sel] = np.rint(ys[k[sel]] + step_x * dy_sel / dx_sel).astype(np.int64)
+    res_x[sel] += step_x
+
+    sel, dx_sel, dy_sel = inner[~along_x], dx[~along_x], dy[~along_x]
+    step_y = np.sign(dy_sel) * j[sel]
+    res_x[sel] = np.rint(xs[k[sel]] + step_y * dx_sel / dy_sel).astype(np.int64)
+    res_y[sel] += step_y
+
+    out_offsets = np.append(0, np.cumsum(des_pts))
+    if isinstance(poly_list, PageGeometry):
+        return PageGeometry(res_x, res_y, out_offsets, poly_list.article_ids, poly_list.text_indices,
+                            poly_list.line_ids)
+
+    res = []
+    out_offsets = out_offsets.tolist()
+    for start, end in zip(out_offsets[:-1], out_offsets[1:]):
+        res.append(Polygon(res_x[start:end], res_y[start:end], end - start))
 
     return res
 
@@ -173,25 +341,33 @@ def norm_poly_dists(poly_list, des_dist):
     """For a given list of polygons ``poly_list`` calculate the corresponding normed polygons, s.t. every polygon has
     adjacent pixels with a distance of ~des_dist.
 
-    :param poly_list: list of polygons
+    :param poly_list: list of polygons or the page geometry holding them
     :param des_dist: distance (measured in pixels) of two adjecent pixels in the destination polygon
-    :type poly_list: list of Polygon
+    :type poly_list: list of Polygon or PageGeometry
     :type des_dist: int
-    :return: list of polygons
+    :return: list of polygons (page geometry if poly_list is a page geometry)
     """
-
-    res = []
+    if isinstance(poly_list, PageGeometry):
+        huge = np.any(poly_list.bbs[:, 2:] > 100000, axis=1)
+        if np.any(huge):
+            polys = [Polygon([0], [0], 1) if huge[i] else poly_list[i] for i in range(len(poly_list))]
+            poly_list = PageGeometry.from_polygons(polys, poly_list.article_ids, poly_list.text_indices,
+                                                   poly_list.line_ids)
+        return resample_polys(poly_list, des_dist)
+
+    polys = []
     for poly in poly_list:
         bb = poly.get_bounding_box()
         if bb.width > 100000 or bb.height > 100000:
             poly = Polygon([0], [0], 1)
+        polys.append(poly)
 
-        poly_blow_up = blow_up(poly)
-        poly_thin_out = thin_out(poly_blow_up, des_dist)
+    # equals thin_out(blow_up(poly), des_dist) for every polygon
+    res = resample_polys(polys, des_dist)
 
+    for poly in res:
         # to calculate the bounding box "get_bounds" must be executed
-        poly_thin_out.get_bounding_box()
-        res.append(poly_thin_out)
+        poly.get_bounding_box()
 
     return res
 
@@ -213,11 +389,105 @@ def calc_line(x_points, y_points):
     if max([0] + x_points) - min([float("inf")] + x_points) < 2:
         return np.mean(x_points), float("inf")
 
-    try:
-        m, n, _, _, _ = linregress(x_points, y_points)
-        return m, n
-    except ValueError:
-        print("Failed linear regression calculation for values\nx = {} and\ny = {}".format(x_points, y_points))
+    m, n = _regression_lines(np.asarray([x_points]), np.asarray([y_points]))
+
+    return m[0], n[0]
+
+
+def _regression_lines(x_rows, y_rows):
+    """Calculate the linear regression lines of several polygons with the same number of points, the points of the i-th
+    polygon are given by the rows ``x_rows[i]`` and ``y_rows[i]``. The centered sums are calculated in the same way as
+    by ``scipy.stats.linregress`` (via ``np.cov`` with bias), so the results are bit-identical.
+
+    :param x_rows: x-coordinates of the polygons (one row per polygon)
+    :param y_rows: y-coordinates of the polygons (one row per polygon)
+    :type x_rows: np.ndarray
+    :type y_rows: np.ndarray
+    :return: arrays of the slopes m and the intersections with the y-axis n
+    """
+    points = np.stack([x_rows, y_rows], axis=1).astype(float)
+    means = np.mean(points, axis=2)
+    points -= means[:, :, None]
+    cov = np.matmul(points, points.transpose(0, 2, 1).conj())
+    cov *= np.true_divide(1, points.shape[2])
+    m = cov[:, 0, 1] / cov[:, 0, 0]
+
+    return m, means[:, 1] - m * means[:, 0]
+
+
+def calc_orientations(xs, ys, offsets):
+    """Batched version of calc_reg_line_stats: return the angles of the baseline polygons given by the ragged arrays
+    ``xs``, ``ys`` (the points of the i-th polygon are given by the slice ``offsets[i]:offsets[i + 1]``, see
+    ragged_points) and the intersections of their linear regression lines with the y-axis. The regression lines are
+    calculated for all polygons with the same number of points at once (see _regression_lines).
+
+    :param xs: x-coordinates of all points
+    :param ys: y-coordinates of all points
+    :param offsets: offsets of the polygons in xs, ys
+    :return: arrays of the angles and the intersections with the y-axis of all polygons
+    """
+    xs = np.asarray(xs, dtype=np.int64)
+    # We consider the negative y-values
+    ys_neg = -np.asarray(ys, dtype=np.int64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    n_points = np.diff(offsets)
+    n_polys = len(n_points)
+    poly_ids = np.repeat(np.arange(n_polys), n_points)
+
+    m = np.zeros(n_polys)
+    n = np.full(n_polys, np.inf)
+    non_empty = n_points > 0
+    first, last = offsets[:-1][non_empty], offsets[1:][non_empty] - 1
+
+    # polygons with two points: slope of the line through them
+    two = np.flatnonzero(n_points == 2)
+    diff_x = xs[offsets[two] + 1] - xs[offsets[two]]
+    diff_y = ys_neg[offsets[two] + 1] - ys_neg[offsets[two]]
+    vertical = diff_x == 0
+    m[two[vertical]] = np.inf
+    m[two[~vertical]] = diff_y[~vertical] / diff_x[~vertical]
+    n[two[~vertical]] = ys_neg[offsets[two[~vertical]] + 1] - m[two[~vertical]] * xs[offsets[two[~vertical]] + 1]
+
+    # polygons with more points: vertical lines, lines with an x-range of less than two pixels (the criterion of
+    # calc_line, which measures the range from min(0, x_min)) and regression
+    more = n_points > 2
+    x_max = np.zeros(n_polys, dtype=np.int64)
+    x_min = np.zeros(n_polys, dtype=np.int64)
+    if len(xs):
+        x_max[non_empty], x_min[non_empty] = np.maximum.reduceat(xs, first), np.minimum.reduceat(xs, first)
+    vertical = more & (x_max == x_min)
+    narrow = more & ~vertical & (np.maximum(x_max, 0) - x_min < 2)
+    x_mean = np.bincount(poly_ids, weights=xs, minlength=n_polys) / np.maximum(n_points, 1)
+
+    m[vertical] = np.inf
+    m[narrow] = x_mean[narrow]
+    # the regression lines are calculated for all polygons with the same number of points at once
+    regression = np.flatnonzero(more & ~vertical & ~narrow)
+    for n_reg in np.unique(n_points[regression]):
+        polys = regression[n_points[regression] == n_reg]
+        idx = offsets[polys, None] + np.arange(n_reg)
+        m[polys], n[polys] = _regression_lines(xs[idx], ys_neg[idx])
+
+    # math.atan instead of np.arctan, which can differ in the last bit
+    angles = np.array([math.pi / 2 if m_i == float("inf") else math.atan(m_i) for m_i in m.tolist()])
+
+    # in special cases change the direction of the orientation (-> add pi to angle)
+    x_first, x_last = np.zeros(n_polys, dtype=np.int64), np.zeros(n_polys, dtype=np.int64)
+    y_first, y_last = np.zeros(n_polys, dtype=np.int64), np.zeros(n_polys, dtype=np.int64)
+    x_first[non_empty], x_last[non_empty] = xs[first], xs[last]
+    y_first[non_empty], y_last[non_empty] = -ys_neg[first], -ys_neg[last]
+    flip = ((-math.pi / 2 < angles) & (angles <= -math.pi / 4) & (y_first > y_last)) | \
+           ((-math.pi / 4 < angles) & (angles <= math.pi / 4) & (x_first > x_last)) | \
+           ((math.pi / 4 < angles) & (angles < math.pi / 2) & (y_first < y_last))
+    angles[flip] += math.pi
+    # Make sure that the angle is positive
+    angles[angles < 0] += 2 * math.pi
+
+    # polygons with at most one point have no orientation
+    angles[n_points <= 1] = 0.0
+    n[n_points <= 1] = 0.0
+
+    return angles, n
 
 
 def calc_reg_line_stats(poly):
@@ -227,47 +497,9 @@ def calc_reg_line_stats(poly):
     :type poly: Polygon
     :return: angle of baseline and intersection of the linear regression line with the y-axis.
     """
-    if poly.n_points <= 1:
-        return 0.0, 0.0
-
-    n = float("inf")
-    if poly.n_points > 2:
-        x_max = max(poly.x_points)
-        x_min = min(poly.x_points)
-
-        if x_max == x_min:
-            m = float("inf")
-        else:
-            m, n = calc_line(poly.x_points, [-y for y in poly.y_points])
-    else:
-        x1, x2 = poly.x_points
-        y1, y2 = [-y for y in poly.y_points]
-        if x1 == x2:
-            m = float("inf")
-        else:
-            m = (y2 - y1) / (x2 - x1)
-            n = y2 - m * x2
-
-    if m == float("inf"):
-        angle = math.pi / 2
-    else:
-        angle = math.atan(m)
+    angles, n = calc_orientations(*ragged_points([poly]))
 
-    # in special cases change the direction of the orientation (-> add pi to angle)
-    if -math.pi / 2 < angle <= -math.pi / 4:
-        if poly.y_points[0] > poly.y_points[-1]:
-            angle += math.pi
-    if -math.pi / 4 < angle <= math.pi / 4:
-        if poly.x_points[0] > poly.x_points[-1]:
-            angle += math.pi
-    if math.pi / 4 < angle < math.pi / 2:
-        if poly.y_points[0] < poly.y_points[-1]:
-            angle += math.pi
-    # Make sure that the angle is positive
-    if angle < 0:
-        angle += 2 * math.pi
-
-    return angle, n
+    return float(angles[0]), float(n[0])
 
 
 def get_dist_fast(point, bb):
@@ -326,6 +558,58 @@ def get_off_dist(p1, p2, or_vec_x, or_vec_y):
     return diff_x * or_vec_y - diff_y * or_vec_x
 
 
+def _interline_dist(xs_a, ys_a, or_vec, xs, ys, offsets, bbs, neighbours, tick_dist, max_d):
+    """Minimum offline distance of the points (``xs_a``, ``ys_a``) of a baseline polygon with orientation vector
+    ``or_vec`` to the points of its ``neighbours`` (polygons given by the ragged arrays ``xs``, ``ys``) with an in-text
+    distance of at most 2 * tick_dist, as determined by calc_tols. calc_tols visits the pairs (point, neighbour) in
+    order and skips a pair if the distance of the point to the bounding box of the neighbour exceeds the current
+    minimum, so the candidates of all pairs are calculated at once and the improvements of the minimum are replayed in
+    visiting order.
+
+    :return: the minimum offline distance (max_d if there is none below)
+    """
+    dist = max_d
+    if not neighbours.size:
+        return dist
+
+    starts = offsets[neighbours]
+    lengths = offsets[neighbours + 1] - starts
+    idx = expand_ranges(starts, lengths)
+    segment_offsets = np.cumsum(lengths) - lengths
+    bbs = bbs[neighbours]
+
+    candidates = []
+    bb_dists = []
+    # split the points into chunks, s.t. the point distance blocks stay small
+    chunk_size = max(MAX_BLOCK_SIZE // len(idx), 1)
+    for c_start in range(0, len(xs_a), chunk_size):
+        p_x = np.expand_dims(xs_a[c_start:c_start + chunk_size], axis=1)
+        p_y = np.expand_dims(ys_a[c_start:c_start + chunk_size], axis=1)
+
+        # minimum offline distance to the points of every neighbour within the in-text range
+        in_dist = get_in_dist((p_x, p_y), (xs[idx], ys[idx]), or_vec[0], or_vec[1])
+        off_dist = abs(get_off_dist((p_x, p_y), (xs[idx], ys[idx]), or_vec[0], or_vec[1]))
+        off_dist[(in_dist < -2 * tick_dist) | (in_dist > 2 * tick_dist)] = np.inf
+        candidates.append(np.minimum.reduceat(off_dist, segment_offsets, axis=1))
+
+        # distance to the bounding box of every neighbour (see get_dist_fast)
+        bb_dists.append(np.maximum(bbs[:, 0] - p_x, 0) + np.maximum(p_x - bbs[:, 0] - bbs[:, 2], 0) +
+                        np.maximum(bbs[:, 1] - p_y, 0) + np.maximum(p_y - bbs[:, 1] - bbs[:, 3], 0))
+
+    candidates = np.concatenate(candidates).ravel()
+    bb_dists = np.concatenate(bb_dists).ravel()
+    improving = np.flatnonzero(candidates < dist)
+    candidates, bb_dists = candidates[improving], bb_dists[improving]
+
+    # replay the improvements of the minimum in visiting order
+    while True:
+        improving = np.flatnonzero((bb_dists <= dist) & (candidates < dist))
+        if not improving.size:
+            return dist
+        dist = float(candidates[improving[0]])
+        candidates, bb_dists = candidates[improving[0] + 1:], bb_dists[improving[0] + 1:]
+
+
 def calc_tols(polys_truth, tick_dist=5, max_d=250, rel_tol=0.25):
     """Calculate tolerance values for every GT baseline according to https://arxiv.org/pdf/1705.03311.pdf.
 
@@ -334,49 +618,38 @@ def calc_tols(polys_truth, tick_dist=5, max_d=250, rel_tol=0.25):
     :param max_d: max distance of pixels of a baseline polygon to any other baseline polygon (distance in terms of the
     x- and y-distance of the point to a bounding box of another polygon - see get_dist_fast) (default: 250)
     :param rel_tol: relative tolerance value (default: 0.25)
-    :type polys_truth: list of Polygon
+    :type polys_truth: list of Polygon or PageGeometry
     :return: tolerance values of the GT baselines
     """
+    # first and last point of every polygon
+    xs, ys, offsets = ragged_points(polys_truth)
+    ends = np.stack([xs[offsets[:-1]], ys[offsets[:-1]], xs[offsets[1:] - 1], ys[offsets[1:] - 1]], axis=1)
+    # Orientation vector (given by the angle of the linear regression line) of length 1 of every polygon
+    angles = calc_orientations(xs, ys, offsets)[0]
+    or_vecs = np.stack([np.cos(angles), np.sin(angles)], axis=1)
+
+    # pairs of polygons which can be within max_d of each other (see get_dist_fast)
+    bbs = bounding_boxes(polys_truth)
+    pairs_a, pairs_b = close_pairs(bbs, max_d)
+    if not isinstance(polys_truth, PageGeometry):
+        # the lines of a page geometry are distinct, a list may hold the same polygon more than once
+        is_other = np.array([polys_truth[a] is not polys_truth[b] for a, b in zip(pairs_a, pairs_b)], dtype=bool)
+        pairs_a, pairs_b = pairs_a[is_other], pairs_b[is_other]
+
+    # keep pairs with poly_b in the text range of poly_a, i.e., the in-text distances of the begin and end points of
+    # the polygons don't all have the same sign
+    or_vec_x, or_vec_y = or_vecs[pairs_a, 0], or_vecs[pairs_a, 1]
+    in_dists = np.stack([get_in_dist(ends[pairs_a, 2 * k:2 * k + 2].T, ends[pairs_b, 2 * l:2 * l + 2].T,
+                                     or_vec_x, or_vec_y) for k in range(2) for l in range(2)])
+    in_range = ~(np.all(in_dists < 0, axis=0) | np.all(in_dists > 0, axis=0))
+    pairs_a, pairs_b = pairs_a[in_range], pairs_b[in_range]
+    bounds = np.searchsorted(pairs_a, np.arange(len(polys_truth) + 1))
+
     tols = []
-    for poly_a in polys_truth:
-        # Calculate the angle of the linear regression line representing the baseline polygon poly_a
-        angle = calc_reg_line_stats(poly_a)[0]
-        # Orientation vector (given by angle) of length 1
-        or_vec_y, or_vec_x = math.sin(angle), math.cos(angle)
-        dist = max_d
-        # first and last point of polygon
-        pt_a1 = [poly_a.x_points[0], poly_a.y_points[0]]
-        pt_a2 = [poly_a.x_points[-1], poly_a.y_points[-1]]
-
-        # iterate over pixels of the current GT baseline polygon
-        for x_a, y_a in zip(poly_a.x_points, poly_a.y_points):
-            p_a = [x_a, y_a]
-            # iterate over all other polygons (to calculate X_G)
-            for poly_b in polys_truth:
-                if poly_b != poly_a:
-                    # if polygon poly_b is too far away from pixel p_a, skip
-                    if get_dist_fast(p_a, poly_b.get_bounding_box()) > dist:
-                        continue
-
-                    # get first and last pixel of baseline polygon poly_b
-                    pt_b1 = poly_b.x_points[0], poly_b.y_points[0]
-                    pt_b2 = poly_b.x_points[-1], poly_b.y_points[-1]
-
-                    # calculate the in-text distance of the begin and end points of the current polygons
-                    in_dist1 = get_in_dist(pt_a1, pt_b1, or_vec_x, or_vec_y)
-                    in_dist2 = get_in_dist(pt_a1, pt_b2, or_vec_x, or_vec_y)
-                    in_dist3 = get_in_dist(pt_a2, pt_b1, or_vec_x, or_vec_y)
-                    in_dist4 = get_in_dist(pt_a2, pt_b2, or_vec_x, or_vec_y)
-
-                    # checks if poly_b is in the text range of poly_a -> if not, skip polygon
-                    if (in_dist1 < 0 and in_dist2 < 0 and in_dist3 < 0 and in_dist4 < 0) or (
-                            in_dist1 > 0 and in_dist2 > 0 and in_dist3 > 0 and in_dist4 > 0):
-                        continue
-
-                    # at least one point of poly_b lies in the text range of poly_a, iterate over the points
-                    for p_b in zip(poly_b.x_points, poly_b.y_points):
-                        if -2 * tick_dist <= get_in_dist(p_a, p_b, or_vec_x, or_vec_y) <= 2 * tick_dist:
-                            dist = min(dist, abs(get_off_dist(p_a, p_b, or_vec_x, or_vec_y)))
+    for i in range(len(polys_truth)):
+        start, end = offsets[i], offsets[i + 1]
+        dist = _interline_dist(xs[start:end], ys[start:end], or_vecs[i], xs, ys, offsets, bbs,
+                               pairs_b[bounds[i]:bounds[i + 1]], tick_dist, max_d)
 
         # after the iteration dist is the minimum distance of poly_a to the "closest" polygonal GT chain
         if dist < max_d:
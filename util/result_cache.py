@@ -0,0 +1,146 @@
+import hashlib
+import io
+import os
+import sqlite3
+
+import numpy as np
+
+from util.distance import ragged_points
+
+# number of stored or refreshed results after which the changes are committed
+_COMMIT_INTERVAL = 256
+# number of results evicted at once
+_EVICT_BATCH = 64
+
+
+def page_key(polys_truth, polys_reco, settings):
+    """Content address of the evaluation of a page: a hash of the points of the truth and reco polygons (in order) and
+    the settings of the evaluation.
+
+    :param polys_truth: list (or PageGeometry) of truth polygons of the page
+    :param polys_reco: list (or PageGeometry) of reco polygons of the page
+    :param settings: tuple of the settings (tolerances, code version, ...) the results depend on
+    :type settings: tuple
+    :return: hex digest
+    :rtype: str
+    """
+    h = hashlib.sha256(repr(settings).encode("utf-8"))
+    for polys in [polys_truth, polys_reco]:
+        xs, ys, offsets = ragged_points(polys)
+        for values in [offsets, xs, ys]:
+            h.update(np.ascontiguousarray(values, dtype=np.int64).tobytes())
+            h.update(b"|")
+
+    return h.hexdigest()
+
+
+def _to_bytes(a):
+    buf = io.BytesIO()
+    np.save(buf, a, allow_pickle=False)
+    return buf.getvalue()
+
+
+def _from_bytes(b):
+    return np.load(io.BytesIO(b), allow_pickle=False)
+
+
+class ResultCache(object):
+
+    def __init__(self, cache_path, max_bytes=1 << 30):
+        """ opens (or creates) the on-disk cache ``cache_path`` (SQLite database) of the precision and recall matrices
+        of pages, addressed by their ``page_key``. The least recently used results are evicted if the stored matrices
+        exceed ``max_bytes``.
+
+        :param cache_path: path to the cache file
+        :param max_bytes: maximum size of the stored matrices in bytes
+        """
+        assert type(max_bytes) == int and max_bytes >= 0, "max_bytes has to be a non-negative int"
+
+        cache_dir = os.path.dirname(os.path.abspath(cache_path))
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_path = cache_path
+        self.max_bytes = max_bytes
+        self.connection = sqlite3.connect(cache_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, precision BLOB, "
+                                "recall BLOB, size INTEGER, last_used INTEGER)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        total_bytes, last_used = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0), COALESCE(MAX(last_used), 0) FROM results").fetchone()
+        self.total_bytes = total_bytes
+        self.last_used = last_used
+        self.n_changes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _touch(self):
+        self.last_used += 1
+        self.n_changes += 1
+        if self.n_changes >= _COMMIT_INTERVAL:
+            self.connection.commit()
+            self.n_changes = 0
+        return self.last_used
+
+    def get(self, key):
+        """ returns the precision and recall matrices stored for ``key`` (None if there are none) and marks them as
+        recently used
+
+        :param key: page key
+        :return: tuple of the precision and recall matrix or None
+        """
+        row = self.connection.execute("SELECT precision, recall FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.connection.execute("UPDATE results SET last_used = ? WHERE key = ?", (self._touch(), key))
+        return _from_bytes(row[0]), _from_bytes(row[1])
+
+    def put(self, key, precision, recall):
+        """ stores the precision and recall matrices for ``key`` and evicts the least recently used results if the cache
+        exceeds its size
+
+        :param key: page key
+        :param precision: #distTolTicks x #recoBaseLines matrix of precisions
+        :param recall: #distTolTicks x #truthBaseLines matrix of recalls
+        """
+        b_precision = _to_bytes(precision)
+        b_recall = _to_bytes(recall)
+        size = len(b_precision) + len(b_recall)
+        if size > self.max_bytes:
+            return
+
+        row = self.connection.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self.total_bytes -= row[0]
+        self.connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                                (key, b_precision, b_recall, size, self._touch()))
+        self.total_bytes += size
+        self.evict()
+
+    def evict(self):
+        """ evicts the least recently used results until the stored matrices don't exceed ``max_bytes`` """
+        while self.total_bytes > self.max_bytes:
+            rows = self.connection.execute("SELECT key, size FROM results ORDER BY last_used LIMIT ?",
+                                           (_EVICT_BATCH,)).fetchall()
+            if not rows:
+                self.total_bytes = 0
+                break
+            for key, size in rows:
+                if self.total_bytes <= self.max_bytes:
+                    break
+                self.connection.execute("DELETE FROM results WHERE key = ?", (key,))
+                self.total_bytes -= size
+
+    def close(self):
+        """ commits the changes and closes the cache """
+        self.connection.commit()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,215 @@
+import numpy as np
+
+# maximum number of candidate point pairs examined at once during a grid query
+MAX_QUERY_CANDIDATES = 1 << 22
+
+
+def expand_ranges(starts, counts):
+    """Return the concatenation of the index ranges [starts[k], starts[k] + counts[k]) for all k.
+
+    :param starts: start indices of the ranges
+    :param counts: lengths of the ranges
+    :return: int64 array of all indices
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.int64)
+    offsets = np.cumsum(counts) - counts
+
+    return np.arange(np.sum(counts)) + np.repeat(starts - offsets, counts)
+
+
+def far_apart(bbs_a, bbs_b, tols_b):
+    """Vectorized version of the early stopping criterion of ``BaselineMeasureEval.count_rel_hits``: a pair of
+    polygons is skipped if the intersection of their bounding boxes satisfies
+    min(width, height) < -3.0 * (largest tolerance of the polygon of ``bbs_b``). The arguments are paired row-wise.
+
+    :param bbs_a: Nx4 array of bounding boxes (x, y, width, height)
+    :param bbs_b: Nx4 array of bounding boxes (x, y, width, height)
+    :param tols_b: NxT array of tolerances belonging to bbs_b
+    :return: boolean array of length N, True if the pair can't have any hits
+    """
+    width = np.minimum(bbs_a[:, 0] + bbs_a[:, 2], bbs_b[:, 0] + bbs_b[:, 2]) - np.maximum(bbs_a[:, 0], bbs_b[:, 0])
+    height = np.minimum(bbs_a[:, 1] + bbs_a[:, 3], bbs_b[:, 1] + bbs_b[:, 3]) - np.maximum(bbs_a[:, 1], bbs_b[:, 1])
+
+    return np.minimum(width, height) < -3.0 * tols_b[:, -1]
+
+
+def _overlapping_intervals(lo_a, hi_a, lo_b, hi_b, order_b=None):
+    """Sweep and prune in one dimension: return all pairs (i, j) of overlapping intervals [lo_a[i], hi_a[i]] and
+    [lo_b[j], hi_b[j]], ``order_b`` is the (stable) order of the intervals of b by their lower end if it is known."""
+    # intervals of b starting within an interval of a
+    if order_b is None:
+        order_b = np.argsort(lo_b, kind="stable")
+    starts = np.searchsorted(lo_b[order_b], lo_a, side="left")
+    counts = np.searchsorted(lo_b[order_b], hi_a, side="right") - starts
+    counts = np.maximum(counts, 0)
+    pairs_a1 = np.repeat(np.arange(len(lo_a)), counts)
+    pairs_b1 = order_b[expand_ranges(starts, counts)]
+
+    # intervals of a starting within an interval of b (but strictly after it)
+    order_a = np.argsort(lo_a, kind="stable")
+    starts = np.searchsorted(lo_a[order_a], lo_b, side="right")
+    counts = np.searchsorted(lo_a[order_a], hi_b, side="right") - starts
+    counts = np.maximum(counts, 0)
+    pairs_b2 = np.repeat(np.arange(len(lo_b)), counts)
+    pairs_a2 = order_a[expand_ranges(starts, counts)]
+
+    return np.concatenate([pairs_a1, pairs_a2]), np.concatenate([pairs_b1, pairs_b2])
+
+
+def _reach(tols_b):
+    """Conservative reach of boxes with tolerances ``tols_b`` (NaN tolerances never stop early)."""
+    reach = np.nan_to_num(np.ceil(3.0 * tols_b[:, -1]), nan=np.inf)
+    return np.maximum(reach, 0.0) + 1.0
+
+
+def sweep_order(bbs_b, tols_b):
+    """Order in which ``candidate_pairs`` sweeps the enlarged boxes of b (by the lower end of their y-extent). It only
+    depends on b, so it can be computed once for boxes which are paired with many boxes of a.
+
+    :param bbs_b: Mx4 array of bounding boxes (x, y, width, height)
+    :param tols_b: MxT array of tolerances belonging to bbs_b
+    :return: int64 array of the indices of the boxes of b
+    """
+    bbs_b = np.asarray(bbs_b, dtype=np.int64)
+    return np.argsort(bbs_b[:, 1] - _reach(tols_b), kind="stable")
+
+
+def candidate_pairs(bbs_a, bbs_b, tols_b, order_b=None):
+    """Broad phase of the distance calculation: return all pairs (i, j) of bounding boxes ``bbs_a[i]``, ``bbs_b[j]``
+    which don't satisfy the early stopping criterion (see ``far_apart``), i.e., which are within 3 times the largest
+    tolerance of ``bbs_b[j]``. The boxes of b are enlarged by this distance and swept along the y-axis (which is the
+    narrow extent of baselines), the remaining pairs are pruned along the x-axis and by the exact criterion.
+
+    :param bbs_a: Nx4 array of bounding boxes (x, y, width, height)
+    :param bbs_b: Mx4 array of bounding boxes (x, y, width, height)
+    :param tols_b: MxT array of tolerances belonging to bbs_b
+    :param order_b: optional precomputed sweep order of the boxes of b (see sweep_order)
+    :return: indices of the boxes of a and indices of the boxes of b of all candidate pairs, sorted by (i, j)
+    """
+    if not (len(bbs_a) and len(bbs_b)):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    reach = _reach(tols_b)
+    bbs_a = np.asarray(bbs_a, dtype=np.int64)
+    bbs_b = np.asarray(bbs_b, dtype=np.int64)
+
+    pairs_a, pairs_b = _overlapping_intervals(bbs_a[:, 1], bbs_a[:, 1] + bbs_a[:, 3],
+                                              bbs_b[:, 1] - reach, bbs_b[:, 1] + bbs_b[:, 3] + reach, order_b)
+    overlap_x = (bbs_a[pairs_a, 0] <= bbs_b[pairs_b, 0] + bbs_b[pairs_b, 2] + reach[pairs_b]) & \
+                (bbs_b[pairs_b, 0] - reach[pairs_b] <= bbs_a[pairs_a, 0] + bbs_a[pairs_a, 2])
+    pairs_a, pairs_b = pairs_a[overlap_x], pairs_b[overlap_x]
+
+    keep = ~far_apart(bbs_a[pairs_a], bbs_b[pairs_b], tols_b[pairs_b])
+    pairs_a, pairs_b = pairs_a[keep], pairs_b[keep]
+
+    order = np.lexsort((pairs_b, pairs_a))
+    return pairs_a[order], pairs_b[order]
+
+
+def close_pairs(bbs, max_dist):
+    """Return all pairs (i, j), i != j, of bounding boxes whose L1 gap (sum of the gaps along the x- and y-axis) is at
+    most ``max_dist``. The boxes are swept along the y-axis, the remaining pairs are pruned by the exact gap.
+
+    :param bbs: Nx4 array of bounding boxes (x, y, width, height)
+    :param max_dist: maximum gap of the boxes
+    :return: indices i and indices j of all pairs, sorted by (i, j)
+    """
+    bbs = np.asarray(bbs, dtype=np.int64).reshape(-1, 4)
+    pairs_a, pairs_b = _overlapping_intervals(bbs[:, 1], bbs[:, 1] + bbs[:, 3],
+                                              bbs[:, 1] - max_dist, bbs[:, 1] + bbs[:, 3] + max_dist)
+    bbs_a, bbs_b = bbs[pairs_a], bbs[pairs_b]
+    gap_x = np.maximum(np.maximum(bbs_b[:, 0] - bbs_a[:, 0] - bbs_a[:, 2], bbs_a[:, 0] - bbs_b[:, 0] - bbs_b[:, 2]), 0)
+    gap_y = np.maximum(np.maximum(bbs_b[:, 1] - bbs_a[:, 1] - bbs_a[:, 3], bbs_a[:, 1] - bbs_b[:, 1] - bbs_b[:, 3]), 0)
+    keep = (pairs_a != pairs_b) & (gap_x + gap_y <= max_dist)
+    pairs_a, pairs_b = pairs_a[keep], pairs_b[keep]
+
+    order = np.lexsort((pairs_b, pairs_a))
+    return pairs_a[order], pairs_b[order]
+
+
+class PointGrid(object):
+    def __init__(self, xs, ys, cell_size):
+        """
+        Uniform grid over a set of integer points, used for nearest neighbour queries in the L1 metric. Points are
+        sorted by the key of their grid cell, so the points of a cell form a contiguous block.
+
+        :param xs: x-coordinates of the points (int array)
+        :param ys: y-coordinates of the points (int array)
+        :param cell_size: edge length of a grid cell, the maximum radius supported by the queries
+        """
+        assert len(xs) == len(ys), "xs and ys have to be of same length"
+
+        self.cell_size = max(int(np.ceil(cell_size)), 1)
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+
+        if len(xs):
+            cells_x, cells_y = xs // self.cell_size, ys // self.cell_size
+            self.min_cell_x, self.min_cell_y = cells_x.min(), cells_y.min()
+            self.n_cells_x = cells_x.max() - self.min_cell_x + 1
+            self.n_cells_y = cells_y.max() - self.min_cell_y + 1
+            keys = self._cell_keys(cells_x, cells_y)
+        else:
+            self.min_cell_x, self.min_cell_y = 0, 0
+            self.n_cells_x, self.n_cells_y = 0, 0
+            keys = np.zeros(0, dtype=np.int64)
+
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.xs = xs[order]
+        self.ys = ys[order]
+
+    def _cell_keys(self, cells_x, cells_y):
+        return (cells_x - self.min_cell_x) * self.n_cells_y + (cells_y - self.min_cell_y)
+
+    def nearest_dists(self, xs, ys, radius):
+        """
+        Calculates for every query point the L1 distance to the nearest point of the grid. Distances larger than
+        ``radius`` are reported as infinity.
+
+        :param xs: x-coordinates of the query points (int array)
+        :param ys: y-coordinates of the query points (int array)
+        :param radius: maximum distance of interest (scalar or one value per query point), at most cell_size
+        :return: float array of nearest distances (inf if there is no grid point within radius)
+        """
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        radius = np.broadcast_to(np.asarray(radius, dtype=float), xs.shape)
+        assert np.all(radius <= self.cell_size), "radius mustn't exceed cell_size"
+
+        min_dist = np.full(xs.shape, np.inf)
+        if not (len(xs) and len(self.xs)):
+            return min_dist
+
+        # every point within radius lies in the 3x3 neighbourhood of the cell of the query point
+        cells_x = np.expand_dims(xs // self.cell_size, axis=1) + np.repeat([-1, 0, 1], 3)
+        cells_y = np.expand_dims(ys // self.cell_size, axis=1) + np.tile([-1, 0, 1], 3)
+        valid = (cells_x >= self.min_cell_x) & (cells_x < self.min_cell_x + self.n_cells_x) & \
+                (cells_y >= self.min_cell_y) & (cells_y < self.min_cell_y + self.n_cells_y)
+        keys = np.where(valid, self._cell_keys(cells_x, cells_y), -1)
+
+        starts = np.searchsorted(self.keys, keys, side="left")
+        counts = np.where(valid, np.searchsorted(self.keys, keys, side="right") - starts, 0)
+        query_counts = np.sum(counts, axis=1)
+
+        # process the queries in chunks, s.t. the number of candidate pairs stays bounded
+        chunk_bounds = np.cumsum(query_counts) // MAX_QUERY_CANDIDATES
+        _, chunk_starts = np.unique(chunk_bounds, return_index=True)
+        chunk_starts = np.append(chunk_starts, len(xs))
+
+        for c_start, c_end in zip(chunk_starts[:-1], chunk_starts[1:]):
+            c_counts = counts[c_start:c_end].ravel()
+            if not np.any(c_counts):
+                continue
+            # grid point indices and query indices of all candidate pairs
+            idx = expand_ranges(starts[c_start:c_end].ravel(), c_counts)
+            query_idx = np.repeat(np.arange(c_start, c_end), query_counts[c_start:c_end])
+
+            dists = abs(xs[query_idx] - self.xs[idx]) + abs(ys[query_idx] - self.ys[idx])
+            has_candidates = np.flatnonzero(query_counts[c_start:c_end]) + c_start
+            query_offsets = np.searchsorted(query_idx, has_candidates)
+            min_dist[has_candidates] = np.minimum.reduceat(dists, query_offsets)
+
+        min_dist[min_dist > radius] = np.inf
+        return min_dist
@@ -21,6 +21,7 @@ from uuid import uuid4
 from abc import ABCMeta
 
 from util.geometry import Polygon
+from util.xmlformats.PageCustom import parse_custom_attr
 
 # https://docs.python.org/3.5/library/xml.etree.elementtree.html#parsing-xml-with-namespaces
 _ns = {'p': 'http://schema.primaresearch.org/PAGE/gts/pagecontent/2013-07-15'}
@@ -58,6 +59,31 @@ def _get_text_equiv(e):
     return tmp.text
 
 
+def parse_custom(s):
+    """Parses the custom attribute ``s`` and returns the values as a dictionary of dictionaries, e.g.:
+        `"readingOrder {index:0;} structure {id:a1; type:article;}"` returns
+        `{'readingOrder':{'index':'0'}, 'structure':{'id':'a1', type:'article'}}`
+    Selectors and property names are stripped, the values are kept as they are written (up to the ";"). Malformed
+    rules (without "{") and properties (without ":") are skipped.
+
+    :param s: custom attribute
+    :type s: str
+    :return: dict of dict
+    """
+    res = dict()
+    if s:
+        custom = parse_custom_attr(s, raw_values=True)
+        if custom is not None:
+            return custom
+        for a in s.split('}')[:-1]:
+            if '{' not in a:
+                continue
+            key, vals = a.split('{', 1)
+            res[key.strip()] = {val.split(':', 1)[0].strip(): val.split(':', 1)[1]
+                                for val in vals.split(';')[:-1] if ':' in val}
+    return res
+
+
 class Point:
     """Point (x,y) class according to
         http://www.ocr-d.de/sites/all/gt_guidelines/pagecontent_xsd_Simple_Type_pc_PointsType.html
@@ -126,7 +152,7 @@ class Point:
         :return: Polygon object
         """
         x, y = np.transpose(Point.point_to_list(points))
-        return Polygon(x.tolist(), y.tolist(), n_points=len(x))
+        return Polygon(x, y, n_points=len(x))
 
     @classmethod
     def list_to_polygon(cls, coords):
@@ -219,16 +245,8 @@ class Region(BaseElement):
             `{'readingOrder':{'index':'0'}, 'structure':{'id':'a1', type:'article'}}`
         :return: dict of dict
         """
-        res = dict()
-        if self.custom:
-            attribs = self.custom.replace(' ', '').split('}')[:-1]
-            for a in attribs:
-                assert len(a.split('{', 1)) == 2
-                key, vals = a.split('{', 1)
-                vals = vals.split(';')[:-1]
-                d = {val.split(':')[0]: val.split(':')[1] for val in vals}
-                res[key] = d
-        return res
+        # all spaces are removed (unlike the article id of TextLine.from_xml)
+        return parse_custom(self.custom.replace(' ', '') if self.custom else self.custom)
 
     def to_xml(self, name_element=None):
         """Converts a `Region` object to an XML structure
@@ -337,12 +355,7 @@ class TextLine(Region):
     @classmethod
     def from_xml(cls, etree_element):
         cls.check_tag(etree_element.tag)
-        custom_tag = etree_element.attrib.get('custom')
-        if custom_tag and "structure" in custom_tag:
-            structure = custom_tag[custom_tag.find('structure'):].split('}')[0] + '}'
-            article_id = structure[structure.find('id:') + 3:].split(';')[0]
-        else:
-            article_id = None
+        article_id = parse_custom(etree_element.attrib.get('custom')).get('structure', {}).get('id')
         return TextLine(
             baseline=Point.list_from_xml(etree_element.find('p:Baseline', _ns)),
             text=Text(text_equiv=_get_text_equiv(etree_element)),
@@ -1,13 +1,16 @@
 # -*- coding: utf-8 -*-
 import os
+import copy
 import datetime
 import logging
+import zlib
 
 import cssutils
 from lxml import etree
 from argparse import ArgumentParser
 
 from util.xmlformats.PageObjects import TextLine
+from util.xmlformats import PageCustom, PageSchema
 
 # Make sure that the css parser for the custom attribute doesn't spam "WARNING Property: Unknown Property name."
 # Make sure that the css parser for the custom attribute doesn't spam "WARNING Property: Unknown Property name."
@@ -39,8 +42,17 @@ class Page:
     # Schema for Transkribus PageXml
     XSL_SCHEMA_FILENAME = "pagecontent_transkribus.xsd"
 
-    # XML schema loaded once for all
-    cachedValidationContext = None
+    # Validation policies: validate no file, every file once (again only if it is changed while loading), a sample of
+    # the files or every file after loading and after completing it
+    sVALIDATION_OFF = "off"
+    sVALIDATION_ONCE = "once"
+    sVALIDATION_SAMPLED = "sampled"
+    sVALIDATION_FULL = "full"
+
+    # Process-wide validation settings, see set_validation_policy
+    validation_policy = sVALIDATION_ONCE
+    validation_sample_rate = 0.1
+    validate_in_background = False
 
     sMETADATA_ELT = "Metadata"
     sCREATOR_ELT = "Creator"
@@ -55,40 +67,117 @@ class Page:
 
     sEXT = ".xml"
 
-    def __init__(self, path_to_xml=None, creator_name=sCREATOR, img_filename=None, img_w=None, img_h=None):
+    def __init__(self, path_to_xml=None, creator_name=sCREATOR, img_filename=None, img_w=None, img_h=None,
+                 validation=None):
+        self.validation = validation if validation is not None else self.validation_policy
+        assert self.validation in (self.sVALIDATION_OFF, self.sVALIDATION_ONCE, self.sVALIDATION_SAMPLED,
+                                   self.sVALIDATION_FULL), "unknown validation policy {}".format(self.validation)
+        self.b_valid = None  # result of the last validation (None if there is none yet)
+        self.validation_future = None  # pending validation in the background
+
         self.page_doc = self.load_page_xml(path_to_xml) if path_to_xml is not None else self.create_page_xml_document(
             creator_name, img_filename, img_w, img_h)
+        b_changed = False
         if len(self.page_doc.getroot().getchildren()) != 2:
             elts = self.page_doc.getroot().getchildren()
             # if Metadata node is missing, add it
             if self.sMETADATA_ELT not in [elt.tag for elt in elts]:
                 self.create_metadata(self.sCREATOR, comments="Metadata entry was missing, added..")
+                b_changed = True
 
-        if not self.validate(self.page_doc):
-            logging.warning("File given by {} is not a valid PageXml file.".format(path_to_xml))
+        if self.is_validated(path_to_xml) and (b_changed or self.validation == self.sVALIDATION_FULL):
+            self.check_validity(self.page_doc, "File given by {} is not a valid PageXml file.".format(path_to_xml),
+                                path_to_xml if not b_changed else None)
             # exit(1)
         self.metadata = self.get_metadata()
 
     # =========== SCHEMA ===========
 
+    @classmethod
+    def set_validation_policy(cls, policy, sample_rate=None, background=None):
+        """
+        Set the validation policy of all Page objects created afterwards (unless given to the constructor)
+
+        :param policy: one of sVALIDATION_OFF, sVALIDATION_ONCE, sVALIDATION_SAMPLED or sVALIDATION_FULL
+        :param sample_rate: fraction of the files validated with the policy sVALIDATION_SAMPLED
+        :param background: validate in a background worker, s.t. loading isn't blocked
+        """
+        assert policy in (cls.sVALIDATION_OFF, cls.sVALIDATION_ONCE, cls.sVALIDATION_SAMPLED, cls.sVALIDATION_FULL), \
+            "unknown validation policy {}".format(policy)
+        Page.validation_policy = policy
+        if sample_rate is not None:
+            assert 0.0 <= sample_rate <= 1.0, "sample_rate has to be in the range [0,1]"
+            Page.validation_sample_rate = sample_rate
+        if background is not None:
+            Page.validate_in_background = background
+
+    def is_validated(self, path_to_xml):
+        """
+        Return True if the file ``path_to_xml`` is validated according to the validation policy of this page.
+        """
+        return self.is_validated_by_policy(self.validation, path_to_xml)
+
+    @classmethod
+    def is_validated_by_policy(cls, policy, path_to_xml):
+        """
+        Return True if the file ``path_to_xml`` is validated according to the validation policy ``policy``. The sample
+        of the files is determined by the checksum of their paths (the same in every process).
+        """
+        if policy == cls.sVALIDATION_OFF:
+            return False
+        if policy == cls.sVALIDATION_SAMPLED:
+            return zlib.crc32(str(path_to_xml).encode("utf-8")) % 10000 < cls.validation_sample_rate * 10000
+        return True
+
     def validate(self, doc):
         """
-        Validate against the PageXml schema used by Transkribus
+        Validate against the PageXml schema used by Transkribus (compiled once per process, see PageSchema)
 
         Return True or False
         """
-        if not self.cachedValidationContext:
-            schema_filename_ = self.get_schema_filename()
-            xmlschema_doc = etree.parse(schema_filename_)
-            self.cachedValidationContext = etree.XMLSchema(xmlschema_doc)
-
-        b_valid = self.cachedValidationContext.validate(doc)
-        log = self.cachedValidationContext.error_log
+        b_valid, log = PageSchema.validate(doc, self.get_schema_filename())
 
         if not b_valid:
             logging.warning(log)
         return b_valid
 
+    def check_validity(self, doc, s_warning, path_to_xml=None):
+        """
+        Validate ``doc`` (in the background if validate_in_background is set) and log ``s_warning`` if it is invalid,
+        the result is stored in b_valid. If ``doc`` is unchanged since it has been loaded from ``path_to_xml``, the
+        background worker parses the file again. Otherwise, the document is copied before it is handed to the worker,
+        which takes time in the order of parsing it and isn't done in the background.
+        """
+        if not self.validate_in_background:
+            self.b_valid = self.validate(doc)
+            if not self.b_valid:
+                logging.warning(s_warning)
+            return
+
+        def log_validity(b_valid, log):
+            if not b_valid:
+                logging.warning(log)
+                logging.warning(s_warning)
+
+        if path_to_xml is not None:
+            self.validation_future = PageSchema.validate_file_in_background(path_to_xml, self.get_schema_filename(),
+                                                                            log_validity)
+        else:
+            # the page may be changed while the copy is validated
+            self.validation_future = PageSchema.validate_in_background(copy.deepcopy(doc), self.get_schema_filename(),
+                                                                       log_validity)
+
+    def wait_validation(self):
+        """
+        Wait for the validation in the background (if any) and return its result
+
+        Return True or False (None if the page hasn't been validated)
+        """
+        if self.validation_future is not None:
+            self.b_valid = self.validation_future.result()[0]
+            self.validation_future = None
+        return self.b_valid
+
     @classmethod
     def get_schema_filename(cls):
         """
@@ -301,6 +390,10 @@ class Page:
         """
         if not s:
             return {}
+        custom_dict = PageCustom.parse_custom_attr(s, lower_names=True)
+        if custom_dict is not None:
+            return custom_dict
+
         custom_dict = {}
         sheet = cssutils.parseString(s)
         for rule in sheet:
@@ -482,8 +575,9 @@ class Page:
 
         xml_page_root.append(page_node)
 
-        b_validate = self.validate(self.page_doc)
-        assert b_validate, 'new file not validated by schema'
+        if self.validation != self.sVALIDATION_OFF:
+            b_validate = self.validate(self.page_doc)
+            assert b_validate, 'new file not validated by schema'
 
         return page_node
 
@@ -516,8 +610,9 @@ class Page:
         :rtype: etree._ElementTree
         """
         page_doc = etree.parse(path_to_xml, etree.XMLParser(remove_blank_text=True))
-        if not self.validate(page_doc):
-            logging.warning("PageXml is not valid according to the Page schema definition {}.".format(self.XSILOCATION))
+        if self.is_validated(path_to_xml):
+            self.check_validity(page_doc, "PageXml is not valid according to the Page schema definition {}.".format(
+                self.XSILOCATION), path_to_xml)
 
         return page_doc
 
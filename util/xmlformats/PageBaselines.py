@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import re
+
+import numpy as np
+from lxml import etree
+
+from util.geometry import PageGeometry
+from util.xmlformats.Page import Page
+
+# points attributes only holding pairs x,y (coordinates with at most 9 digits) separated by single spaces are tokenized
+# in bulk, all other attributes are parsed pair by pair like Page.get_point_list
+_POINTS_RE = re.compile(r"-?[0-9]{1,9},-?[0-9]{1,9}(?: -?[0-9]{1,9},-?[0-9]{1,9})*")
+
+
+def _parse_points(s_points):
+    """Parse the points attribute ``s_points`` like Page.get_point_list and return the x and y coordinates."""
+    xs, ys = [], []
+    for s_pair in s_points.split(' '):  # s_pair = 'x,y'
+        (sx, sy) = s_pair.split(',')
+        xs.append(int(sx))
+        ys.append(int(sy))
+
+    return xs, ys
+
+
+def _get_article_id(s_custom):
+    """Article id of a TextLine with custom attribute ``s_custom``, see TextLine.get_article_id."""
+    custom = Page.parse_custom_attr(s_custom)
+    try:
+        return custom["structure"]["id"] if custom["structure"]["type"] == "article" else None
+    except KeyError:
+        return None
+
+
+def read_baselines(path_to_xml, with_line_ids=False, with_article_ids=False):
+    """Read the baselines of all TextLines of the PageXml file ``path_to_xml`` as columnar page, in the order of
+    ``Page.get_textlines``. The file is streamed with ``etree.iterparse``, only the TextLine and Baseline elements are
+    looked at and released right away. There is no schema validation and neither the text, the surrounding polygons
+    nor the custom attributes (unless article ids are requested) are read. The baselines equal
+    ``[tl.baseline.to_polygon() for tl in Page(path_to_xml).get_textlines()]``.
+
+    :param path_to_xml: path to the PageXml file
+    :param with_line_ids: store the ids of the TextLines as line_ids of the page
+    :param with_article_ids: store the article ids of the TextLines (None if there is none) as article_ids of the page
+    :type path_to_xml: str
+    :return: page geometry holding the baselines
+    :rtype: PageGeometry
+    """
+    tag_textline = "{%s}%s" % (Page.NS_PAGE_XML, Page.sTEXTLINE)
+    tag_baseline = "{%s}%s" % (Page.NS_PAGE_XML, Page.sBASELINE)
+
+    l_points = []
+    line_ids = []
+    article_ids = []
+    s_points = None
+    in_textline = False
+    for event, elt in etree.iterparse(path_to_xml, events=("start", "end"), tag=(tag_textline, tag_baseline)):
+        if elt.tag == tag_baseline:
+            # the first Baseline of a TextLine holds the baseline (its points or the first points below it)
+            if event == "end" and in_textline and s_points is None:
+                s_points = elt.get("points")
+                if s_points is None:
+                    s_points = elt.xpath("(.//@points)[1]")[0]
+            continue
+
+        if event == "start":
+            in_textline = True
+            s_points = None
+            continue
+
+        if s_points is None:
+            raise IndexError("TextLine {} has no Baseline".format(elt.get("id")))
+        l_points.append(str(s_points))
+        if with_line_ids:
+            line_ids.append(elt.get("id"))
+        if with_article_ids:
+            article_ids.append(_get_article_id(elt.get(Page.sCUSTOM_ATTR)))
+        in_textline = False
+
+        # release the TextLine and the elements parsed before it
+        elt.clear()
+        while elt.getprevious() is not None:
+            del elt.getparent()[0]
+
+    offsets = np.zeros(len(l_points) + 1, dtype=np.int64)
+    if all(_POINTS_RE.fullmatch(s) is not None for s in l_points):
+        # every point holds exactly one comma
+        np.cumsum([s.count(",") for s in l_points], out=offsets[1:])
+        coords = np.fromstring(" ".join(l_points).replace(",", " "), dtype=np.int64, sep=" ")
+        xs, ys = coords[0::2], coords[1::2]
+    else:
+        l_xy = [_parse_points(s) for s in l_points]
+        np.cumsum([len(x) for x, _ in l_xy], out=offsets[1:])
+        xs = np.array([x for l_x, _ in l_xy for x in l_x], dtype=np.int64)
+        ys = np.array([y for _, l_y in l_xy for y in l_y], dtype=np.int64)
+
+    return PageGeometry(xs, ys, offsets, article_ids=article_ids if with_article_ids else None,
+                        line_ids=line_ids if with_line_ids else None)
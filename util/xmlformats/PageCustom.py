@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+import re
+from functools import lru_cache
+
+# Custom attributes like "readingOrder {index:4;} structure {id:a1; type:article;}" made of rules with identifier
+# selectors, identifier property names and identifier or integer values (every property terminated by ";", only spaces
+# as whitespace) are parsed by a single pass over the string. For them, cssutils (up to the lower case property names,
+# see lower_names) and the string splitting of PAGE.parse_custom give the same dictionary of dictionaries, all
+# other strings are left to these parsers. PAGE.parse_custom keeps the values as they are written, so with raw_values
+# no whitespace is allowed around the values.
+_IDENT = r"[A-Za-z][A-Za-z0-9_-]*"
+_VALUE = r"(?:[A-Za-z_][A-Za-z0-9_-]*|0|-?[1-9][0-9]{0,17})"
+_RULE_RE = re.compile(r" *({0}) *\{{((?: *{0} *: *{1} *;)*) *\}} *".format(_IDENT, _VALUE))
+_PROP_RE = re.compile(r" *({0}) *: *({1}) *;".format(_IDENT, _VALUE))
+_RULE_RAW_RE = re.compile(r" *({0}) *\{{((?: *{0} *:{1};)*) *\}} *".format(_IDENT, _VALUE))
+_PROP_RAW_RE = re.compile(r" *({0}) *:({1});".format(_IDENT, _VALUE))
+
+
+@lru_cache(maxsize=4096)
+def _parse_rules(s, lower_names, raw_values):
+    """Parse the custom attribute ``s`` to a tuple of rules (selector, ((name, value), ...)), None if ``s`` isn't of
+    the simple form described above (or has repeated property names in a rule if ``lower_names`` is set)."""
+    rule_re, prop_re = (_RULE_RAW_RE, _PROP_RAW_RE) if raw_values else (_RULE_RE, _PROP_RE)
+    rules = []
+    pos = 0
+    while pos < len(s):
+        m = rule_re.match(s, pos)
+        if m is None:
+            return None
+        props = prop_re.findall(m.group(2))
+        if lower_names:
+            # cssutils normalizes the property names, the order of repeated properties is left to cssutils
+            props = [(name.lower(), value) for name, value in props]
+            if len(set(name for name, _ in props)) != len(props):
+                return None
+        rules.append((m.group(1), tuple(props)))
+        pos = m.end()
+
+    return tuple(rules)
+
+
+def parse_custom_attr(s, lower_names=False, raw_values=False):
+    """Parse the custom attribute ``s`` to a dictionary of dictionaries, e.g.
+    ``"readingOrder {index:4;} structure {id:a1; type:article;}"`` returns
+    ``{'readingOrder': {'index': '4'}, 'structure': {'id': 'a1', 'type': 'article'}}``. Repeated strings are parsed
+    once, every call returns new dictionaries.
+
+    :param s: custom attribute
+    :param lower_names: convert the property names to lower case (like cssutils)
+    :param raw_values: only accept values without surrounding whitespace (like PAGE.parse_custom keeps them)
+    :type s: str
+    :return: dictionary of dictionaries, None if ``s`` isn't of the simple form parsed here
+    """
+    if not isinstance(s, str):
+        return None
+    rules = _parse_rules(s, lower_names, raw_values)
+    if rules is None:
+        return None
+
+    return {selector: dict(props) for selector, props in rules}
@@ -47,7 +47,7 @@ class Points:
     def to_polygon(self):
         x, y = np.transpose(self.points_list)
 
-        return Polygon(x.tolist(), y.tolist(), n_points=len(x))
+        return Polygon(x, y, n_points=len(x))
 
 
 class Region:
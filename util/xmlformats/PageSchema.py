@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from lxml import etree
+
+# compiled XML schemas by file name, shared by all Page and PageXml objects of the process
+_schemas = {}
+_schemas_lock = threading.Lock()
+# a compiled schema validates one document at a time
+_validation_lock = threading.Lock()
+# single worker for validations in the background (created on first use)
+_executor = None
+
+
+def get_schema(schema_filename):
+    """Return the compiled XML schema of the file ``schema_filename``, which is parsed and compiled once per process.
+
+    :param schema_filename: path to the XSD file
+    :return: compiled schema
+    :rtype: etree.XMLSchema
+    """
+    with _schemas_lock:
+        schema = _schemas.get(schema_filename)
+        if schema is None:
+            schema = _schemas[schema_filename] = etree.XMLSchema(etree.parse(schema_filename))
+
+    return schema
+
+
+def validate(doc, schema_filename):
+    """Validate the document ``doc`` against the (cached) schema ``schema_filename``.
+
+    :param doc: DOM document node
+    :param schema_filename: path to the XSD file
+    :return: a tuple containing the validity of the document and the error log of the validation
+    """
+    schema = get_schema(schema_filename)
+    with _validation_lock:
+        b_valid = schema.validate(doc)
+        log = schema.error_log
+
+    return b_valid, log
+
+
+def validate_file(path_to_xml, schema_filename):
+    """Parse the file ``path_to_xml`` (like Page.load_page_xml) and validate it against the (cached) schema
+    ``schema_filename``.
+
+    :param path_to_xml: path to the xml file
+    :param schema_filename: path to the XSD file
+    :return: a tuple containing the validity of the document and the error log of the validation
+    """
+    doc = etree.parse(path_to_xml, etree.XMLParser(remove_blank_text=True))
+    return validate(doc, schema_filename)
+
+
+def _submit(fn, *args, callback=None):
+    global _executor
+    with _schemas_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="page-validation")
+
+    future = _executor.submit(fn, *args)
+    if callback is not None:
+        future.add_done_callback(lambda f: callback(*f.result()))
+
+    return future
+
+
+def validate_in_background(doc, schema_filename, callback=None):
+    """Validate the document ``doc`` against the (cached) schema ``schema_filename`` in a background worker. The
+    document mustn't be changed until the validation is done.
+
+    :param doc: DOM document node
+    :param schema_filename: path to the XSD file
+    :param callback: optional function called with the validity and the error log when the validation is done
+    :return: future of the result of ``validate``
+    :rtype: concurrent.futures.Future
+    """
+    return _submit(validate, doc, schema_filename, callback=callback)
+
+
+def validate_file_in_background(path_to_xml, schema_filename, callback=None):
+    """Parse and validate the file ``path_to_xml`` (see ``validate_file``) in a background worker, s.t. neither the
+    parsing nor the validation blocks the caller.
+
+    :param path_to_xml: path to the xml file
+    :param schema_filename: path to the XSD file
+    :param callback: optional function called with the validity and the error log when the validation is done
+    :return: future of the result of ``validate_file``
+    :rtype: concurrent.futures.Future
+    """
+    return _submit(validate_file, path_to_xml, schema_filename, callback=callback)
@@ -8,6 +8,7 @@ from lxml import etree
 from argparse import ArgumentParser
 
 from util.xmlformats.PageObjects import TextLine
+from util.xmlformats import PageCustom, PageSchema
 
 # Make sure that the css parser for the custom attribute doesn't spam "WARNING Property: Unknown Property name."
 cssutils.log.setLevel(logging.ERROR)
@@ -34,9 +35,6 @@ class PageXml:
     # Schema for Transkribus PageXml
     XSL_SCHEMA_FILENAME = "pagecontent_transkribus.xsd"
 
-    # XML schema loaded once for all
-    cachedValidationContext = None
-
     sMETADATA_ELT = "Metadata"
     sCREATOR_ELT = "Creator"
     sCREATED_ELT = "Created"
@@ -60,17 +58,11 @@ class PageXml:
     @classmethod
     def validate(cls, doc):
         """
-        Validate against the PageXml schema used by Transkribus
+        Validate against the PageXml schema used by Transkribus (compiled once per process, see PageSchema)
 
         Return True or False
         """
-        if not cls.cachedValidationContext:
-            schema_filename_ = cls.get_schema_filename()
-            xmlschema_doc = etree.parse(schema_filename_)
-            cls.cachedValidationContext = etree.XMLSchema(xmlschema_doc)
-
-        b_valid = cls.cachedValidationContext.validate(doc)
-        log = cls.cachedValidationContext.error_log
+        b_valid, log = PageSchema.validate(doc, cls.get_schema_filename())
 
         if not b_valid:
             print(log)
@@ -263,6 +255,10 @@ class PageXml:
         parse_custom_attr( "readingOrder {index:4;} structure {type:catch-word;}" )
             --> { 'readingOrder': { 'index':'4' }, 'structure':{'type':'catch-word'} }
         """
+        custom_dict = PageCustom.parse_custom_attr(s, lower_names=True)
+        if custom_dict is not None:
+            return custom_dict
+
         custom_dict = {}
         sheet = cssutils.parseString(s)
         for rule in sheet: